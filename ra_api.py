@@ -0,0 +1,240 @@
+# API de librería para consumir eventos en streaming, sin esperar al final del run ni leer el JSON:
+#
+#   from ra_api import iter_venue_events, aiter_club_events
+#   for row in iter_venue_events([911, 20367]):          # GraphQL + widget (ra_venues_full)
+#       ingest(row)
+#   async for row, record in aiter_club_events(with_records=True):   # navegador (ra_final)
+#       await ingest(row, record)
+#
+# Cada fila sale en cuanto se construye (build_row / build_price_row) y no se acumulan filas (solo
+# los IDs ya entregados, para deduplicar: crece con el número de eventos, no con su tamaño): el
+# scraping avanza al ritmo del consumidor. En los generadores síncronos de venues eso es natural;
+# el navegador y las variantes async corren en un hilo productor con una cola acotada (buffer) que
+# lo bloquea cuando el consumidor se retrasa. Cerrar el iterador (break, aclose) detiene el productor;
+# en ra_final la tarea del navegador lo ve en data["cancelled"]() y vuelve con normalidad, así
+# botasaurus cierra (o devuelve al pool caliente) el navegador como en cualquier otro run.
+# Cada iterador tiene su propio deadline (deadline_s, por defecto sin límite) que empieza al crearlo:
+# no hereda el de un run anterior del mismo proceso. Al alcanzarlo el iterador simplemente termina.
+import time, random, queue, threading
+from typing import Iterable, Iterator, AsyncIterator, Callable, Optional, Any
+
+from ra_output import event_id_from_url
+from ra_deadline import Deadline, DeadlineExceeded
+
+STREAM_BUFFER = 8  # filas que el productor puede adelantar al consumidor
+
+
+# =================== Canal productor → consumidor ===================
+class _Closed(BaseException):
+    """El consumidor cerró el iterador. BaseException para que los `except Exception` de los
+    scrapers no la traguen y el productor termine de verdad"""
+
+
+class _Failed:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+_DONE = object()
+
+
+class _Channel:
+    """Cola acotada entre un hilo productor y un consumidor (síncrono o async)"""
+
+    def __init__(self, buffer: int):
+        self.q: "queue.Queue" = queue.Queue(maxsize=max(1, buffer))
+        self.closed = threading.Event()
+
+    def put(self, item):
+        """Productor: bloquea con la cola llena (backpressure); _Closed si el consumidor se fue"""
+        while not self.closed.is_set():
+            try:
+                self.q.put(item, timeout=0.2)
+                return
+            except queue.Full:
+                continue
+        raise _Closed()
+
+    def start(self, produce: Callable[[Callable[[Any], None]], None]):
+        def run():
+            try:
+                produce(self.put)
+                self.put(_DONE)
+            except _Closed:
+                pass
+            except BaseException as e:
+                try:
+                    self.put(_Failed(e))
+                except _Closed:
+                    pass
+        threading.Thread(target=run, name="ra-api-producer", daemon=True).start()
+        return self
+
+    def unwrap(self, item):
+        """None al terminar; relanza en el consumidor la excepción del productor"""
+        if item is _DONE:
+            return None
+        if isinstance(item, _Failed):
+            raise item.exc
+        return item
+
+    def close(self):
+        self.closed.set()
+        while True:  # liberar al productor si estaba esperando hueco
+            try:
+                self.q.get_nowait()
+            except queue.Empty:
+                break
+        try:
+            self.q.put_nowait(_DONE)  # y a un get() async que se quedara esperando
+        except queue.Full:
+            pass
+
+
+def _stream(produce, buffer: int = STREAM_BUFFER) -> Iterator[Any]:
+    chan = _Channel(buffer).start(produce)
+    try:
+        while True:
+            item = chan.q.get()
+            if item is _DONE:
+                return
+            yield chan.unwrap(item)
+    finally:
+        chan.close()
+
+
+async def _astream(produce, buffer: int = STREAM_BUFFER) -> AsyncIterator[Any]:
+    import asyncio  # diferido: ~70 ms que los consumidores síncronos no necesitan
+    loop = asyncio.get_running_loop()
+    chan = _Channel(buffer).start(produce)
+    try:
+        while True:
+            item = await loop.run_in_executor(None, chan.q.get)
+            if item is _DONE:
+                return
+            yield chan.unwrap(item)
+    finally:
+        chan.close()
+
+
+def _drain(make_iter: Callable[[], Iterator[Any]]):
+    """produce(emit) a partir de un iterador síncrono, cerrándolo siempre (sesión, store...)"""
+    def produce(emit):
+        it = make_iter()
+        try:
+            for item in it:
+                emit(item)
+        finally:
+            it.close()
+    return produce
+
+
+# =================== ra_venues_full (GraphQL + widget) ===================
+def iter_venue_events(venue_ids: Optional[Iterable[int]] = None, date_from: Optional[str] = None,
+                      date_to: Optional[str] = None, with_records: bool = False,
+                      session=None, http=None, deadline_s: Optional[float] = None) -> Iterator[Any]:
+    """Filas de los eventos de los venues (por defecto los de venues.json), una a una.
+    with_records=True da (fila, registro normalizado). Sin hilos: cada evento se descarga
+    cuando el consumidor pide el siguiente. Respeta la caché de niveles (ENABLE_TIER_CACHE)."""
+    return _iter_venue_events(venue_ids, date_from, date_to, with_records, session, http, Deadline(deadline_s))
+
+
+def _iter_venue_events(venue_ids, date_from, date_to, with_records, session, http, deadline: Deadline):
+    import ra_venues_full as rv
+    from ra_store import EventStore
+    venue_ids = list(venue_ids or rv.CLUB_NAMES)
+    own_session = session is None
+    s = session or rv.make_session()
+    http = http or rv.make_retry_client()
+    http.deadline = deadline  # el de este iterador, no el DEADLINE que dejó scrape_venues
+    http.attach(s)
+    tiers = EventStore(rv.STORE_PATH) if rv.ENABLE_TIER_CACHE else None
+    seen = set()
+    try:
+        for venue_id in venue_ids:
+            try:
+                events = http.call("venue_events", rv.gql_get_events, s, venue_id, date_from, date_to, rv.COUNT,
+                                   deadline=deadline)
+            except DeadlineExceeded as e:
+                print(f"[API] {e}: fin del iterador")
+                return
+            except Exception as e:
+                print(f"[API] Error listando el venue {venue_id}: {e}")
+                continue
+            for ev in events or []:
+                if ev["id"] in seen:
+                    continue
+                seen.add(ev["id"])
+                try:
+                    # memo por evento: memoria constante
+                    result = rv.process_event(s, ev, http, {}, tiers, deadline=deadline)
+                except DeadlineExceeded as e:
+                    print(f"[API] {e}: fin del iterador")
+                    return
+                if result:
+                    yield result if with_records else result[0]
+                deadline.sleep(random.uniform(0.3, 0.7))
+    finally:
+        if tiers is not None:
+            tiers.close()
+        if own_session:
+            s.close()
+
+
+def aiter_venue_events(venue_ids: Optional[Iterable[int]] = None, date_from: Optional[str] = None,
+                       date_to: Optional[str] = None, with_records: bool = False,
+                       buffer: int = STREAM_BUFFER, deadline_s: Optional[float] = None,
+                       **kwargs) -> AsyncIterator[Any]:
+    """iter_venue_events como iterador async (la red va en un hilo; el bucle de eventos no se bloquea)"""
+    deadline = Deadline(deadline_s)  # empieza al crear el iterador, como en la versión síncrona
+    return _astream(_drain(lambda: _iter_venue_events(venue_ids, date_from, date_to, with_records,
+                                                      kwargs.get("session"), kwargs.get("http"), deadline)), buffer)
+
+
+# =================== ra_final (navegador) ===================
+def _club_producer(club_ids, max_events, skip_ids, with_records, warm, deadline: Deadline):
+    import ra_final as rf
+    club_ids = [int(c) for c in (club_ids or rf.CLUB_IDS)]
+    max_events = max_events or rf.MAX_EVENTS_PER_CLUB
+    task = rf.scrape_club_warm if warm else rf.scrape_club
+
+    def produce(emit):
+        seen = set()  # IDs ya entregados
+        cancelled = threading.Event()
+
+        def on_row(row, record):
+            # nunca lanza _Closed dentro de la tarea: botasaurus solo limpia el navegador con Exception
+            key = event_id_from_url(row.get("url")) or row.get("url")
+            if key in seen or cancelled.is_set():
+                return
+            seen.add(key)
+            try:
+                emit((row, record) if with_records else row)
+            except _Closed:
+                cancelled.set()
+
+        for cid in club_ids:
+            if deadline.expired():
+                return
+            task({"club_id": cid, "max_events": max_events, "skip_ids": sorted(skip_ids or []), "emit": on_row,
+                  "cancelled": cancelled.is_set, "deadline_at": deadline.at})
+            if cancelled.is_set():
+                raise _Closed()  # ya fuera de la tarea: el navegador está cerrado
+    return produce
+
+
+def iter_club_events(club_ids: Optional[Iterable[int]] = None, max_events: Optional[int] = None,
+                     skip_ids: Optional[Iterable[int]] = None, with_records: bool = False,
+                     buffer: int = STREAM_BUFFER, warm: bool = False,
+                     deadline_s: Optional[float] = None) -> Iterator[Any]:
+    """Filas de ra_final (scrape_club) club a club, deduplicadas por ID de evento, según se parsean.
+    El navegador corre en un hilo y espera cuando hay `buffer` filas sin consumir."""
+    return _stream(_club_producer(club_ids, max_events, skip_ids, with_records, warm, Deadline(deadline_s)), buffer)
+
+
+def aiter_club_events(club_ids: Optional[Iterable[int]] = None, max_events: Optional[int] = None,
+                      skip_ids: Optional[Iterable[int]] = None, with_records: bool = False,
+                      buffer: int = STREAM_BUFFER, warm: bool = False,
+                      deadline_s: Optional[float] = None) -> AsyncIterator[Any]:
+    """iter_club_events como iterador async"""
+    return _astream(_club_producer(club_ids, max_events, skip_ids, with_records, warm, Deadline(deadline_s)), buffer)
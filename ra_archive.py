@@ -0,0 +1,250 @@
+# Archivo de respuestas crudas (HTML del club/evento, HTML del widget, JSON de GraphQL)
+# direccionado por contenido y comprimido, más un modo --replay que regenera la salida
+# sin red y sin importar botasaurus.
+#
+#   archive/objects/ab/abcdef....zst|.gz   -> payload comprimido (sha256 del payload)
+#   archive/index.jsonl                    -> una línea por fetch (kind, key, ids, fecha, run)
+#
+# Uso:
+#   python ra_archive.py --replay venues   # regenera ra_venues_events.json
+#   python ra_archive.py --replay final    # regenera output/ra_all.json
+import os, json, gzip, hashlib, threading, argparse, time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+try:
+    import zstandard
+except ImportError:  # gzip de la stdlib como fallback
+    zstandard = None
+
+ARCHIVE_DIR = "archive"
+INDEX_FILE = "index.jsonl"
+
+
+def new_run_id() -> str:
+    return datetime.now().strftime("%Y%m%dT%H%M%S")
+
+
+class RawArchive:
+    """Almacén de payloads crudos direccionado por sha256, con índice JSONL append-only"""
+
+    def __init__(self, root: str = ARCHIVE_DIR, run_id: Optional[str] = None, codec: Optional[str] = None):
+        self.root = root
+        self.run_id = run_id or new_run_id()
+        self.codec = codec or ("zst" if zstandard else "gz")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+
+    # ---------- escritura ----------
+    def _object_path(self, sha: str, codec: str) -> str:
+        return os.path.join(self.root, "objects", sha[:2], f"{sha}.{codec}")
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == "zst":
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    def put(self, kind: str, key: str, payload, **meta) -> str:
+        """Guardar un payload (str/bytes/dict) y registrarlo en el índice. Devuelve el sha256"""
+        if isinstance(payload, (dict, list)):
+            payload = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        data = payload.encode("utf-8") if isinstance(payload, str) else payload
+        sha = hashlib.sha256(data).hexdigest()
+        path = self._object_path(sha, self.codec)
+        entry = {
+            "kind": kind,
+            "key": key,
+            "sha256": sha,
+            "codec": self.codec,
+            "size": len(data),
+            "fetched_at": datetime.now().isoformat(timespec="seconds"),
+            "run_id": self.run_id,
+        }
+        entry.update({k: str(v) for k, v in meta.items() if v is not None})
+        with self._lock:
+            if not os.path.exists(path):  # dedup por contenido
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(self._compress(data))
+                os.replace(tmp, path)
+            with open(os.path.join(self.root, INDEX_FILE), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return sha
+
+    # ---------- lectura ----------
+    def iter_index(self):
+        path = os.path.join(self.root, INDEX_FILE)
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # línea truncada por un corte a mitad de escritura
+
+    def latest_entries(self, run_id: Optional[str] = None, as_of: Optional[str] = None) -> Dict[tuple, Dict[str, Any]]:
+        """Última entrada por (kind, key), opcionalmente limitada a un run o a una fecha máxima"""
+        latest = {}
+        for e in self.iter_index():
+            if run_id and e.get("run_id") != run_id:
+                continue
+            if as_of and e.get("fetched_at", "") > as_of:
+                continue
+            latest[(e["kind"], e["key"])] = e  # el índice es append-only: gana la última
+        return latest
+
+    def read(self, entry: Dict[str, Any]) -> bytes:
+        codec = entry.get("codec", "gz")
+        with open(self._object_path(entry["sha256"], codec), "rb") as f:
+            raw = f.read()
+        if codec == "zst":
+            if zstandard is None:
+                raise RuntimeError("El archivo contiene objetos .zst: pip install zstandard")
+            return zstandard.ZstdDecompressor().decompress(raw)
+        return gzip.decompress(raw)
+
+    def read_text(self, entry: Dict[str, Any]) -> str:
+        return self.read(entry).decode("utf-8")
+
+    def read_json(self, entry: Dict[str, Any]) -> Any:
+        return json.loads(self.read(entry))
+
+
+# =================== Replay ===================
+def _replay_venue_event(args):
+    """Worker: reconstruir una fila de ra_venues_full a partir de payloads archivados"""
+    import ra_venues_full as rv
+    ev, widget_html, genres_json = args
+    tickets = rv.parse_ticket_prices(widget_html) if widget_html else []
+    event_data = rv.parse_event_genres(genres_json) if genres_json else rv.empty_event_data()
+    ev = dict(ev)
+    ev["generos"] = event_data.get("genres", "")
+    row = rv.build_row(ev, tickets, rv.VENUE_IDS, event_data)
+    return row, rv.build_record(ev, tickets, row, event_data)
+
+
+def _replay_final_event(args):
+    """Worker: reconstruir una fila de ra_final a partir del HTML archivado del evento"""
+    from bs4 import BeautifulSoup
+    import ra_parse
+    event_url, page_html = args
+    soup = BeautifulSoup(page_html, "html.parser")
+    meta = ra_parse.extract_jsonld(soup)
+    if not (meta.get("name") or meta.get("startDate") or meta.get("endDate")):
+        return None
+    tickets_norm = ra_parse.extract_tickets_from_html(page_html)
+    row = ra_parse.build_price_row(event_url, page_html, meta, ra_parse.extract_genres_from_html(soup), tickets_norm)
+    return row, ra_parse.build_price_record(row, tickets_norm, meta)
+
+
+def _run_jobs(fn, jobs: List[Any], workers: int) -> List[Any]:
+    if workers > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor  # diferido: multiprocessing solo para el replay
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            return list(ex.map(fn, jobs, chunksize=max(1, len(jobs) // (workers * 8))))
+    return [fn(j) for j in jobs]
+
+
+def area_listing_pages(archive: RawArchive, run_id=None, as_of=None) -> List[Dict[str, Any]]:
+    """Páginas gql_area_events del último listado de área: todas del run que archivó su página 1.
+    Mezclar la última versión de cada página entre runs juntaría listados de días distintos."""
+    entries = [e for e in archive.iter_index()
+               if e["kind"] == "gql_area_events" and (not run_id or e.get("run_id") == run_id)
+               and (not as_of or e.get("fetched_at", "") <= as_of)]
+    first = next((e for e in reversed(entries) if str(e.get("page")) == "1"), None)
+    if first is None:
+        return []
+    listing = first["key"].rsplit(":", 1)[0]  # área y fechas, sin la página
+    pages = {}
+    for e in entries:
+        if e.get("run_id") == first.get("run_id") and e["key"].rsplit(":", 1)[0] == listing:
+            pages[e["key"]] = e  # dentro del run, la última de cada página
+    return list(pages.values())
+
+
+def replay_venues(archive: RawArchive, workers: int = 1, run_id=None, as_of=None) -> List[tuple]:
+    """Reconstruir (fila, registro) de ra_venues_full (mismo orden de venues/eventos) sin red"""
+    import ra_venues_full as rv
+    latest = archive.latest_entries(run_id, as_of)
+    # Con la caché de niveles un run no vuelve a pedir los detalles (static) aún frescos:
+    # si el run elegido no los tiene, se usan los últimos archivados de cualquier run
+    any_run = archive.latest_entries(None, as_of) if run_id else latest
+
+    def payload(kind, key, as_json=False):
+        e = latest.get((kind, key)) or (any_run.get((kind, key)) if kind == "gql_event_genres" else None)
+        if not e:
+            return None
+        return archive.read_json(e) if as_json else archive.read_text(e)
+
+    # Listados por área (--listing area): las páginas de un mismo listado, repartidas por venue.id
+    area_events = []
+    for e in area_listing_pages(archive, run_id, as_of):
+        area_events.extend(rv.parse_area_events(archive.read_json(e))[0])
+    area_buckets = rv.bucket_by_venue(area_events)
+
+    jobs = []
+    for venue_id, venue_name in rv.CLUB_NAMES.items():
+        listing = payload("gql_venue_events", rv.venue_events_key(venue_id), as_json=True)
+        if listing is not None:
+            events = rv.parse_venue_events(listing)
+        elif venue_id in area_buckets:
+            events = area_buckets[venue_id]
+        else:
+            print(f"[REPLAY] Sin listado archivado para {venue_name} (ID: {venue_id})")
+            continue
+        for ev in events:
+            eid = ev["id"]
+            jobs.append((
+                ev,
+                payload("widget_html", rv.widget_url(eid)),
+                payload("gql_event_genres", rv.event_genres_key(eid), as_json=True),
+            ))
+    return _run_jobs(_replay_venue_event, jobs, workers)
+
+
+def replay_final(archive: RawArchive, workers: int = 1, run_id=None, as_of=None) -> List[tuple]:
+    """Reconstruir (fila, registro) de ra_final (dedup por URL, orden de aparición) sin red"""
+    latest = archive.latest_entries(run_id, as_of)
+    jobs, seen = [], set()
+    # El dict conserva el orden de la primera aparición de cada URL en el índice (orden de fetch)
+    for (kind, key), e in latest.items():
+        if kind != "event_html" or key in seen:
+            continue
+        seen.add(key)
+        jobs.append((key, archive.read_text(e)))
+    return [r for r in _run_jobs(_replay_final_event, jobs, workers) if r]
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Archivo de respuestas crudas de RA")
+    ap.add_argument("--replay", choices=["venues", "final"], required=True,
+                    help="qué salida regenerar desde el archivo (sin red)")
+    ap.add_argument("--archive", default=ARCHIVE_DIR)
+    ap.add_argument("--out", default=None, help="ruta de salida (por defecto la del scraper)")
+    ap.add_argument("--run", default=None, help="limitar a un run_id concreto")
+    ap.add_argument("--as-of", default=None, help="ignorar fetches posteriores a esta fecha ISO")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--format", default="json", help="formatos de salida: json,sqlite,parquet")
+    ap.add_argument("--out-dir", default="output", help="directorio para sqlite/parquet")
+    args = ap.parse_args()
+
+    from ra_output import write_outputs, parse_formats
+    formats = parse_formats(args.format)
+    t0 = time.perf_counter()
+    archive = RawArchive(args.archive)
+    if args.replay == "venues":
+        results = replay_venues(archive, args.workers, args.run, args.as_of)
+        out_path = args.out or "ra_venues_events.json"
+    else:
+        results = replay_final(archive, args.workers, args.run, args.as_of)
+        out_path = args.out or "output/ra_all.json"
+
+    rows = [row for row, _ in results]
+    records = [rec for _, rec in results]
+    written = write_outputs(rows, records, formats, out_path, args.out_dir,
+                            args.run or f"replay-{new_run_id()}", source=f"replay:{args.replay}")
+    print(f"[REPLAY] {len(rows)} filas regeneradas en {', '.join(written)} ({time.perf_counter() - t0:.2f}s)")
@@ -0,0 +1,639 @@
+# Primitivas de navegador para ra_final (botasaurus 4 / CDP). No importa botasaurus:
+# solo recibe el driver, así que se puede importar desde cualquier ruta.
+import fnmatch, threading, time, random, queue, statistics
+from collections import Counter
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlsplit
+
+# Señal de "página de evento lista": el JSON-LD del evento (de ahí salen nombre/fechas)
+READY_SELECTOR = 'script[type="application/ld+json"]'
+READY_TIMEOUT_S = 10.0
+
+# Se ejecuta dentro de la página: resuelve en cuanto aparece la señal (MutationObserver)
+# o con "" al vencer el plazo. Devuelve "jsonld" si el JSON-LD ya trae contenido.
+WAIT_READY_JS = r"""
+const selector = args.selector;
+const probe = () => {
+    const node = document.querySelector(selector);
+    return node && node.textContent && node.textContent.trim() ? "jsonld" : "";
+};
+const hit = probe();
+if (hit) return hit;
+return new Promise((resolve) => {
+    let timer = null;
+    const obs = new MutationObserver(() => {
+        const h = probe();
+        if (h) {
+            obs.disconnect();
+            clearTimeout(timer);
+            resolve(h);
+        }
+    });
+    obs.observe(document, {childList: true, subtree: true, characterData: true});
+    timer = setTimeout(() => { obs.disconnect(); resolve(""); }, args.timeout_ms);
+});
+"""
+
+
+def wait_for_event_ready(driver, timeout_s: float = READY_TIMEOUT_S, selector: str = READY_SELECTOR) -> Optional[str]:
+    """Esperar en el navegador a la señal de contenido listo, con plazo.
+    Devuelve el nombre de la señal, "" si venció el plazo o None si no se pudo evaluar."""
+    try:
+        # margen en Python por encima del plazo del navegador para que gane el setTimeout
+        return driver.run_js(WAIT_READY_JS, {"selector": selector, "timeout_ms": int(timeout_s * 1000)},
+                             timeout=timeout_s + 5)
+    except OperationTimeout:
+        raise
+    except Exception:
+        return None
+
+
+# =================== Watchdog de operaciones del driver ===================
+# Una llamada colgada (driver.get, execute_script, page_html...) bloqueaba todo el run secuencial.
+# GuardedDriver envuelve el driver: cada llamada va a un hilo auxiliar con plazo duro y, si vence,
+# el scraper recupera el control con OperationTimeout. Además cada evento tiene un presupuesto total
+# (EVENT_TIMEOUT_S) que también limita las esperas (driver.sleep), así que el peor caso por evento
+# está acotado. Tras un timeout el driver queda marcado como colgado hasta recycle(): tab nuevo y
+# cierre del viejo; si eso también se cuelga, BrowserHung y el club termina con lo que lleve.
+NAV_TIMEOUT_S = 30.0      # driver.get y demás navegaciones
+SCRIPT_TIMEOUT_S = 10.0   # execute_script / run_js sin plazo propio, page_html, mouse...
+EVENT_TIMEOUT_S = 90.0    # techo por evento: navegación + espera + captcha + comportamiento humano
+
+NAV_METHODS = {"get", "google_get", "get_via", "get_via_this_page", "reload", "open_link_in_new_tab"}
+PROPERTY_OPS = {"page_html", "current_url", "title"}
+
+
+class OperationTimeout(Exception):
+    """Una operación del driver (o el presupuesto del evento) venció su plazo"""
+
+    def __init__(self, what: str, seconds: float, message: Optional[str] = None):
+        super().__init__(message or f"{what} sin respuesta tras {seconds:.0f}s")
+        self.what = what
+        self.seconds = seconds
+
+
+class BrowserHung(OperationTimeout):
+    """Ni siquiera se pudo abrir un tab nuevo: hay que abandonar el navegador"""
+
+
+class GuardedDriver:
+    """Proxy del driver de botasaurus con plazos duros por operación y presupuesto por evento"""
+
+    def __init__(self, driver, nav_timeout_s: float = NAV_TIMEOUT_S, script_timeout_s: float = SCRIPT_TIMEOUT_S,
+                 log=print):
+        self.driver = driver
+        self.nav_timeout_s = nav_timeout_s
+        self.script_timeout_s = script_timeout_s
+        self.log = log
+        self.hung: Optional[str] = None  # operación colgada pendiente de recycle()
+        self.timeouts = 0
+        self._budget_at: Optional[float] = None
+        self._budget_s: Optional[float] = None
+
+    # ---------- presupuesto por evento ----------
+    def start_budget(self, seconds: Optional[float]):
+        """Empezar el presupuesto de un evento (None = sin techo, solo plazos por operación)"""
+        self._budget_s = seconds
+        self._budget_at = time.monotonic() + seconds if seconds else None
+
+    def budget_left(self) -> float:
+        return float("inf") if self._budget_at is None else self._budget_at - time.monotonic()
+
+    def sleep(self, seconds: float):
+        """time.sleep que no pasa del presupuesto del evento (y entonces lanza OperationTimeout)"""
+        left = self.budget_left()
+        if seconds >= left:
+            time.sleep(max(0.0, left))
+            raise self._budget_exceeded()
+        time.sleep(seconds)
+
+    def _budget_exceeded(self) -> OperationTimeout:
+        return OperationTimeout("presupuesto", self._budget_s or 0,
+                                f"presupuesto de la página agotado ({self._budget_s or 0:.0f}s)")
+
+    # ---------- llamadas con plazo ----------
+    def call(self, what: str, limit: Optional[float], fn, *args, **kwargs):
+        """fn(*args, **kwargs) con plazo duro (limit o SCRIPT_TIMEOUT_S, recortado al presupuesto)"""
+        if self.hung:
+            raise OperationTimeout(what, 0, f"{what}: driver colgado en {self.hung}")
+        limit = min(limit or self.script_timeout_s, self.budget_left())
+        if limit <= 0:
+            raise self._budget_exceeded()
+        box: Dict[str, Any] = {}
+        done = threading.Event()
+
+        def run():
+            try:
+                box["result"] = fn(*args, **kwargs)
+            except BaseException as e:
+                box["error"] = e
+            finally:
+                done.set()
+
+        # hilo daemon: si se cuelga para siempre no impide salir del proceso
+        threading.Thread(target=run, name=f"ra-driver-{what}", daemon=True).start()
+        if not done.wait(limit):
+            self.hung = what
+            self.timeouts += 1
+            raise OperationTimeout(what, limit)
+        if "error" in box:
+            raise box["error"]
+        return box.get("result")
+
+    def __getattr__(self, name):
+        attr_timeout = self.nav_timeout_s if name in NAV_METHODS else self.script_timeout_s
+        if name in PROPERTY_OPS:
+            return self.call(name, attr_timeout, getattr, self.driver, name)
+        value = getattr(self.driver, name)
+        if not callable(value):
+            return value
+
+        def guarded(*args, **kwargs):
+            # run_js(..., timeout=n) ya trae su plazo: el watchdog deja un margen por encima
+            own = kwargs.get("timeout") if name in ("run_js", "run_cdp_command") else None
+            return self.call(name, (own + 2) if own else attr_timeout, value, *args, **kwargs)
+        return guarded
+
+    # ---------- recuperación ----------
+    def recycle(self, on_new_tab=None):
+        """Sustituir el tab actual (colgado) por uno nuevo. Devuelve el tab nuevo o lanza BrowserHung"""
+        old_tab = getattr(self.driver, "_tab", None)
+        what, self.hung = self.hung, None
+        budget_at, self._budget_at = self._budget_at, None  # reciclar no cuenta contra el evento
+        try:
+            tab = self.call("recycle", self.nav_timeout_s, self.driver.open_link_in_new_tab, "about:blank")
+            if old_tab is not None and old_tab is not tab:
+                try:
+                    self.call("close_tab", 5, old_tab.close)
+                except Exception:
+                    self.hung = None  # el tab viejo puede no contestar: se abandona
+            if on_new_tab:
+                on_new_tab()  # blocklist, stealth... en el tab nuevo (también con plazo)
+        except OperationTimeout as e:
+            raise BrowserHung("abrir un tab nuevo", e.seconds) from e
+        finally:
+            self._budget_at = budget_at
+        self.log(f"[WATCHDOG] Tab reciclado tras colgarse en {what}")
+        return tab
+
+
+# =================== Blocklist de peticiones ===================
+# Patrones de Network.setBlockedURLs (subcadena de la URL; '*' como comodín), por categoría.
+# Solo leemos HTML, JSON-LD y el JSON de Tickets embebido: nada de esto hace falta.
+BLOCK_RULES = {
+    "images_css": [".css", ".jpg", ".jpeg", ".png", ".webp", ".svg", ".gif", ".ico", ".avif"],
+    "fonts": [".woff", ".woff2", ".ttf", ".otf", ".eot", "fonts.googleapis.com", "fonts.gstatic.com", "use.typekit.net"],
+    "media": [".mp4", ".webm", ".m3u8", ".mp3", ".m4a", ".ogg", "youtube.com/embed", "player.vimeo.com",
+              "w.soundcloud.com", "open.spotify.com/embed"],
+    "analytics": ["googletagmanager.com", "google-analytics.com", "analytics.google.com", "hotjar.com",
+                  "segment.io", "segment.com", "clarity.ms", "mixpanel.com", "amplitude.com",
+                  "scorecardresearch.com", "quantserve.com", "newrelic.com", "nr-data.net", "sentry.io",
+                  "datadoghq", "browser-intake"],
+    "ads": ["doubleclick.net", "googlesyndication.com", "googleadservices.com", "adservice.google",
+            "amazon-adsystem.com", "adnxs.com", "criteo", "taboola.com", "outbrain.com",
+            "connect.facebook.net", "facebook.com/tr", "analytics.tiktok.com", "snap.licdn.com"],
+    "other": [".pdf", ".zip"],
+}
+
+
+def blocklist_patterns(categories=None):
+    """Lista plana de patrones para las categorías indicadas (todas por defecto)"""
+    cats = categories if categories is not None else list(BLOCK_RULES)
+    return [p for c in cats for p in BLOCK_RULES.get(c, [])]
+
+
+def match_block_rule(url: str, categories=None) -> Optional[str]:
+    """Categoría de la primera regla que bloquea esta URL (misma semántica que Chrome: subcadena + '*')"""
+    u = (url or "").lower()
+    if u.startswith("data:"):
+        return None
+    for cat in (categories if categories is not None else BLOCK_RULES):
+        for p in BLOCK_RULES.get(cat, []):
+            if ("*" in p and fnmatch.fnmatchcase(u, f"*{p}*")) or p in u:
+                return cat
+    return None
+
+
+# Navigation Timing (entrada "navigation") + Resource Timing de la página actual en una sola llamada.
+# Los tiempos son ms desde el inicio de la navegación; loadEventEnd es 0 si load aún no llegó
+# (leemos en cuanto el JSON-LD está listo, que suele ser antes).
+PAGE_PERF_JS = r"""
+const nav = performance.getEntriesByType("navigation")[0];
+const res = performance.getEntriesByType("resource").map(e => [
+    e.name, e.transferSize || 0, e.encodedBodySize || 0, e.duration, e.initiatorType, e.startTime,
+    e.responseStart > 0 ? 1 : 0
+]);
+return {
+    url: location.href,
+    nav: nav ? {
+        dns: nav.domainLookupEnd - nav.domainLookupStart,
+        connect: nav.connectEnd - nav.connectStart,
+        tls: nav.secureConnectionStart > 0 ? nav.connectEnd - nav.secureConnectionStart : 0,
+        request_start: nav.requestStart,
+        response_start: nav.responseStart,
+        response_end: nav.responseEnd,
+        dom_interactive: nav.domInteractive,
+        dcl: nav.domContentLoadedEventEnd,
+        load: nav.loadEventEnd,
+        transfer_size: nav.transferSize || 0,
+        encoded_body: nav.encodedBodySize || 0,
+        decoded_body: nav.decodedBodySize || 0
+    } : null,
+    resources: res
+};
+"""
+
+TIMING_TOP_N = 10  # recursos más lentos que se guardan por página
+
+
+def _site(host: str) -> str:
+    """Dominio registrable aproximado (últimas dos etiquetas): es.ra.co → ra.co"""
+    return ".".join(host.split(".")[-2:]) if host else ""
+
+
+def _ms(v) -> Optional[float]:
+    return round(v, 1) if isinstance(v, (int, float)) and v > 0 else None
+
+
+def page_timing(perf: Dict[str, Any], top_n: int = TIMING_TOP_N) -> Dict[str, Any]:
+    """Resumen de una página a partir del resultado de PAGE_PERF_JS: TTFB, DCL, load, bytes
+    por tipo de recurso, bytes de terceros por host y los top_n recursos más lentos"""
+    nav = (perf or {}).get("nav") or {}
+    resources = (perf or {}).get("resources") or []
+    site = _site(urlsplit((perf or {}).get("url") or "").hostname or "")
+    by_type, bytes_by_type, third_party = Counter(), Counter(), Counter()
+    opaque = 0
+    for name, transfer, _encoded, _duration, itype, _start, has_timing in resources:
+        by_type[itype or "other"] += 1
+        bytes_by_type[itype or "other"] += transfer
+        host = urlsplit(name).hostname or ""
+        if host and _site(host) != site:
+            third_party[host] += transfer
+        if not has_timing:
+            opaque += 1  # recurso de terceros sin Timing-Allow-Origin: tamaños a 0
+    slowest = sorted(resources, key=lambda r: -(r[3] or 0))[:top_n]
+    return {
+        "ttfb_ms": _ms(nav.get("response_start")),
+        "server_ms": _ms((nav.get("response_start") or 0) - (nav.get("request_start") or 0)),
+        "dns_ms": round(nav.get("dns") or 0, 1),
+        "connect_ms": round(nav.get("connect") or 0, 1),
+        "tls_ms": round(nav.get("tls") or 0, 1),
+        "dom_interactive_ms": _ms(nav.get("dom_interactive")),
+        "dcl_ms": _ms(nav.get("dcl")),
+        "load_ms": _ms(nav.get("load")),  # None = load no había llegado al leer
+        "document_bytes": nav.get("transfer_size", 0),
+        "resources": len(resources),
+        "resource_bytes": sum(r[1] for r in resources),
+        "requests_by_type": dict(by_type),
+        "bytes_by_type": dict(bytes_by_type),
+        "third_party_bytes": dict(third_party.most_common(top_n)),
+        "opaque_resources": opaque,
+        "slowest": [
+            {"url": r[0], "type": r[4], "duration_ms": round(r[3], 1), "start_ms": round(r[5], 1), "transfer_size": r[1]}
+            for r in slowest
+        ],
+    }
+
+
+def summarize_page_timings(pages: List[Dict[str, Any]], top_n: int = TIMING_TOP_N) -> Dict[str, Any]:
+    """Agregado por club de los "timing" de cada página: medianas/p90 y los recursos más lentos"""
+    timings = [p["timing"] for p in pages if p.get("timing")]
+
+    def dist(key):
+        vals = sorted(t[key] for t in timings if t.get(key) is not None)
+        if not vals:
+            return None
+        return {"median": round(statistics.median(vals), 1), "p90": round(vals[int(0.9 * (len(vals) - 1))], 1),
+                "max": round(vals[-1], 1)}
+
+    bytes_by_type, third_party, slow_urls = Counter(), Counter(), {}
+    for t in timings:
+        bytes_by_type.update(t.get("bytes_by_type") or {})
+        third_party.update(t.get("third_party_bytes") or {})
+        for r in t.get("slowest") or []:
+            prev = slow_urls.get(r["url"])
+            if prev is None or r["duration_ms"] > prev["duration_ms"]:
+                slow_urls[r["url"]] = r
+    return {
+        "pages": len(timings),
+        "ttfb_ms": dist("ttfb_ms"),
+        "dcl_ms": dist("dcl_ms"),
+        "load_ms": dist("load_ms"),
+        "document_bytes": sum(t.get("document_bytes", 0) for t in timings),
+        "resource_bytes": sum(t.get("resource_bytes", 0) for t in timings),
+        "bytes_by_type": dict(bytes_by_type.most_common()),
+        "third_party_bytes": dict(third_party.most_common(top_n)),
+        "slowest": sorted(slow_urls.values(), key=lambda r: -r["duration_ms"])[:top_n],
+    }
+
+
+class _RequestHook:
+    """Handler requestWillBeSent de un tab: reenvía al informe que lo usa ahora"""
+
+    def __init__(self):
+        self.report: Optional["RequestBlockReport"] = None
+
+    def __call__(self, request_id, request, event):
+        if self.report is not None:
+            self.report._on_request(request_id, request, event)
+
+
+class RequestBlockReport:
+    """Cuenta por página las peticiones que casan con la blocklist (vía CDP requestWillBeSent)
+    y los bytes cargados (Resource Timing). Con enforce=False no bloquea nada (modo medición):
+    así se obtienen los bytes reales que se ahorrarían. Cada informe lleva también el resumen
+    de Navigation/Resource Timing de la página en "timing"."""
+
+    def __init__(self, categories=None, enforce: bool = True):
+        self.categories = categories if categories is not None else list(BLOCK_RULES)
+        self.enforce = enforce
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.page_url = ""
+        self.requests_total = 0
+        self.blocked = Counter()
+
+    def apply(self, driver):
+        """Activar la blocklist en el tab actual y que sus peticiones cuenten en este informe.
+        botasaurus acumula los handlers, así que cada tab registra uno solo (_RequestHook) y
+        volver a aplicar en el mismo tab (navegador caliente reutilizado) solo cambia de informe"""
+        if self.enforce:
+            driver.block_urls(blocklist_patterns(self.categories))
+        raw = driver.driver if isinstance(driver, GuardedDriver) else driver
+        tab = getattr(raw, "_tab", None)
+        hook = getattr(tab, "_ra_request_hook", None)
+        if hook is None:
+            hook = _RequestHook()
+            driver.before_request_sent(hook)
+            if tab is not None:
+                tab._ra_request_hook = hook
+        hook.report = self
+
+    def _on_request(self, request_id, request, event):
+        cat = match_block_rule(request.url, self.categories)
+        with self._lock:
+            self.requests_total += 1
+            if cat:
+                self.blocked[cat] += 1
+
+    def start_page(self, url: str):
+        with self._lock:
+            self._reset()
+            self.page_url = url
+
+    def finish_page(self, driver) -> Dict[str, Any]:
+        """Cerrar la página actual y devolver su informe"""
+        try:
+            perf = driver.run_js(PAGE_PERF_JS, timeout=5) or {}
+        except OperationTimeout:
+            raise
+        except Exception:
+            perf = {}
+        entries = perf.get("resources") or []
+        bytes_loaded, bytes_matching = 0, 0
+        for name, transfer, *_rest in entries:
+            bytes_loaded += transfer
+            if match_block_rule(name, self.categories):
+                bytes_matching += transfer
+        with self._lock:
+            report = {
+                "url": self.page_url,
+                "enforced": self.enforce,
+                "requests_seen": self.requests_total,
+                "requests_blocked": sum(self.blocked.values()),
+                "blocked_by_category": dict(self.blocked),
+                "requests_loaded": len(entries),
+                "bytes_loaded": bytes_loaded,
+                # en modo medición: bytes reales de lo que la blocklist habría evitado
+                "bytes_blockable": bytes_matching if not self.enforce else None,
+                "timing": page_timing(perf) if perf else None,
+            }
+            self._reset()
+        return report
+
+
+def summarize_block_reports(pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Agregado de varios informes de página (p.ej. por club)"""
+    by_cat = Counter()
+    for p in pages:
+        by_cat.update(p.get("blocked_by_category") or {})
+    return {
+        "pages": len(pages),
+        "requests_blocked": sum(p.get("requests_blocked", 0) for p in pages),
+        "requests_loaded": sum(p.get("requests_loaded", 0) for p in pages),
+        "bytes_loaded": sum(p.get("bytes_loaded", 0) for p in pages),
+        "bytes_blockable": sum(p.get("bytes_blockable") or 0 for p in pages),
+        "blocked_by_category": dict(by_cat),
+    }
+
+
+# =================== Tareas de navegador (botasaurus diferido) ===================
+class LazyBrowserTask:
+    """Equivale a botasaurus browser(**options)(task), pero importa botasaurus en la primera
+    llamada: importar el scraper no arrastra el navegador a los comandos que no lo usan"""
+
+    def __init__(self, task, **options):
+        self.task = task
+        self.options = options
+        self._fn = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        with self._lock:
+            if self._fn is None:
+                from botasaurus.browser import browser
+                self._fn = browser(**self.options)(self.task)
+            return self._fn
+
+    def __call__(self, *args, **kwargs):
+        return self._get()(*args, **kwargs)
+
+    def close(self):
+        """Cerrar el navegador reutilizado (reuse_driver=True); no hace nada si nunca se abrió"""
+        if self._fn is not None:
+            self._fn.close()
+
+
+# =================== Pool de tabs (un solo navegador) ===================
+class RateLimiter:
+    """Techo global de navegaciones por minuto (intervalo mínimo entre permisos), thread-safe"""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute and per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Tomar un permiso si ya toca; no bloquea"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next:
+                return False
+            self._next = now + self.interval * random.uniform(0.8, 1.2)
+            return True
+
+    def acquire(self):
+        """Tomar un permiso, esperando lo necesario"""
+        while not self.try_acquire():
+            time.sleep(0.05)
+
+
+# Sondeo no bloqueante: ¿el tab ya está en la URL pedida y con el JSON-LD cargado?
+# "" = el tab aún muestra el documento anterior (location.assign no lo sustituye hasta que llega
+# la respuesta nueva), "here" = ya está en la URL del job pero sin JSON-LD, "jsonld" = lista
+PROBE_READY_JS = r"""
+if (!window.location.href.includes(args.path)) return "";
+const node = document.querySelector(args.selector);
+return node && node.textContent && node.textContent.trim() ? "jsonld" : "here";
+"""
+
+
+class TabPool:
+    """K tabs de un mismo navegador atendidos desde un único hilo (el driver no es thread-safe).
+    Las navegaciones se lanzan sin esperar (location.assign) y se sondean por turnos, de modo que
+    las cargas de página se solapan. handle_page(job, html, signal, elapsed_ms, tab_index) se
+    llama al terminar cada página (lista o vencida por timeout); debe ser rápido o delegar.
+    on_start(job, tab_index), si se pasa a run(), se llama justo antes de lanzar cada navegación."""
+
+    def __init__(self, driver, size: int, limiter: RateLimiter, nav_timeout_s: float = READY_TIMEOUT_S,
+                 on_new_tab=None, poll_interval_s: float = 0.05):
+        self.driver = driver
+        self.limiter = limiter
+        self.nav_timeout_s = nav_timeout_s
+        self.poll_interval_s = poll_interval_s
+        self.on_new_tab = on_new_tab
+        self.hung_pages = 0
+        self.tabs = []
+        for i in range(max(1, size)):
+            tab = driver.open_link_in_new_tab("about:blank")
+            if on_new_tab:
+                on_new_tab(i)  # p.ej. aplicar blocklist al tab recién creado (driver ya está en él)
+            self.tabs.append({"tab": tab, "job": None, "started": 0.0, "index": i})
+
+    def _switch(self, slot):
+        self.driver.switch_to_tab(slot["tab"])
+
+    def _start(self, slot, job):
+        self._switch(slot)
+        if self.on_start:
+            self.on_start(job, slot["index"])
+        self.driver.run_js("window.location.assign(args.url); return true;", {"url": job["url"]})
+        slot["job"] = job
+        slot["started"] = time.monotonic()
+
+    def _poll(self, slot) -> bool:
+        """True si la página del slot terminó (lista o timeout) y se entregó"""
+        job = slot["job"]
+        self._switch(slot)
+        elapsed = time.monotonic() - slot["started"]
+        try:
+            probe = self.driver.run_js(PROBE_READY_JS, {"path": job["path"], "selector": READY_SELECTOR}, timeout=5)
+        except OperationTimeout:
+            raise
+        except Exception:
+            probe = ""  # documento a medio cargar: se reintenta en la siguiente vuelta
+        signal = "jsonld" if probe == "jsonld" else ""
+        if not signal and elapsed < self.nav_timeout_s:
+            return False
+        html = ""
+        if probe:
+            # solo si el tab ya está en la página del job: con "" el HTML sería el del evento anterior
+            try:
+                html = self.driver.page_html
+            except OperationTimeout:
+                raise
+            except Exception:
+                html = ""
+        # el slot sigue ocupado mientras handle_page trabaja (finish_page también pasa por el watchdog):
+        # si se cuelga ahí, _replace aún tiene el job y lo entrega como "hung"
+        self.handle_page(job, html, signal, elapsed * 1000, slot["index"])
+        slot["job"] = None
+        return True
+
+    def run(self, jobs: "queue.Queue", handle_page, deadline=None, on_start=None) -> List[Dict[str, Any]]:
+        """Procesar la cola de jobs ({"url", "path", ...}) hasta vaciarla. Con deadline (ra_deadline),
+        al vencer deja de lanzar navegaciones, corta las que están cargando y devuelve los jobs sin
+        terminar: primero los que estaban en vuelo, después la cola en su orden"""
+        self.handle_page = handle_page
+        self.on_start = on_start
+        while True:
+            if deadline is not None and deadline.expired():
+                return self._abandon(jobs)
+            progressed = False
+            for slot in self.tabs:
+                if slot["job"] is None:
+                    if jobs.empty() or not self.limiter.try_acquire():
+                        continue
+                    try:
+                        job = jobs.get_nowait()
+                    except queue.Empty:
+                        continue
+                    try:
+                        self._start(slot, job)
+                    except OperationTimeout:
+                        slot["job"], slot["started"] = job, time.monotonic()
+                        if not self._replace(slot):
+                            return self._abandon(jobs)
+                    progressed = True
+                else:
+                    try:
+                        progressed = self._poll(slot) or progressed
+                    except OperationTimeout:
+                        if not self._replace(slot):
+                            return self._abandon(jobs)
+                        progressed = True
+            if jobs.empty() and all(s["job"] is None for s in self.tabs):
+                break
+            if not progressed:
+                time.sleep(self.poll_interval_s)
+        return []
+
+    def _replace(self, slot) -> bool:
+        """Watchdog (driver envuelto en GuardedDriver): el tab del slot dejó de contestar. Su página
+        se entrega vencida (signal "hung") y el slot pasa a un tab nuevo. False si el navegador
+        entero está colgado: run() devuelve entonces lo que queda como pendiente"""
+        job, slot["job"] = slot["job"], None
+        if job is not None:
+            self.hung_pages += 1
+            elapsed = time.monotonic() - slot["started"]
+            self.handle_page(job, "", "hung", elapsed * 1000, slot["index"])
+        try:
+            slot["tab"] = self.driver.recycle(
+                (lambda: self.on_new_tab(slot["index"])) if self.on_new_tab else None)
+        except BrowserHung:
+            return False
+        return True
+
+    def _abandon(self, jobs: "queue.Queue") -> List[Dict[str, Any]]:
+        left = []
+        for slot in self.tabs:
+            if slot["job"] is None:
+                continue
+            left.append(slot["job"])
+            slot["job"] = None
+            try:
+                self._switch(slot)
+                self.driver.run_js("window.stop(); return true;")
+            except Exception:
+                pass
+        while True:
+            try:
+                left.append(jobs.get_nowait())
+            except queue.Empty:
+                break
+        return left
+
+    def close(self):
+        guarded = isinstance(self.driver, GuardedDriver)
+        if guarded and self.driver.hung:
+            return  # navegador colgado: cerrar tabs también se colgaría; se cierra el navegador entero
+        for slot in self.tabs:
+            try:
+                if guarded:
+                    self.driver.call("close_tab", 5, slot["tab"].close)
+                else:
+                    slot["tab"].close()
+            except Exception:
+                pass
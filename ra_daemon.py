@@ -0,0 +1,227 @@
+# Modo daemon: un proceso residente que ejecuta ciclos de scraping cada --interval segundos
+# sin pagar en cada ciclo el arranque del intérprete, los imports pesados, la sesión HTTP
+# (conexiones TLS keep-alive) ni la apertura del navegador (reuse_driver=True).
+#
+# Tras cada ciclo escribe la salida igual que los scripts sueltos y actualiza el estado en
+# output/ra_daemon_status.json (y en http://127.0.0.1:<port>/status con --status-port).
+#
+# Uso:
+#   python ra_daemon.py --jobs venues,final --interval 3600 --status-port 8787
+#   python ra_daemon.py --jobs venues --once
+import os, sys, json, time, signal, threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+from ra_archive import RawArchive, new_run_id
+from ra_output import parse_formats, write_json
+
+DAEMON_INTERVAL_S = 3600
+STATUS_PATH = "output/ra_daemon_status.json"
+JOBS = ("venues", "final")  # orden de cada ciclo: venues primero deja la skip-list para final
+
+
+class VenuesJob:
+    """ra_venues_full con la sesión HTTP reutilizada entre ciclos"""
+    name = "venues"
+
+    def __init__(self, formats: List[str], out_dir: str, images: bool, listing: Optional[str] = None,
+                 deadline_s: Optional[float] = None):
+        import ra_venues_full as rv
+        self.rv = rv
+        self.deadline_s = deadline_s
+        self.formats = formats
+        self.out_dir = out_dir
+        self.images = images
+        self.listing = listing or rv.LISTING_MODE
+        self.session = rv.make_session()
+
+    def run(self, run_id: str) -> Dict[str, Any]:
+        rv = self.rv
+        rv.ARCHIVE = RawArchive(rv.ARCHIVE_DIR, run_id=run_id) if rv.ENABLE_ARCHIVE else None
+        http = rv.make_retry_client()  # contadores y breakers nuevos por ciclo
+        t0 = time.perf_counter()
+        rows, records = rv.scrape_venues(self.session, http, self.listing, deadline_s=self.deadline_s)
+        t1 = time.perf_counter()
+        written = rv.write_venues_output(rows, records, self.formats, self.out_dir, run_id, self.images)
+        t2 = time.perf_counter()
+        http.print_summary()
+        return {"rows": len(rows), "scrape_s": round(t1 - t0, 2), "write_s": round(t2 - t1, 2),
+                "written": written, "http": http.summary(), "wire": http.wire_summary()}
+
+    def close(self):
+        self.session.close()
+
+
+class FinalJob:
+    """ra_final con el navegador abierto entre ciclos"""
+    name = "final"
+
+    def __init__(self, formats: List[str], images: bool, deadline_s: Optional[float] = None):
+        import ra_final as rf
+        self.rf = rf
+        self.deadline_s = deadline_s
+        self.formats = formats
+        self.images = images
+
+    def run(self, run_id: str) -> Dict[str, Any]:
+        rf = self.rf
+        rf.ARCHIVE = RawArchive(rf.ARCHIVE_DIR, run_id=run_id) if rf.ENABLE_ARCHIVE else None
+        records: List[Dict[str, Any]] = []
+        t0 = time.perf_counter()
+        rows = rf.run_all_clubs(rf.CLUB_IDS, rf.MAX_EVENTS_PER_CLUB, records, rf.load_skip_ids(), warm=True,
+                                deadline_s=self.deadline_s)
+        t1 = time.perf_counter()
+        written = rf.write_final_output(rows, records, self.formats, run_id, self.images)
+        t2 = time.perf_counter()
+        return {"rows": len(rows), "scrape_s": round(t1 - t0, 2), "write_s": round(t2 - t1, 2), "written": written}
+
+    def close(self):
+        self.rf.close_warm_browsers()
+
+
+class Daemon:
+    def __init__(self, jobs, interval_s: float = DAEMON_INTERVAL_S, status_path: str = STATUS_PATH):
+        self.jobs = jobs
+        self.interval_s = interval_s
+        self.status_path = status_path
+        self.stop = threading.Event()
+        self._lock = threading.Lock()
+        self.status: Dict[str, Any] = {
+            "pid": os.getpid(),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "state": "starting",
+            "interval_s": interval_s,
+            "cycles": 0,
+            "last_cycle": None,
+            "next_cycle_at": None,
+            "jobs": {},
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return json.loads(json.dumps(self.status, default=str))
+
+    def _update(self, **changes):
+        with self._lock:
+            self.status.update(changes)
+            self.status["updated_at"] = datetime.now().isoformat(timespec="seconds")
+        try:
+            write_json(self.snapshot(), self.status_path)
+        except Exception as e:
+            print(f"[DAEMON] No se pudo escribir {self.status_path}: {e}")
+
+    def run_cycle(self):
+        run_id = new_run_id()
+        cycle = {"run_id": run_id, "started_at": datetime.now().isoformat(timespec="seconds"), "jobs": {}}
+        self._update(state="running", current_run_id=run_id)
+        t0 = time.perf_counter()
+        for job in self.jobs:
+            if self.stop.is_set():
+                break
+            print(f"\n[DAEMON] Ciclo {self.status['cycles'] + 1} · {job.name} (run {run_id})")
+            jt = time.perf_counter()
+            try:
+                result = job.run(run_id)
+                result["ok"] = True
+            except Exception as e:
+                print(f"[DAEMON] {job.name} falló: {e}")
+                result = {"ok": False, "error": str(e)}
+            result["seconds"] = round(time.perf_counter() - jt, 2)
+            result["finished_at"] = datetime.now().isoformat(timespec="seconds")
+            cycle["jobs"][job.name] = result
+            with self._lock:
+                self.status["jobs"][job.name] = result
+        cycle["seconds"] = round(time.perf_counter() - t0, 2)
+        with self._lock:
+            self.status["cycles"] += 1
+        self._update(state="idle", last_cycle=cycle, current_run_id=None)
+        print(f"[DAEMON] Ciclo terminado en {cycle['seconds']}s")
+
+    def serve_forever(self, once: bool = False):
+        try:
+            while not self.stop.is_set():
+                started = time.monotonic()
+                self.run_cycle()
+                if once:
+                    break
+                wait = max(0.0, self.interval_s - (time.monotonic() - started))
+                self._update(next_cycle_at=(datetime.now() + timedelta(seconds=wait)).isoformat(timespec="seconds"))
+                print(f"[DAEMON] Próximo ciclo en {wait:.0f}s")
+                self.stop.wait(wait)
+        finally:
+            for job in self.jobs:
+                try:
+                    job.close()
+                except Exception as e:
+                    print(f"[DAEMON] Error cerrando {job.name}: {e}")
+            self._update(state="stopped", next_cycle_at=None)
+
+
+def start_status_server(daemon: Daemon, port: int, host: str = "127.0.0.1"):
+    """GET /status (o /) → JSON con el estado y los tiempos del último ciclo"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/status"):
+                self.send_error(404)
+                return
+            body = json.dumps(daemon.snapshot(), ensure_ascii=False, indent=2).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="ra-daemon-status", daemon=True).start()
+    print(f"[DAEMON] Estado en http://{host}:{port}/status")
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Scrapers de RA en modo daemon (sesiones y navegador calientes)")
+    ap.add_argument("--jobs", default=",".join(JOBS), help="venues,final (en este orden)")
+    ap.add_argument("--interval", type=float, default=DAEMON_INTERVAL_S, help="segundos entre inicios de ciclo")
+    ap.add_argument("--once", action="store_true", help="un solo ciclo y salir")
+    ap.add_argument("--format", default="json", help="formatos de salida separados por coma: json,sqlite,parquet")
+    ap.add_argument("--out-dir", default="output", help="directorio para sqlite/parquet")
+    ap.add_argument("--images", action="store_true", help="cachear flyers y añadir imageThumbs")
+    ap.add_argument("--listing", choices=["venue", "area"], default=None, help="modo de listado de ra_venues_full")
+    ap.add_argument("--deadline", type=float, default=None,
+                    help="segundos máximos de cada job por ciclo (lo pendiente pasa al ciclo siguiente)")
+    ap.add_argument("--status-file", default=STATUS_PATH)
+    ap.add_argument("--status-port", type=int, default=None, help="servir el estado en 127.0.0.1:<port>")
+    args = ap.parse_args()
+
+    names = [j.strip() for j in args.jobs.split(",") if j.strip()]
+    unknown = [n for n in names if n not in JOBS]
+    if unknown:
+        sys.exit(f"Jobs desconocidos: {', '.join(unknown)} (válidos: {', '.join(JOBS)})")
+    formats = parse_formats(args.format)
+
+    t0 = time.perf_counter()
+    jobs = []
+    for name in sorted(names, key=JOBS.index):
+        if name == "venues":
+            jobs.append(VenuesJob(formats, args.out_dir, args.images, args.listing, args.deadline))
+        else:
+            jobs.append(FinalJob(formats, args.images, args.deadline))
+    print(f"[DAEMON] Jobs {', '.join(j.name for j in jobs)} listos en {time.perf_counter() - t0:.2f}s")
+
+    daemon = Daemon(jobs, args.interval, args.status_file)
+    daemon.status["warmup_s"] = round(time.perf_counter() - t0, 2)
+
+    def handle_stop(signum, frame):
+        print("\n[DAEMON] Parada pedida: se termina el job en curso y se sale")
+        daemon.stop.set()
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+    if args.status_port:
+        start_status_server(daemon, args.status_port)
+    daemon.serve_forever(once=args.once)
@@ -0,0 +1,106 @@
+# Deadline global del run: la ventana de scraping es fija, así que los scrapers reciben un
+# límite total (--deadline segundos) y al alcanzarlo dejan de empezar trabajo nuevo, cortan
+# el que está en vuelo (reintentos, esperas, tabs cargando), escriben las filas completas y
+# guardan los eventos pendientes para que el siguiente run empiece por ellos.
+#
+# Los pendientes se ordenan con los eventos más próximos primero: si no da tiempo a todo,
+# lo que se queda fuera es lo que más tarda en celebrarse.
+import os, json, time
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable, Callable
+
+from ra_output import write_json
+
+
+class DeadlineExceeded(Exception):
+    """Se alcanzó el deadline del run: el trabajo en curso se abandona y queda pendiente"""
+
+
+class Deadline:
+    """Instante límite del run en reloj de pared (time.time), así se puede pasar a las tareas
+    del navegador en el dict de datos. Sin segundos ni instante = sin límite."""
+
+    def __init__(self, seconds: Optional[float] = None, at: Optional[float] = None):
+        self.seconds = seconds
+        self.at = at if at is not None else (time.time() + seconds if seconds else None)
+
+    def remaining(self) -> float:
+        return float("inf") if self.at is None else max(0.0, self.at - time.time())
+
+    def expired(self) -> bool:
+        return self.at is not None and time.time() >= self.at
+
+    def check(self, what: str = ""):
+        if self.expired():
+            raise DeadlineExceeded(f"Deadline del run alcanzado{f' ({what})' if what else ''}")
+
+    def timeout(self, seconds: float, floor: float = 1.0) -> float:
+        """Plazo de una operación recortado a lo que queda de run (mínimo floor)"""
+        return max(floor, min(seconds, self.remaining()))
+
+    def sleep(self, seconds: float):
+        """Dormir como mucho hasta el deadline"""
+        time.sleep(max(0.0, min(seconds, self.remaining())))
+
+
+def soonest_first(items: Iterable[Any], date_of: Callable[[Any], Optional[str]],
+                  id_of: Callable[[Any], Any], priority_ids: Iterable[Any] = ()) -> List[Any]:
+    """Orden de procesado: primero los pendientes del run anterior (en su orden), después por
+    fecha ISO ascendente; los que no tienen fecha van al final, en su orden original"""
+    rank = {str(i): n for n, i in enumerate(priority_ids)}
+    indexed = list(enumerate(items))
+    indexed.sort(key=lambda p: (
+        rank.get(str(id_of(p[1])), len(rank)),
+        not date_of(p[1]),
+        date_of(p[1]) or "",
+        p[0],
+    ))
+    return [item for _, item in indexed]
+
+
+def write_pending(path: str, source: str, events: List[Dict[str, Any]], deadline: Optional[Deadline] = None,
+                  venues: Optional[List[Dict[str, Any]]] = None) -> int:
+    """Guardar los pendientes del run ({"event_id", "date", ...} ya en orden de prioridad).
+    Un run completo escribe la lista vacía, así el siguiente no arrastra pendientes viejos."""
+    write_json({
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "source": source,
+        "deadline_s": deadline.seconds if deadline else None,
+        "events": events,
+        "venues": venues or [],
+    }, path)
+    return len(events)
+
+
+def load_pending(path: str, max_age_s: Optional[float] = None) -> Dict[str, List[str]]:
+    """Pendientes del run anterior en orden de prioridad: {"events": [IDs de evento], "venues": [IDs
+    de venue/club sin listar]}; listas vacías si no hay archivo o es más antiguo que max_age_s"""
+    empty = {"events": [], "venues": []}
+    if not os.path.exists(path):
+        return empty
+    if max_age_s is not None and time.time() - os.path.getmtime(path) > max_age_s:
+        return empty
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {"events": [str(e["event_id"]) for e in data.get("events", [])],
+            "venues": [str(v["id"]) for v in data.get("venues", [])]}
+
+
+def venues_first(ids: Iterable[Any], pending_venues: Iterable[Any]) -> List[Any]:
+    """Los venues que el run anterior no llegó a listar van primero; el resto en su orden"""
+    first = {str(v) for v in pending_venues}
+    ids = list(ids)
+    return [i for i in ids if str(i) in first] + [i for i in ids if str(i) not in first]
+
+
+def print_pending(events: List[Dict[str, Any]], venues: Optional[List[Dict[str, Any]]] = None,
+                  log: Callable[[str], None] = print, limit: int = 10):
+    if not events and not venues:
+        return
+    log(f"[DEADLINE] {len(events)} eventos pendientes (los más próximos primero):")
+    for e in events[:limit]:
+        log(f"  - {e['event_id']} {e.get('date') or 'sin fecha'} ({e.get('venue') or '?'})")
+    if len(events) > limit:
+        log(f"  ... y {len(events) - limit} más")
+    if venues:
+        log(f"[DEADLINE] {len(venues)} venues sin listar: {', '.join(str(v.get('name') or v['id']) for v in venues)}")
@@ -1,15 +1,37 @@
 # pip install botasaurus beautifulsoup4 unidecode fake-useragent concurrent.futures
-import os, re, json, time, random, sys, math
+import os, re, json, time, random, sys, math, threading, queue
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, TYPE_CHECKING
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from unidecode import unidecode
-from botasaurus.browser import browser, Driver
-from botasaurus.soupify import soupify
-from fake_useragent import UserAgent
+from ra_parse import (
+    fmt_date_spanish, fmt_time_range, fmt_price_eur, slugify,
+    extract_event_ids_from_club_html, extract_jsonld, extract_og_image,
+    extract_genres_from_html, find_script_blocks, extract_ticket_objects,
+    pick_current_release, build_price_row, extract_tickets_from_html, build_price_record,
+)
+from ra_archive import RawArchive, new_run_id
+from ra_browser import (
+    wait_for_event_ready, READY_TIMEOUT_S, RequestBlockReport, summarize_block_reports, summarize_page_timings,
+    RateLimiter, TabPool, LazyBrowserTask, GuardedDriver, OperationTimeout, BrowserHung,
+    NAV_TIMEOUT_S, SCRIPT_TIMEOUT_S, EVENT_TIMEOUT_S,
+)
+from ra_store import update_store, STORE_PATH
+from ra_output import write_outputs, parse_formats
+from ra_profile import PROFILER, PROFILE_DIR
+from ra_registry import club_names
+from ra_images import cache_row_images
+from ra_merge import load_skip_list, SKIP_LIST_PATH
+from ra_deadline import Deadline, venues_first, write_pending, load_pending, print_pending
+from ra_output import event_id_from_url
+
+# botasaurus y fake_useragent se cargan al primer uso (LazyBrowserTask, soupify, get_random_user_agent):
+# los comandos que solo parsean, fusionan o informan no pagan su import
+if TYPE_CHECKING:
+    from botasaurus.browser import Driver
 
 # ========= Config =========
-CLUB_IDS = [911, 150612, 195409, 3818, 3760, 60710, 2072, 2253, 216950]
+CLUB_NAMES = club_names()  # venues.json (ver ra_registry.py)
+CLUB_IDS = list(CLUB_NAMES)
 MAX_EVENTS_PER_CLUB = 30  # Reducido para menor impacto
 HEADLESS = False  # Modo gráfico para evitar detección en headless
 
@@ -24,36 +46,73 @@ HUMAN_DELAY_MAX = 5000  # ms - Aumentado significativamente
 ENABLE_PARALLEL = False
 MAX_WORKERS = 1  # Totalmente secuencial
 
-CLUB_NAMES = {
-    911: 'Razzmatazz',
-    150612: 'M7 CLUB',
-    195409: 'Les Enfants',
-    3818: 'Macarena Club',
-    3760: 'La Terrazza',
-    60710: 'Input',
-    2072: 'Nitsa',
-    2253: 'Moog',
-    216950: 'Noxe'
-}
+# Pool de tabs: un solo navegador sirve TAB_POOL_SIZE páginas de evento a la vez (todas las
+# de todos los clubs en una cola común), con un techo global de navegaciones por minuto.
+ENABLE_TAB_POOL = False
+TAB_POOL_SIZE = 4
+MAX_NAVIGATIONS_PER_MINUTE = 20
+PARSE_WORKERS = 2  # hilos que parsean el HTML mientras el navegador sigue cargando
+
+# Blocklist de peticiones del navegador por categoría (ver ra_browser.BLOCK_RULES).
+# images_css sustituye al block_images_and_css de botasaurus (setBlockedURLs reemplaza la lista).
+BLOCK_CATEGORIES = ["images_css", "fonts", "media", "analytics", "ads", "other"]
+BLOCKLIST_ENFORCE = True  # False = no bloquear, solo medir los bytes que se ahorrarían
+BLOCK_REPORT_PATH = "output/ra_blocking.json"
+# Navigation/Resource Timing por página (TTFB, DCL, load, recursos más lentos), agregado por club
+TIMING_REPORT_PATH = "output/ra_timing.json"
+
+# Archivo de respuestas crudas (HTML) para poder regenerar filas sin red: python ra_archive.py --replay final
+ENABLE_ARCHIVE = True
+ARCHIVE_DIR = "archive"
+ARCHIVE = None  # se abre en __main__
+
+# Event store SQLite (upsert por ID de RA) que consulta la web: ver ra_store.py
+ENABLE_STORE = True
+
+# Saltar los eventos que ra_venues_full ya cubrió por completo (skip-list de ra_merge)
+SKIP_COVERED_EVENTS = True
+SKIP_LIST_MAX_AGE_S = 24 * 3600  # una skip-list más antigua se ignora
+
+# Caché local de flyers con miniaturas WebP (ver ra_images.py); también con --images
+ENABLE_IMAGES = False
+
+# Deadline del run en segundos (None = sin límite; también --deadline). Al alcanzarlo se escriben las
+# filas completas y los eventos/clubs sin abrir van a PENDING_PATH, por los que empieza el siguiente run.
+# Sin fecha antes de abrir la página, la prioridad es la posición en el listado del club (RA lo ordena por fecha).
+RUN_DEADLINE_S = None
+PENDING_PATH = "output/ra_final_pending.json"
+PENDING_MAX_AGE_S = 24 * 3600
+
+# Watchdog del navegador (ver ra_browser.GuardedDriver): cada llamada al driver tiene plazo duro y cada
+# página (club o evento) un presupuesto total que incluye las esperas de captcha. Si algo se cuelga, el
+# evento queda como timeout, el tab se recicla y se sigue con el siguiente; si el navegador entero deja
+# de contestar, el club termina y sus eventos sin abrir quedan pendientes.
+ENABLE_WATCHDOG = True
+PAGE_BUDGET_S = EVENT_TIMEOUT_S
 
 def log(*args):
     print(f"[{datetime.now().strftime('%H:%M:%S')}] {' '.join(map(str, args))}")
     sys.stdout.flush()
 
-def sleep_jitter(ms_min=500, ms_max=900):
-    """Sleep aleatorio para simular comportamiento humano"""
+def sleep_jitter(ms_min=500, ms_max=900, deadline=None):
+    """Sleep aleatorio para simular comportamiento humano (como mucho hasta el deadline, si se pasa)"""
     sleep_time = random.uniform(ms_min/1000.0, ms_max/1000.0)
-    time.sleep(sleep_time)
+    with PROFILER.stage("sleep"):
+        if deadline is not None:
+            deadline.sleep(sleep_time)
+        else:
+            time.sleep(sleep_time)
 
-def human_delay(min_ms=None, max_ms=None):
+def human_delay(min_ms=None, max_ms=None, deadline=None):
     """Delay más largo para simular comportamiento humano natural"""
     min_delay = min_ms or HUMAN_DELAY_MIN
     max_delay = max_ms or HUMAN_DELAY_MAX
-    sleep_jitter(min_delay, max_delay)
+    sleep_jitter(min_delay, max_delay, deadline)
 
 def get_random_user_agent():
     """Obtener un User Agent aleatorio"""
     try:
+        from fake_useragent import UserAgent
         ua = UserAgent()
         return ua.random
     except:
@@ -73,182 +132,21 @@ def get_random_proxy():
         return random.choice(PROXY_LIST)
     return None
 
-# ========= Formato fecha/hora/precio =========
-WEEK = ["LUN", "MAR", "MIÉ", "JUE", "VIE", "SÁB", "DOM"]
-MONTH = ["ENE", "FEB", "MAR", "ABR", "MAY", "JUN", "JUL", "AGO", "SEPT", "OCT", "NOV", "DIC"]
-
-def fmt_date_spanish(dt_iso: str) -> str:
-    # "MIÉ. 24 SEP."
-    WEEK2 = ["LUN.", "MAR.", "MIÉ.", "JUE.", "VIE.", "SÁB.", "DOM."]
-    MONTH2 = ["ENE.", "FEB.", "MAR.", "ABR.", "MAY.", "JUN.", "JUL.", "AGO.", "SEP.", "OCT.", "NOV.", "DIC."]
-    if not dt_iso: return ""
+def archive_put(kind: str, key: str, payload: str, **meta):
+    """Guardar el payload crudo en el archivo si está activado (nunca rompe el scraping)"""
+    if ARCHIVE is None:
+        return
     try:
-        dt = datetime.fromisoformat(dt_iso.replace("Z","").split(".")[0])
-        return f"{WEEK2[dt.weekday()]} {dt.day:02d} {MONTH2[dt.month-1]}"
-    except Exception:
-        return ""
+        ARCHIVE.put(kind, key, payload, **meta)
+    except Exception as e:
+        log(f"[WARN] No se pudo archivar {key}: {e}")
 
-def fmt_time_range(start_iso: str, end_iso: str) -> str:
-    # "HH:MM HH:MM" en 24h
-    try:
-        if not start_iso: return ""
-        s = datetime.fromisoformat(start_iso.replace("Z","").split(".")[0]).strftime("%H:%M")
-        if end_iso:
-            e = datetime.fromisoformat(end_iso.replace("Z","").split(".")[0]).strftime("%H:%M")
-            return f"{s} {e}"
-        return s
-    except Exception:
-        return ""
-
-def fmt_price_eur(x: Any) -> str:
-    if x is None: return ""
-    if isinstance(x, (int, float)):
-        if abs(x - round(x)) < 1e-6:
-            return f"{int(round(x))}€"
-        return f"{x:.2f}".replace(".", ",") + "€"
-    return ""
-
-def slugify(txt: str) -> str:
-    s = unidecode((txt or "").lower())
-    s = re.sub(r"[^a-z0-9]+", "-", s).strip("-")
-    return s
-
-# ========= Parsers HTML =========
-def extract_event_ids_from_club_html(html: str) -> List[str]:
-    ids = re.findall(r'/events/(\d+)', html)
-    seen, out = set(), []
-    for i in ids:
-        if i not in seen:
-            seen.add(i)
-            out.append(i)
-    return out
-
-def extract_jsonld(soup) -> Dict[str, Any]:
-    node = soup.select_one('script[type="application/ld+json"]')
-    if not node:
-        return {}
-    try:
-        data = json.loads(node.text)
-        return data if isinstance(data, dict) else {}
-    except Exception:
-        return {}
-
-def extract_og_image(soup) -> str:
-    og = soup.select_one('meta[property="og:image"]')
-    return og.get("content") if og and og.get("content") else ""
-
-def extract_genres_from_html(soup) -> str:
-    gens = []
-    for a in soup.select('a[href*="/genre/"]'):
-        txt = (a.get_text(" ", strip=True) or "").strip()
-        if txt and txt.lower() not in [g.lower() for g in gens]:
-            gens.append(txt)
-    return ", ".join(gens)
-
-def find_script_blocks(html: str) -> List[str]:
-    return re.findall(r"<script[^>]*>([\s\S]*?)</script>", html, flags=re.I)
-
-def extract_ticket_objects(script_text: str) -> List[Dict[str, Any]]:
-    out = []
-    idx = 0
-    while True:
-        m = re.search(r'"__typename"\s*:\s*"Ticket"', script_text[idx:])
-        if not m: break
-        anchor = idx + m.start()
-        start = anchor
-        while start > 0 and script_text[start] != "{": start -= 1
-        brace, end, ok = 0, start, False
-        while end < len(script_text):
-            ch = script_text[end]
-            if ch == "{": brace += 1
-            elif ch == "}":
-                brace -= 1
-                if brace == 0:
-                    ok = True
-                    break
-            end += 1
-        if ok:
-            candidate = script_text[start:end+1]
-            try:
-                obj = json.loads(candidate)
-                if obj.get("__typename") == "Ticket":
-                    out.append(obj)
-            except Exception:
-                try:
-                    obj = json.loads(bytes(candidate, "utf-8").decode("unicode_escape"))
-                    if obj.get("__typename") == "Ticket":
-                        out.append(obj)
-                except Exception:
-                    pass
-        idx = end + 1
-    return out
-
-def pick_current_release(tickets_norm: List[Dict[str, Any]]) -> str:
-    valid = [t for t in tickets_norm if t.get("status") == "VALID" and not t.get("isAddOn")]
-    if not valid: return ""
-    valid.sort(key=lambda t: (t.get("price") is None, t.get("price")))
-    return valid[0].get("title") or ""
-
-# ========= Construcción de la entrada final (precios + generos) =========
-def build_price_row(event_url: str, page_html: str, meta: Dict[str, Any], generos: str) -> Dict[str, Any]:
-    # Tickets desde los <script> del HTML
-    tickets_raw = []
-    for sc in find_script_blocks(page_html):
-        tickets_raw.extend(extract_ticket_objects(sc))
-    tickets_norm = [{
-        "title": t.get("title"),
-        "price": t.get("priceRetail"),
-        "status": t.get("validType"),         # p.ej., VALID, SOLDOUT, NOLONGERONSALE
-        "isAddOn": t.get("isAddOn", False),
-        "url": t.get("url") or ""             # normalmente vacío
-    } for t in tickets_raw]
-    tickets_norm.sort(key=lambda x: (x.get("price") is None, x.get("price") if x.get("price") is not None else math.inf))
-
-    # Meta
-    venue_name = ""
-    loc = meta.get("location") if isinstance(meta, dict) else None
-    if isinstance(loc, dict):
-        venue_name = loc.get("name") or ""
-    event_name = meta.get("name", "")
-    start = meta.get("startDate", "")
-    end   = meta.get("endDate", "")
-    image = ""
-    if isinstance(meta.get("image"), list) and meta["image"]:
-        image = meta["image"][0]
-    if not image:
-        # fallback: intentar og:image (si necesitas, podrías pasar también soup)
-        pass
-
-    # Base
-    out = {
-        "venue": slugify(venue_name) if venue_name else "",
-        "eventName": event_name or "",
-        "url": event_url,
-        "date": fmt_date_spanish(start),
-        "time": fmt_time_range(start, end),
-        "imageUrl": image or "",
-        "currentRelease": pick_current_release(tickets_norm),
-        "event_date": (start or "")[:10],
-        "generos": generos or "",     # <- añadido
-    }
-
-    # Releases 1..6 (si existe → url = release.url o event_url; si no existe → campos vacíos)
-    for i in range(6):
-        if i < len(tickets_norm):
-            t = tickets_norm[i]
-            # etiqueta "Agotado" si status indica sold out / no disponible
-            title = (t.get("title") or "").strip()
-            status = (t.get("status") or "").upper()
-            if status in ("SOLDOUT", "NOLONGERONSALE"):
-                title = f"{title} - Agotado"
-            out[f"releaseName{i+1}"] = title
-            out[f"price{i+1}"] = fmt_price_eur(t.get("price"))
-            out[f"releaseUrl{i+1}"] = (t.get("url") or event_url)
-        else:
-            out[f"releaseName{i+1}"] = ""
-            out[f"price{i+1}"] = ""
-            out[f"releaseUrl{i+1}"] = ""
-    return out
+def pause(driver, seconds: float):
+    """time.sleep que respeta el presupuesto de la página si el driver tiene watchdog"""
+    if isinstance(driver, GuardedDriver):
+        driver.sleep(seconds)
+    else:
+        time.sleep(seconds)
 
 def looks_like_verification(html: str) -> bool:
     """Detectar páginas de verificación/captcha con más precisión"""
@@ -289,7 +187,7 @@ def looks_like_verification(html: str) -> bool:
     
     return False
 
-def simulate_human_behavior(driver: Driver):
+def simulate_human_behavior(driver: "Driver"):
     """Simular comportamiento humano para evitar detección"""
     try:
         # Movimientos de mouse aleatorios
@@ -301,22 +199,24 @@ def simulate_human_behavior(driver: Driver):
             x = random.randint(100, viewport_width - 100)
             y = random.randint(100, viewport_height - 100)
             driver.move_to(x, y)
-            time.sleep(random.uniform(0.1, 0.3))
+            pause(driver, random.uniform(0.1, 0.3))
         
         # Scroll aleatorio
         if random.random() > 0.5:
             scroll_amount = random.randint(100, 500)
             driver.execute_script(f"window.scrollBy(0, {scroll_amount});")
-            time.sleep(random.uniform(0.2, 0.5))
+            pause(driver, random.uniform(0.2, 0.5))
             
             # Scroll back
             driver.execute_script(f"window.scrollBy(0, -{scroll_amount});")
-            time.sleep(random.uniform(0.1, 0.3))
+            pause(driver, random.uniform(0.1, 0.3))
     
+    except OperationTimeout:
+        raise  # lo gestiona el watchdog (reciclar el tab), no es un fallo cosmético
     except Exception as e:
         log(f"[WARN] Error simulando comportamiento humano: {e}")
 
-def setup_stealth_driver(driver: Driver):
+def setup_stealth_driver(driver: "Driver"):
     """Configurar el driver para ser más sigiloso"""
     try:
         # Eliminar propiedades que delatan bots
@@ -346,10 +246,12 @@ def setup_stealth_driver(driver: Driver):
         user_agent = get_random_user_agent()
         driver.execute_script(f"Object.defineProperty(navigator, 'userAgent', {{get: () => '{user_agent}'}});")
         
+    except OperationTimeout:
+        raise
     except Exception as e:
         log(f"[WARN] Error configurando driver sigiloso: {e}")
 
-def handle_captcha_situation(driver: Driver, url: str, retry_count: int = 0):
+def handle_captcha_situation(driver: "Driver", url: str, retry_count: int = 0):
     """Manejar situaciones de captcha con diferentes estrategias"""
     if retry_count >= MAX_RETRIES:
         log(f"[FAIL] Máximo de reintentos alcanzado para {url}")
@@ -359,16 +261,16 @@ def handle_captcha_situation(driver: Driver, url: str, retry_count: int = 0):
     
     strategies = [
         # Estrategia 1: Esperar y recargar
-        lambda: time.sleep(random.uniform(10, 20)) or driver.get(url),
+        lambda: pause(driver, random.uniform(10, 20)) or driver.get(url),
         
         # Estrategia 2: Limpiar cookies y recargar
-        lambda: driver.delete_all_cookies() or time.sleep(2) or driver.get(url),
+        lambda: driver.delete_all_cookies() or pause(driver, 2) or driver.get(url),
         
         # Estrategia 3: Cambiar user agent y recargar
-        lambda: setup_stealth_driver(driver) or time.sleep(2) or driver.get(url),
+        lambda: setup_stealth_driver(driver) or pause(driver, 2) or driver.get(url),
         
         # Estrategia 4: Esperar más tiempo (para captchas manuales)
-        lambda: time.sleep(random.uniform(30, 60)) or driver.get(url)
+        lambda: pause(driver, random.uniform(30, 60)) or driver.get(url)
     ]
     
     try:
@@ -384,32 +286,109 @@ def handle_captcha_situation(driver: Driver, url: str, retry_count: int = 0):
         else:
             return handle_captcha_situation(driver, url, retry_count + 1)
             
+    except OperationTimeout:
+        raise  # presupuesto de la página agotado o driver colgado: decide el watchdog
     except Exception as e:
         log(f"[ERROR] Error manejando captcha: {e}")
         return False
 
+def soupify(html: str):
+    from botasaurus.soupify import soupify as _soupify
+    return _soupify(html)
+
+def parse_event_page(event_url: str, page_html: str, venue=None, event=None):
+    """(fila, registro) de una página de evento, o None si aún no tiene el JSON-LD del evento"""
+    with PROFILER.stage("parse", venue=venue, event=event):
+        soup = soupify(page_html)
+        meta = extract_jsonld(soup)
+        if not (meta.get("name") or meta.get("startDate") or meta.get("endDate")):
+            return None
+        tickets_norm = extract_tickets_from_html(page_html)
+        generos = extract_genres_from_html(soup)
+    with PROFILER.stage("build", venue=venue, event=event):
+        row = build_price_row(event_url, page_html, meta, generos, tickets_norm)
+        return row, build_price_record(row, tickets_norm, meta)
+
+# ========= Prioridad y pendientes (deadline) =========
+def prioritize_event_ids(ids: List[str], priority_ids=None) -> List[str]:
+    """Pendientes del run anterior primero; el resto en el orden del listado (más próximos antes)"""
+    rank = {str(i): n for n, i in enumerate(priority_ids or [])}
+    return sorted(ids, key=lambda i: rank.get(str(i), len(rank)))
+
+def pending_event(club_id: int, ev_id, position: int) -> Dict[str, Any]:
+    return {"event_id": str(ev_id), "date": None, "venue": CLUB_NAMES.get(club_id, "Unknown Club"),
+            "club_id": club_id, "position": position}
+
+# ========= Watchdog =========
+def guard_driver(driver):
+    """Driver con plazos duros por operación (ENABLE_WATCHDOG) o el de botasaurus tal cual"""
+    if not ENABLE_WATCHDOG or isinstance(driver, GuardedDriver):
+        return driver
+    return GuardedDriver(driver, NAV_TIMEOUT_S, SCRIPT_TIMEOUT_S, log=log)
+
+def page_budget(driver, seconds=None):
+    """Empezar (o quitar, con None) el presupuesto de la página actual"""
+    if isinstance(driver, GuardedDriver):
+        driver.start_budget(seconds)
+
+def driver_budget(driver) -> float:
+    """Segundos que le quedan a la página actual (inf sin watchdog o sin presupuesto)"""
+    return driver.budget_left() if isinstance(driver, GuardedDriver) else float("inf")
+
+def timeout_entry(club_id: int, url: str, e: OperationTimeout, event_id=None) -> Dict[str, Any]:
+    return {"club_id": club_id, "event_id": str(event_id) if event_id is not None else None, "url": url,
+            "op": e.what, "seconds": round(e.seconds, 1)}
+
 # ========= Scraper de UN club =========
-@browser(
-    headless=HEADLESS,
-    block_images_and_css=True,
-    reuse_driver=False,
-    raise_exception=True,
-    cache=False
-)
-def scrape_club(driver: Driver, data: dict):
+def scrape_club_task(driver: "Driver", data: dict):
     club_id    = int(data.get("club_id"))
     max_events = int(data.get("max_events", MAX_EVENTS_PER_CLUB))
+    skip_ids   = {int(i) for i in data.get("skip_ids") or []}
     club_name  = CLUB_NAMES.get(club_id, "Unknown Club")
-
-    # Configurar driver sigiloso
-    setup_stealth_driver(driver)
-    human_delay()
+    deadline   = Deadline(at=data.get("deadline_at"))
+    emit       = data.get("emit")  # emit(row, record): entregar cada fila al construirla (ra_api)
+    cancelled  = data.get("cancelled") or (lambda: False)  # el consumidor de ra_api cerró el iterador
+    if deadline.expired():
+        log(f"[DEADLINE] Club {club_id} ({club_name}) sin empezar")
+        return {"club_id": club_id, "rows": [], "pages": [], "unlisted": True}
+
+    driver = guard_driver(driver)
+    block_report = RequestBlockReport(BLOCK_CATEGORIES, BLOCKLIST_ENFORCE)
+    pages: List[Dict[str, Any]] = []
+    rows_out: List[Dict[str, Any]] = []
+    records_out: List[Dict[str, Any]] = []
+    pending: List[Dict[str, Any]] = []
+    timeouts: List[Dict[str, Any]] = []
+    targets: List[str] = []
+    n = 0
+
+    def prepare_tab():
+        # Configurar driver sigiloso
+        setup_stealth_driver(driver)
+        # Blocklist de peticiones + informe por página
+        try:
+            block_report.apply(driver)
+        except OperationTimeout:
+            raise
+        except Exception as e:
+            log(f"[WARN] No se pudo aplicar la blocklist: {e}")
+
+    def recover(url: str, e: OperationTimeout, ev_id=None):
+        """Watchdog: anotar el timeout y seguir en un tab nuevo (BrowserHung si no se puede)"""
+        timeouts.append(timeout_entry(club_id, url, e, ev_id))
+        log(f"[WATCHDOG] {ev_id or club_id}: {e} → se abandona la página")
+        page_budget(driver, None)
+        driver.recycle(prepare_tab)
 
     # 1) Página del club
     club_url = f"https://es.ra.co/clubs/{club_id}/events"
     log(f"[START] Procesando club {club_id} ({club_name})")
     
     try:
+        page_budget(driver, PAGE_BUDGET_S)
+        prepare_tab()
+        human_delay()
+        block_report.start_page(club_url)
         driver.get(club_url)
         human_delay(4000, 7000)  # Espera larga para simular lectura humana
         
@@ -423,24 +402,39 @@ def scrape_club(driver: Driver, data: dict):
         if looks_like_verification(html):
             log(f"[CAPTCHA] Verificación detectada en club {club_id}")
             if not handle_captcha_situation(driver, club_url):
-                return {"club_id": club_id, "rows": [], "error": "verification_failed"}
+                return {"club_id": club_id, "rows": [], "pages": pages, "error": "verification_failed"}
             # Obtener HTML después de manejar captcha
             html = driver.page_html
+        pages.append(block_report.finish_page(driver))
+        page_budget(driver, None)
+
+        archive_put("club_html", club_url, html, club_id=club_id)
 
         ids = extract_event_ids_from_club_html(html)
         if not ids:
             log(f"[WARN] No se encontraron eventIds en club {club_id}.")
-            return {"club_id": club_id, "rows": []}
+            return {"club_id": club_id, "rows": [], "pages": pages, "timeouts": timeouts}
+        if skip_ids:
+            n_before = len(ids)
+            ids = [i for i in ids if int(i) not in skip_ids]
+            log(f"[SKIP] Club {club_id}: {n_before - len(ids)} eventos ya cubiertos por ra_venues_full")
 
         log(f"[INFO] Club {club_id} ({club_name}) → {len(ids)} eventIds (hasta {max_events})")
-
-        rows_out: List[Dict[str, Any]] = []
+        targets = prioritize_event_ids(ids, data.get("priority_ids"))[:max_events]
         processed_events = 0
 
         # 2) Eventos
-        for ev_id in ids[:max_events]:
+        for n, ev_id in enumerate(targets):
+            if cancelled():
+                log(f"[INFO] Club {club_id}: iterador cerrado por el consumidor, se cierra el navegador")
+                break
+            if deadline.expired():
+                pending = [pending_event(club_id, i, n + k) for k, i in enumerate(targets[n:])]
+                log(f"[DEADLINE] Club {club_id}: {len(pending)} eventos quedan pendientes")
+                break
             event_url = f"https://es.ra.co/events/{ev_id}"
             event_retry_count = 0
+            page_budget(driver, PAGE_BUDGET_S)  # techo del evento: reintentos y captcha incluidos
             
             while event_retry_count < MAX_RETRIES:
                 try:
@@ -452,49 +446,52 @@ def scrape_club(driver: Driver, data: dict):
                         human_delay(500, 1000)  # Delay más corto
                         simulate_human_behavior(driver)
                     
-                    driver.get(event_url)
-                    human_delay(3000, 5000)  # Espera larga para simular lectura de evento
-                    
-                    # Siempre simular comportamiento humano después de cargar
-                    simulate_human_behavior(driver)
-                    human_delay(2000, 3000)  # Pausa después de comportamiento
-                    
-                    page_html = driver.page_html
-                    
+                    block_report.start_page(event_url)
+                    with PROFILER.stage("fetch", venue=club_id, event=ev_id):
+                        driver.get(event_url)
+
+                        # Espera dirigida por evento: vuelve en cuanto el JSON-LD está en el DOM
+                        t_ready = time.perf_counter()
+                        signal = wait_for_event_ready(driver, deadline.timeout(min(READY_TIMEOUT_S, driver_budget(driver))))
+                        ready_ms = (time.perf_counter() - t_ready) * 1000
+                        page_html = driver.page_html
+
                     # Verificar captcha en página de evento
-                    if looks_like_verification(page_html):
+                    if not signal and looks_like_verification(page_html):
                         log(f"[CAPTCHA] Verificación en evento {ev_id}")
                         if not handle_captcha_situation(driver, event_url):
                             log(f"[SKIP] Evento {ev_id} omitido por captcha")
                             break
+                        signal = wait_for_event_ready(driver, READY_TIMEOUT_S)
                         page_html = driver.page_html
-                    
-                    # Espera inteligente para carga de contenido
-                    content_loaded = False
-                    for attempt in range(5):
-                        soup = soupify(driver)
-                        meta = extract_jsonld(soup)
-                        generos = extract_genres_from_html(soup)
-                        
-                        if meta.get("name") or meta.get("startDate") or meta.get("endDate"):
-                            rows_out.append(build_price_row(event_url, page_html, meta, generos))
-                            log(f"[OK] {ev_id} → '{meta.get('name','') or ''}'")
-                            processed_events += 1
-                            content_loaded = True
-                            break
-                        
-                        if attempt < 4:
-                            time.sleep(0.5 + random.random()*0.6)
-                    
-                    if content_loaded:
+                    pages.append(block_report.finish_page(driver))
+
+                    parsed = parse_event_page(event_url, page_html, venue=club_id, event=ev_id)
+
+                    if parsed:
+                        row, record = parsed
+                        archive_put("event_html", event_url, page_html, event_id=ev_id, club_id=club_id)
+                        if emit is not None:
+                            emit(row, record)  # puede bloquear hasta que el consumidor pida más
+                        else:
+                            rows_out.append(row)
+                            records_out.append(record)
+                        log(f"[OK] {ev_id} → '{row['eventName']}' (listo en {ready_ms:.0f} ms)")
+                        processed_events += 1
+
+                        # Comportamiento humano después de extraer (no retrasa la lectura del contenido)
+                        simulate_human_behavior(driver)
                         break
                     else:
-                        log(f"[WARN] No se pudo cargar contenido para evento {ev_id}")
+                        log(f"[WARN] No se pudo cargar contenido para evento {ev_id} (señal no recibida en {READY_TIMEOUT_S:.0f}s)")
                         event_retry_count += 1
                         if event_retry_count < MAX_RETRIES:
                             log(f"[RETRY] Reintentando evento {ev_id} ({event_retry_count + 1}/{MAX_RETRIES})")
                         continue
 
+                except OperationTimeout as e:
+                    recover(event_url, e, ev_id)  # evento como timeout; se sigue con el siguiente
+                    break
                 except Exception as e:
                     log(f"[ERR] {ev_id} → {e}")
                     event_retry_count += 1
@@ -503,38 +500,293 @@ def scrape_club(driver: Driver, data: dict):
                         log(f"[RETRY] Reintentando evento {ev_id} por error ({event_retry_count + 1}/{MAX_RETRIES})")
                     continue
             
+            page_budget(driver, None)
             # Pausa larga entre eventos para simular comportamiento humano natural
-            if processed_events < len(ids[:max_events]) - 1:
-                human_delay(5000, 8000)  # Pausa de 5-8 segundos entre eventos
+            if processed_events < len(targets) - 1 and not deadline.expired() and not cancelled():
+                human_delay(5000, 8000, deadline)  # Pausa de 5-8 segundos entre eventos
                 
                 # Simular comportamiento humano entre eventos
-                if random.random() > 0.3:  # 70% de probabilidad
-                    simulate_human_behavior(driver)
-                    human_delay(2000, 3000)
-
-        log(f"[DONE] Club {club_id}: {len(rows_out)} filas generadas de {len(ids[:max_events])} eventos")
-        return {"club_id": club_id, "rows": rows_out}
-        
+                if random.random() > 0.3 and not deadline.expired():  # 70% de probabilidad
+                    try:
+                        simulate_human_behavior(driver)
+                    except OperationTimeout as e:
+                        recover(event_url, e)
+                    human_delay(2000, 3000, deadline)
+
+        log(f"[DONE] Club {club_id}: {processed_events} filas generadas de {len(targets)} eventos")
+        return {"club_id": club_id, "rows": rows_out, "records": records_out, "pages": pages, "pending": pending,
+                "timeouts": timeouts}
+
+    except BrowserHung as e:
+        # Ni un tab nuevo contesta: lo hecho vale, el resto del club queda pendiente para el siguiente run
+        if targets:
+            pending = [pending_event(club_id, i, n + k) for k, i in enumerate(targets[n:])]
+        log(f"[WATCHDOG] Navegador colgado en club {club_id} ({e}): {len(pending)} eventos quedan pendientes")
+        return {"club_id": club_id, "rows": rows_out, "records": records_out, "pages": pages, "pending": pending,
+                "timeouts": timeouts, "unlisted": not targets, "error": "browser_hung"}
+    except OperationTimeout as e:
+        # Colgado en la página del club: sin listado, el club pasa entero al siguiente run
+        timeouts.append(timeout_entry(club_id, club_url, e))
+        log(f"[WATCHDOG] Club {club_id}: {e}")
+        return {"club_id": club_id, "rows": [], "pages": pages, "timeouts": timeouts, "unlisted": True,
+                "error": "timeout"}
     except Exception as e:
         log(f"[CRITICAL] Error crítico en club {club_id}: {e}")
-        return {"club_id": club_id, "rows": [], "error": str(e)}
+        return {"club_id": club_id, "rows": [], "pages": pages, "error": str(e)}
+
+BROWSER_OPTIONS = dict(
+    headless=HEADLESS,
+    block_images_and_css=False,  # lo cubre la blocklist (BLOCK_CATEGORIES)
+    raise_exception=True,
+    cache=False,
+)
+
+# Un navegador nuevo por club (runs sueltos)
+scrape_club = LazyBrowserTask(scrape_club_task, reuse_driver=False, **BROWSER_OPTIONS)
+# Navegador caliente: se reutiliza entre llamadas hasta scrape_club_warm.close() (ra_daemon)
+scrape_club_warm = LazyBrowserTask(scrape_club_task, reuse_driver=True, **BROWSER_OPTIONS)
+
+# ========= Scraper con pool de tabs (todos los clubs, un navegador) =========
+def scrape_clubs_tab_pool_task(driver: "Driver", data: dict):
+    club_ids   = [int(c) for c in data.get("club_ids", [])]
+    max_events = int(data.get("max_events", MAX_EVENTS_PER_CLUB))
+    skip_ids   = {int(i) for i in data.get("skip_ids") or []}
+    sink: "RowSink" = data["sink"]
+    deadline   = Deadline(at=data.get("deadline_at"))
+    priority   = {str(i): n for n, i in enumerate(data.get("priority_ids") or [])}
+    results = {cid: {"club_id": cid, "rows": [], "pages": [], "timeouts": []} for cid in club_ids}
+    unlisted: List[int] = []
+
+    driver = guard_driver(driver)
+    setup_stealth_driver(driver)
+    listing_report = RequestBlockReport(BLOCK_CATEGORIES, BLOCKLIST_ENFORCE)
+    try:
+        listing_report.apply(driver)
+    except Exception as e:
+        log(f"[WARN] No se pudo aplicar la blocklist: {e}")
+
+    # 1) Listados de club en el tab principal → cola común de eventos
+    listed_jobs: List[Dict[str, Any]] = []
+    for i, cid in enumerate(club_ids):
+        if deadline.expired():
+            unlisted.append(cid)
+            continue
+        club_url = f"https://es.ra.co/clubs/{cid}/events"
+        log(f"[POOL] Listado {i+1}/{len(club_ids)}: {cid} ({CLUB_NAMES.get(cid, 'Unknown Club')})")
+        try:
+            listing_report.start_page(club_url)
+            driver.get(club_url)
+            html = driver.page_html
+            if looks_like_verification(html):
+                log(f"[CAPTCHA] Verificación detectada en club {cid}")
+                if not handle_captcha_situation(driver, club_url):
+                    results[cid]["error"] = "verification_failed"
+                    continue
+                html = driver.page_html
+            results[cid]["pages"].append(listing_report.finish_page(driver))
+            archive_put("club_html", club_url, html, club_id=cid)
+            ids = [i for i in extract_event_ids_from_club_html(html) if int(i) not in skip_ids]
+            ids = prioritize_event_ids(ids, data.get("priority_ids"))[:max_events]
+            log(f"[INFO] Club {cid} → {len(ids)} eventos a la cola")
+            for pos, ev_id in enumerate(ids):
+                listed_jobs.append({"club_id": cid, "ev_id": ev_id, "url": f"https://es.ra.co/events/{ev_id}",
+                                    "path": f"/events/{ev_id}", "position": pos})
+        except OperationTimeout as e:
+            results[cid]["timeouts"].append(timeout_entry(cid, club_url, e))
+            log(f"[WATCHDOG] Listado del club {cid}: {e}")
+            unlisted.append(cid)  # el siguiente run empieza por él
+            try:
+                driver.recycle(lambda: listing_report.apply(driver))
+            except BrowserHung:
+                unlisted.extend(c for c in club_ids[i + 1:])
+                log(f"[WATCHDOG] Navegador colgado: {len(club_ids) - i - 1} clubs sin listar")
+                return {"results": results, "pending": [], "unlisted": unlisted, "error": "browser_hung"}
+        except Exception as e:
+            log(f"[ERROR] Listado del club {cid}: {e}")
+            results[cid]["error"] = str(e)
+        if i < len(club_ids) - 1 and not deadline.expired():
+            human_delay(2000, 4000, deadline)
+
+    # Cola común: pendientes del run anterior, después por posición en el listado de su club
+    # (intercalando clubs), así lo que no dé tiempo a abrir son los eventos más lejanos
+    listed_jobs.sort(key=lambda j: (priority.get(str(j["ev_id"]), len(priority)), j["position"]))
+    jobs: "queue.Queue" = queue.Queue()
+    for job in listed_jobs:
+        jobs.put(job)
+
+    # 2) Eventos de todos los clubs en TAB_POOL_SIZE tabs; el parseo va a un pool de hilos
+    tab_reports: Dict[int, RequestBlockReport] = {}
+
+    def on_new_tab(index):
+        rep = RequestBlockReport(BLOCK_CATEGORIES, BLOCKLIST_ENFORCE)
+        try:
+            rep.apply(driver)
+        except Exception as e:
+            log(f"[WARN] Blocklist en tab {index}: {e}")
+        tab_reports[index] = rep
+
+    def parse_job(job, html, signal, elapsed_ms):
+        cid, ev_id = job["club_id"], job["ev_id"]
+        if signal == "hung":  # el watchdog abandonó el tab (ver TabPool._replace)
+            log(f"[WATCHDOG] {ev_id}: tab sin respuesta tras {elapsed_ms:.0f} ms → tab reciclado")
+            return
+        try:
+            if not signal and looks_like_verification(html):
+                log(f"[CAPTCHA] Verificación en evento {ev_id} (tab pool): omitido")
+                return
+            parsed = parse_event_page(job["url"], html, venue=cid, event=ev_id)
+            if not parsed:
+                log(f"[WARN] Sin contenido para evento {ev_id} tras {elapsed_ms:.0f} ms")
+                return
+            row, record = parsed
+            archive_put("event_html", job["url"], html, event_id=ev_id, club_id=cid)
+            added = sink.add(row, record)
+            log(f"[OK] {ev_id} → '{row['eventName']}' ({elapsed_ms:.0f} ms){'' if added else ' (duplicado)'}")
+        except Exception as e:
+            log(f"[ERR] {ev_id} → {e}")
+
+    total = jobs.qsize()
+    log(f"[POOL] {total} eventos en cola → {TAB_POOL_SIZE} tabs, máx {MAX_NAVIGATIONS_PER_MINUTE} navegaciones/min")
+    pool = TabPool(driver, TAB_POOL_SIZE, RateLimiter(MAX_NAVIGATIONS_PER_MINUTE), READY_TIMEOUT_S, on_new_tab)
+    with ThreadPoolExecutor(max_workers=PARSE_WORKERS) as parsers:
+        def handle_page(job, html, signal, elapsed_ms, tab_index):
+            rep = tab_reports.get(tab_index)
+            if signal == "hung":
+                results[job["club_id"]]["timeouts"].append({
+                    "club_id": job["club_id"], "event_id": str(job["ev_id"]), "url": job["url"],
+                    "op": "tab", "seconds": round(elapsed_ms / 1000, 1)})
+            elif rep:
+                results[job["club_id"]]["pages"].append(rep.finish_page(driver))
+            parsers.submit(parse_job, job, html, signal, elapsed_ms)
+
+        def start_job(job, tab_index):
+            rep = tab_reports.get(tab_index)
+            if rep:
+                rep.start_page(job["url"])  # el informe del tab es de la página que se va a cargar
+        try:
+            left = pool.run(jobs, handle_page, deadline, start_job)
+        finally:
+            pool.close()
+
+    pending = [pending_event(j["club_id"], j["ev_id"], j["position"]) for j in left]
+    hung = isinstance(driver, GuardedDriver) and driver.hung is not None
+    if pending:
+        log(f"[{'WATCHDOG' if hung else 'DEADLINE'}] Pool cortado: {len(pending)} eventos sin terminar")
+    log(f"[POOL] Terminado: {len(sink.rows)} filas de {total} eventos")
+    res = {"results": results, "pending": pending, "unlisted": unlisted}
+    if hung:
+        res["error"] = "browser_hung"
+    return res
+
+# output=None: las filas van al RowSink; el resultado solo lleva los informes
+scrape_clubs_tab_pool = LazyBrowserTask(scrape_clubs_tab_pool_task, reuse_driver=False, output=None, **BROWSER_OPTIONS)
+scrape_clubs_tab_pool_warm = LazyBrowserTask(scrape_clubs_tab_pool_task, reuse_driver=True, output=None, **BROWSER_OPTIONS)
 
 # ========= Orquestador multi-club =========
-def run_all_clubs(club_ids: List[int], max_events_per_club: int) -> List[Dict[str, Any]]:
-    all_rows: List[Dict[str, Any]] = []
-    seen_urls = set()  # dedup por URL del evento
+class RowSink:
+    """Acumulador thread-safe de filas deduplicadas por ID de evento (y sus registros normalizados)"""
+
+    def __init__(self, records_out: List[Dict[str, Any]] = None):
+        self.rows: List[Dict[str, Any]] = []
+        self.seen_ids = set()
+        self.records_out = records_out
+        self._lock = threading.Lock()
+
+    def add(self, row: Dict[str, Any], record: Dict[str, Any] = None) -> bool:
+        url = row.get("url")
+        key = event_id_from_url(url) or url  # el host (es.ra.co / ra.co) no cuenta
+        with self._lock:
+            if not key or key in self.seen_ids:
+                return False
+            self.seen_ids.add(key)
+            self.rows.append(row)
+            if self.records_out is not None and record is not None:
+                self.records_out.append(record)
+            return True
+
+    def add_club_result(self, res) -> int:
+        """Fusionar el resultado de scrape_club (dict con rows/records, o lista de ellos)"""
+        items = res if isinstance(res, list) else [res]
+        added = 0
+        for item in items:
+            if not isinstance(item, dict) or "rows" not in item:
+                continue
+            records_by_url = {r["event"]["url"]: r for r in item.get("records") or []}
+            for row in item["rows"]:
+                if self.add(row, records_by_url.get(row.get("url"))):
+                    added += 1
+        return added
+
+def run_all_clubs(club_ids: List[int], max_events_per_club: int,
+                  records_out: List[Dict[str, Any]] = None, skip_ids=None, warm: bool = False,
+                  deadline_s: float = None) -> List[Dict[str, Any]]:
+    """Scrapear todos los clubs y devolver las filas deduplicadas por ID de evento.
+    Si se pasa records_out, se le añaden los registros normalizados (ra_output) de esas filas.
+    skip_ids: IDs de evento que no hace falta abrir (ya cubiertos por ra_venues_full).
+    warm=True reutiliza el navegador entre llamadas (modo daemon); se cierra con close_warm_browsers().
+    deadline_s (por defecto RUN_DEADLINE_S): al alcanzarlo se devuelve lo completado y el resto va a PENDING_PATH."""
+    sink = RowSink(records_out)  # dedup por ID de evento
+    skip_ids = sorted(skip_ids or [])
+    club_task = scrape_club_warm if warm else scrape_club
+    pool_task = scrape_clubs_tab_pool_warm if warm else scrape_clubs_tab_pool
     failed_clubs = []
+    club_pages: Dict[int, List[Dict[str, Any]]] = {}  # informes por página (blocklist)
+    deadline = Deadline(deadline_s if deadline_s is not None else RUN_DEADLINE_S)
+    pending_events: List[Dict[str, Any]] = []
+    unlisted: List[int] = []
+    timeouts: List[Dict[str, Any]] = []  # páginas abandonadas por el watchdog
+    carried = load_pending(PENDING_PATH, PENDING_MAX_AGE_S)
+    club_ids = venues_first(club_ids, carried["venues"])  # los clubs que no se abrieron, primero
+    task_data = {"max_events": max_events_per_club, "skip_ids": skip_ids, "deadline_at": deadline.at,
+                 "priority_ids": carried["events"]}
+
+    def browser_hung():
+        # el navegador caliente no se puede reutilizar: el siguiente club abre uno nuevo
+        if warm:
+            close_warm_browsers()
+
+    def merge(cid, res):
+        if isinstance(res, dict):
+            club_pages[cid] = res.get("pages") or []
+            pending_events.extend(res.get("pending") or [])
+            timeouts.extend(res.get("timeouts") or [])
+            if res.get("unlisted"):
+                unlisted.append(cid)
+            if res.get("error"):
+                failed_clubs.append({"club_id": cid, "error": res["error"]})
+            if res.get("error") == "browser_hung":
+                browser_hung()
+        added = sink.add_club_result(res)
+        log(f"[MERGE] Club {cid}: +{added} filas → total {len(sink.rows)}")
 
     log(f"[START] Iniciando scraping de {len(club_ids)} clubs")
-    
-    if ENABLE_PARALLEL and len(club_ids) > 1:
+
+    if ENABLE_TAB_POOL:
+        # Un navegador, TAB_POOL_SIZE tabs, cola común de eventos; el sink fusiona en caliente
+        log(f"[TAB POOL] {len(club_ids)} clubs con {TAB_POOL_SIZE} tabs en un navegador")
+        try:
+            res = pool_task(dict(task_data, club_ids=club_ids, sink=sink))
+            pending_events.extend((res or {}).get("pending") or [])
+            unlisted.extend((res or {}).get("unlisted") or [])
+            for cid, club_res in (res or {}).get("results", {}).items():
+                club_pages[cid] = club_res.get("pages") or []
+                timeouts.extend(club_res.get("timeouts") or [])
+                if club_res.get("error"):
+                    failed_clubs.append({"club_id": cid, "error": club_res["error"]})
+            if (res or {}).get("error") == "browser_hung":
+                browser_hung()
+        except Exception as e:
+            log(f"[ERROR] Error en el pool de tabs: {e}")
+            failed_clubs.extend({"club_id": cid, "error": str(e)} for cid in club_ids)
+
+    elif ENABLE_PARALLEL and len(club_ids) > 1:
         # Procesamiento paralelo para mayor velocidad
         log(f"[PARALLEL] Procesando {len(club_ids)} clubs en paralelo con {MAX_WORKERS} workers")
         
         with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
             # Crear futuros para cada club
             future_to_club = {
-                executor.submit(scrape_club, {"club_id": cid, "max_events": max_events_per_club}): cid 
+                executor.submit(club_task, dict(task_data, club_id=cid)): cid
                 for cid in club_ids
             }
             
@@ -546,26 +798,7 @@ def run_all_clubs(club_ids: List[int], max_events_per_club: int) -> List[Dict[st
                 try:
                     res = future.result()
                     log(f"[PROGRESS] Club {cid} ({club_name}) completado")
-
-                    chunks = []
-                    if isinstance(res, dict) and "rows" in res:
-                        chunks = res["rows"]
-                        if res.get("error"):
-                            failed_clubs.append({"club_id": cid, "error": res["error"]})
-                    elif isinstance(res, list):
-                        for item in res:
-                            if isinstance(item, dict) and "rows" in item:
-                                chunks.extend(item["rows"])
-
-                    added = 0
-                    for row in chunks:
-                        url = row.get("url")
-                        if url and url not in seen_urls:
-                            seen_urls.add(url)
-                            all_rows.append(row)
-                            added += 1
-
-                    log(f"[MERGE] Club {cid}: +{added} filas → total {len(all_rows)}")
+                    merge(cid, res)
                     
                 except Exception as e:
                     log(f"[ERROR] Error procesando club {cid}: {e}")
@@ -578,41 +811,27 @@ def run_all_clubs(club_ids: List[int], max_events_per_club: int) -> List[Dict[st
         
         for i, cid in enumerate(club_ids):
             club_name = CLUB_NAMES.get(cid, "Unknown Club")
+            if deadline.expired():
+                unlisted.append(cid)  # sin abrir el navegador para nada
+                continue
             log(f"[PROGRESS] Procesando club {i+1}/{len(club_ids)}: {cid} ({club_name})")
             
             try:
-                res = scrape_club({"club_id": cid, "max_events": max_events_per_club})
-
-                chunks = []
-                if isinstance(res, dict) and "rows" in res:
-                    chunks = res["rows"]
-                    if res.get("error"):
-                        failed_clubs.append({"club_id": cid, "error": res["error"]})
-                elif isinstance(res, list):
-                    for item in res:
-                        if isinstance(item, dict) and "rows" in item:
-                            chunks.extend(item["rows"])
-
-                added = 0
-                for row in chunks:
-                    url = row.get("url")
-                    if url and url not in seen_urls:
-                        seen_urls.add(url)
-                        all_rows.append(row)
-                        added += 1
-
-                log(f"[MERGE] Club {cid}: +{added} filas → total {len(all_rows)}")
+                res = club_task(dict(task_data, club_id=cid))
+                merge(cid, res)
                 
                 # Pausa más corta entre clubs en modo secuencial
-                if i < len(club_ids) - 1:
+                if i < len(club_ids) - 1 and not deadline.expired():
                     log(f"[PAUSE] Pausa entre clubs...")
-                    human_delay(2000, 4000)  # Reducido a 2-4 segundos
+                    human_delay(2000, 4000, deadline)  # Reducido a 2-4 segundos
                     
             except Exception as e:
                 log(f"[ERROR] Error procesando club {cid}: {e}")
                 failed_clubs.append({"club_id": cid, "error": str(e)})
                 continue
 
+    all_rows = sink.rows
+
     # Resumen final
     log(f"[SUMMARY] Scraping completado:")
     log(f"  - Total filas: {len(all_rows)}")
@@ -625,13 +844,130 @@ def run_all_clubs(club_ids: List[int], max_events_per_club: int) -> List[Dict[st
             club_name = CLUB_NAMES.get(failed["club_id"], "Unknown")
             log(f"  - {failed['club_id']} ({club_name}): {failed['error']}")
 
+    if timeouts:
+        log(f"[WATCHDOG] {len(timeouts)} páginas abandonadas por no responder:")
+        for t in timeouts[:10]:
+            log(f"  - {t['event_id'] or 'club ' + str(t['club_id'])}: {t['op']} ({t['seconds']:.0f}s)")
+
+    # Pendientes por posición en su listado ya priorizado, intercalando clubs (más próximos primero)
+    pending_events.sort(key=lambda e: e["position"])
+    unlisted_venues = [{"id": cid, "name": CLUB_NAMES.get(cid, "Unknown Club")} for cid in unlisted]
+    if deadline.expired():
+        log(f"[DEADLINE] Límite de {deadline.seconds:.0f}s alcanzado: {len(all_rows)} filas completas")
+    print_pending(pending_events, unlisted_venues, log=log)
+    write_pending(PENDING_PATH, "ra_final", pending_events, deadline, unlisted_venues)
+
+    write_block_report(club_pages)
+    write_timing_report(club_pages, timeouts)
     return all_rows
 
+def close_warm_browsers():
+    """Cerrar los navegadores que mantienen abiertos los scrapers con reuse_driver=True"""
+    for task in (scrape_club_warm, scrape_clubs_tab_pool_warm):
+        try:
+            task.close()
+        except Exception as e:
+            log(f"[WARN] No se pudo cerrar el navegador: {e}")
+
+OUT_PATH = "output/ra_all.json"  # <- nombre que pediste
+
+def load_skip_ids() -> set:
+    """IDs de la skip-list de ra_merge si está activada y es reciente"""
+    if not SKIP_COVERED_EVENTS:
+        return set()
+    skip_ids = load_skip_list(SKIP_LIST_PATH, SKIP_LIST_MAX_AGE_S)
+    if skip_ids:
+        log(f"[SKIP] {len(skip_ids)} eventos ya cubiertos por ra_venues_full ({SKIP_LIST_PATH})")
+    return skip_ids
+
+def write_final_output(rows, records, formats, run_id, images=False) -> List[str]:
+    """Imágenes (opcional), salida en los formatos pedidos y event store. Devuelve las rutas"""
+    if images:
+        with PROFILER.stage("images"):
+            cache_row_images(rows)
+    os.makedirs("output", exist_ok=True)
+    with PROFILER.stage("serialize"):
+        written = write_outputs(rows, records, formats, OUT_PATH, "output", run_id, source="ra_final")
+        print(f"\nGuardadas {len(rows)} filas en {', '.join(written)}")
+        if ENABLE_STORE:
+            n = update_store(rows, records, STORE_PATH)
+            print(f"Event store actualizado: {n} eventos en {STORE_PATH}")
+    return written
+
+def write_block_report(club_pages: Dict[int, List[Dict[str, Any]]], path: str = BLOCK_REPORT_PATH):
+    """Resumen por club de peticiones bloqueadas/bytes cargados + JSON con el detalle por página"""
+    if not club_pages:
+        return
+    report = {"enforced": BLOCKLIST_ENFORCE, "categories": BLOCK_CATEGORIES, "clubs": {}}
+    log(f"[BLOCKLIST] {'Bloqueo activo' if BLOCKLIST_ENFORCE else 'Modo medición (sin bloquear)'}:")
+    for cid, pages in club_pages.items():
+        summary = summarize_block_reports(pages)
+        report["clubs"][str(cid)] = {"name": CLUB_NAMES.get(cid, "Unknown"), "summary": summary, "pages": pages}
+        extra = f", {summary['bytes_blockable'] / 1024:.0f} KB evitables" if not BLOCKLIST_ENFORCE else ""
+        log(f"  - {cid} ({CLUB_NAMES.get(cid, 'Unknown')}): {summary['pages']} páginas, "
+            f"{summary['requests_blocked']} peticiones bloqueadas {summary['blocked_by_category']}, "
+            f"{summary['requests_loaded']} cargadas ({summary['bytes_loaded'] / 1024:.0f} KB){extra}")
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    log(f"[BLOCKLIST] Informe guardado en {path}")
+
+def write_timing_report(club_pages: Dict[int, List[Dict[str, Any]]], timeouts: List[Dict[str, Any]] = None,
+                        path: str = TIMING_REPORT_PATH):
+    """Resumen por club de Navigation/Resource Timing + JSON con el detalle por página
+    y las páginas que abandonó el watchdog"""
+    if not club_pages and not timeouts:
+        return
+
+    def fmt(d):
+        return f"{d['median']:.0f}/{d['p90']:.0f} ms" if d else "n/d"
+
+    report = {"clubs": {}, "timeouts": timeouts or []}
+    log("[TIMING] Por club (mediana/p90):")
+    for cid, pages in club_pages.items():
+        summary = summarize_page_timings(pages)
+        report["clubs"][str(cid)] = {
+            "name": CLUB_NAMES.get(cid, "Unknown"), "summary": summary,
+            "pages": [{"url": p.get("url"), **(p.get("timing") or {})} for p in pages if p.get("timing")],
+        }
+        if not summary["pages"]:
+            continue
+        slowest = summary["slowest"][0] if summary["slowest"] else None
+        log(f"  - {cid} ({CLUB_NAMES.get(cid, 'Unknown')}): TTFB {fmt(summary['ttfb_ms'])}, "
+            f"DCL {fmt(summary['dcl_ms'])}, load {fmt(summary['load_ms'])}, "
+            f"{(summary['document_bytes'] + summary['resource_bytes']) / 1024:.0f} KB en {summary['pages']} páginas"
+            + (f"; más lento: {slowest['url'][:80]} ({slowest['duration_ms']:.0f} ms)" if slowest else ""))
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    log(f"[TIMING] Informe guardado en {path}")
+
 # ========= Main =========
 if __name__ == "__main__":
-    rows = run_all_clubs(CLUB_IDS, MAX_EVENTS_PER_CLUB)
-    os.makedirs("output", exist_ok=True)
-    out_path = "output/ra_all.json"  # <- nombre que pediste
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(rows, f, ensure_ascii=False, indent=2)
-    print(f"\nGuardadas {len(rows)} filas en {out_path}")
+    import argparse
+    ap = argparse.ArgumentParser(description="Scraper de eventos RA con navegador (botasaurus)")
+    ap.add_argument("--format", default="json",
+                    help="formatos de salida separados por coma: json,sqlite,parquet")
+    ap.add_argument("--profile", action="store_true",
+                    help="perfilar cada etapa (pstats + flamegraph speedscope en profile/<run_id>/)")
+    ap.add_argument("--images", action="store_true", default=ENABLE_IMAGES,
+                    help="descargar los flyers a la caché local y añadir imageThumbs a cada fila")
+    ap.add_argument("--deadline", type=float, default=RUN_DEADLINE_S,
+                    help="segundos máximos del run: al llegar se escribe lo completado y el resto queda pendiente")
+    ap.add_argument("--no-skip", action="store_true",
+                    help="no usar la skip-list: abrir también los eventos que ya cubrió ra_venues_full")
+    args = ap.parse_args()
+    formats = parse_formats(args.format)
+    run_id = new_run_id()
+    if args.profile:
+        PROFILER.enable(PROFILE_DIR)
+
+    if ENABLE_ARCHIVE:
+        ARCHIVE = RawArchive(ARCHIVE_DIR, run_id=run_id)
+    records: List[Dict[str, Any]] = []
+    skip_ids = set() if args.no_skip else load_skip_ids()
+    rows = run_all_clubs(CLUB_IDS, MAX_EVENTS_PER_CLUB, records, skip_ids, deadline_s=args.deadline)
+    write_final_output(rows, records, formats, run_id, args.images)
+    PROFILER.finish(run_id)
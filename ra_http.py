@@ -0,0 +1,302 @@
+# Política común de reintentos para las llamadas HTTP de los scrapers: backoff exponencial
+# con jitter, circuit breaker por endpoint y contadores por endpoint para el resumen del run.
+# Con attach(session) cuenta además los bytes de cada respuesta por endpoint (en la red, es decir
+# comprimidos, y descomprimidos) y puede cortar el run al pasar un presupuesto de bytes.
+import sys, time, random, threading, zlib
+from typing import Dict, Any, Callable, Optional
+
+from ra_deadline import DeadlineExceeded
+
+# Estados HTTP que merece la pena reintentar (rate limit y errores transitorios del servidor)
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class RetryableHTTPError(Exception):
+    """Respuesta con un estado transitorio (429/5xx); retry_after en segundos si el servidor lo indica"""
+
+    def __init__(self, status: int, url: str = "", retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status} en {url}" if url else f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """El endpoint acumula demasiados fallos seguidos: no se llama hasta que pase el cooldown"""
+
+
+class BandwidthBudgetExceeded(DeadlineExceeded):
+    """El run ya descargó su presupuesto de bytes: se trata como el deadline (lo que falta queda pendiente)"""
+
+
+def accept_encoding() -> str:
+    """Codificaciones que urllib3 sabe descomprimir aquí: gzip y deflate siempre, br con brotli
+    y zstd con backports.zstd (o Python 3.14+); ambos vienen con urllib3[brotli,zstd] (requirements.txt)"""
+    from urllib3.util.request import ACCEPT_ENCODING
+    return ACCEPT_ENCODING
+
+
+def wire_size(r) -> tuple:
+    """(bytes del cuerpo en la red, exacto). urllib3 cuenta lo leído del socket antes de descomprimir;
+    con Transfer-Encoding: chunked no lo hace y se estima recomprimiendo el cuerpo"""
+    raw = getattr(r, "raw", None)
+    n = raw.tell() if raw is not None and hasattr(raw, "tell") else 0
+    if n:
+        return n, True
+    length = r.headers.get("Content-Length")
+    if length and length.isdigit():
+        return int(length), True
+    body = r.content or b""
+    encoding = (r.headers.get("Content-Encoding") or "identity").lower()
+    if encoding == "identity" or not body:
+        return len(body), True
+    if encoding in ("gzip", "deflate"):
+        return len(zlib.compress(body, 6)), False
+    return len(body), False  # br/zstd sin estimador: cota superior
+
+
+class WireMeter:
+    """Bytes por endpoint: recibidos en la red, descomprimidos y enviados, más la codificación
+    negociada. budget_bytes (None = sin límite) es el máximo de bytes en la red por run."""
+
+    def __init__(self, budget_bytes: Optional[int] = None):
+        self.budget_bytes = budget_bytes
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self.total_wire = 0
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, wire: int, decoded: int, sent: int, encoding: str, exact: bool = True):
+        with self._lock:
+            st = self.stats.setdefault(endpoint, {"responses": 0, "bytes_wire": 0, "bytes_decoded": 0,
+                                                  "bytes_sent": 0, "estimated": 0, "encodings": {}})
+            st["responses"] += 1
+            st["bytes_wire"] += wire
+            st["bytes_decoded"] += decoded
+            st["bytes_sent"] += sent
+            st["estimated"] += 0 if exact else 1
+            st["encodings"][encoding] = st["encodings"].get(encoding, 0) + 1
+            self.total_wire += wire
+
+    def over_budget(self) -> bool:
+        return self.budget_bytes is not None and self.total_wire >= self.budget_bytes
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "budget_bytes": self.budget_bytes,
+                "bytes_wire": self.total_wire,
+                "bytes_decoded": sum(st["bytes_decoded"] for st in self.stats.values()),
+                "bytes_sent": sum(st["bytes_sent"] for st in self.stats.values()),
+                "endpoints": {e: dict(st, encodings=dict(st["encodings"])) for e, st in self.stats.items()},
+            }
+
+
+def check_response(r) -> None:
+    """Lanzar RetryableHTTPError si la respuesta tiene un estado transitorio"""
+    if r.status_code in RETRY_STATUSES:
+        retry_after = None
+        try:
+            retry_after = float(r.headers.get("Retry-After", ""))
+        except (TypeError, ValueError):
+            pass
+        raise RetryableHTTPError(r.status_code, getattr(r, "url", ""), retry_after)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Errores transitorios: estados RETRY_STATUSES, timeouts y errores de conexión.
+    Los HTTPError de requests con 4xx definitivos (404, 403...) no se reintentan, ni un 200
+    cuyo cuerpo no es JSON (página de error o captcha): repetirlo daría lo mismo."""
+    if isinstance(exc, RetryableHTTPError):
+        return True
+    # requests.JSONDecodeError es ValueError pero también IOError: hay que mirarlo antes que OSError
+    if isinstance(exc, ValueError):
+        return False
+    requests = sys.modules.get("requests")  # sin importarlo: si no está cargado no puede ser suyo
+    if requests is not None and isinstance(exc, requests.exceptions.InvalidJSONError):
+        return False
+    response = getattr(exc, "response", None)
+    if response is not None and getattr(response, "status_code", None) is not None:
+        return response.status_code in RETRY_STATUSES
+    # requests.ConnectionError / Timeout heredan de IOError (OSError)
+    return isinstance(exc, (OSError, TimeoutError, ConnectionError))
+
+
+class RetryPolicy:
+    """Backoff exponencial con 'full jitter': espera uniforme en [0, min(max_delay, base * factor^n)]"""
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 1.0, max_delay: float = 20.0, factor: float = 2.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.factor = factor
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        cap = min(self.max_delay, self.base_delay * (self.factor ** attempt))
+        wait = random.uniform(0, cap)
+        if retry_after:
+            wait = max(wait, min(retry_after, self.max_delay))
+        return wait
+
+
+class CircuitBreaker:
+    """closed → open tras N llamadas fallidas seguidas → half-open al pasar el cooldown (una de prueba)"""
+
+    def __init__(self, failure_threshold: int = 5, cooldown_s: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.state = "closed"
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() - self.opened_at >= self.cooldown_s:
+                self.state = "half-open"
+                return True
+            return False
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.state = "closed"
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half-open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+class RetryClient:
+    """Ejecuta llamadas por endpoint con la política de reintentos y un breaker por endpoint"""
+
+    def __init__(self, policy: Optional[RetryPolicy] = None, failure_threshold: int = 5,
+                 cooldown_s: float = 60.0, log: Callable[[str], None] = print, deadline=None,
+                 budget_bytes: Optional[int] = None):
+        self.policy = policy or RetryPolicy()
+        self.deadline = deadline  # ra_deadline.Deadline: sin intentos ni esperas más allá del límite
+        self.wire = WireMeter(budget_bytes)
+        self._current = threading.local()  # endpoint de la llamada en curso en este hilo
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.log = log
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, endpoint: str):
+        with self._lock:
+            if endpoint not in self.breakers:
+                self.breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.cooldown_s)
+                self.stats[endpoint] = {"calls": 0, "ok": 0, "retries": 0, "failures": 0,
+                                        "circuit_skips": 0, "seconds": 0.0}
+            return self.breakers[endpoint], self.stats[endpoint]
+
+    def call(self, endpoint: str, fn: Callable, *args, **kwargs):
+        """fn(*args, **kwargs) con reintentos. Lanza la última excepción, CircuitOpenError,
+        DeadlineExceeded si el deadline del run llega antes de poder (re)intentar o
+        BandwidthBudgetExceeded si el run ya pasó su presupuesto de bytes"""
+        breaker, st = self._endpoint(endpoint)
+        st["calls"] += 1
+        t0 = time.perf_counter()
+        outer = getattr(self._current, "endpoint", None)
+        self._current.endpoint = endpoint
+        try:
+            for attempt in range(self.policy.max_attempts):
+                if self.deadline is not None:
+                    self.deadline.check(endpoint)
+                if self.wire.over_budget():
+                    raise BandwidthBudgetExceeded(
+                        f"Presupuesto de {self.wire.budget_bytes / 1e6:.1f} MB agotado antes de '{endpoint}'")
+                if not breaker.allow():
+                    st["circuit_skips"] += 1
+                    raise CircuitOpenError(f"Circuito abierto para '{endpoint}' ({breaker.failures} fallos seguidos)")
+                try:
+                    result = fn(*args, **kwargs)
+                    breaker.record_success()
+                    st["ok"] += 1
+                    return result
+                except Exception as e:
+                    if not is_retryable(e):
+                        st["failures"] += 1
+                        raise
+                    if attempt + 1 >= self.policy.max_attempts:
+                        breaker.record_failure()  # el breaker cuenta llamadas fallidas, no intentos
+                        st["failures"] += 1
+                        raise
+                    wait = self.policy.delay(attempt, getattr(e, "retry_after", None))
+                    if self.deadline is not None and wait >= self.deadline.remaining():
+                        st["failures"] += 1
+                        raise DeadlineExceeded(f"Sin tiempo para reintentar '{endpoint}' ({e})") from e
+                    st["retries"] += 1
+                    self.log(f"[RETRY] {endpoint}: {e} → reintento {attempt + 2}/{self.policy.max_attempts} en {wait:.1f}s")
+                    time.sleep(wait)
+        finally:
+            st["seconds"] += time.perf_counter() - t0
+            self._current.endpoint = outer
+
+    # ---------- bytes en la red ----------
+    def attach(self, session):
+        """Contar las respuestas de la sesión (requests) en self.wire, por endpoint de call().
+        Sustituye el contador de un RetryClient anterior (el daemon reutiliza la sesión)."""
+        hooks = [h for h in session.hooks.get("response", []) if not getattr(h, "_ra_wire_meter", False)]
+
+        def on_response(r, *args, **kwargs):
+            try:
+                body = r.content  # lee el cuerpo aquí (como haría requests sin stream)
+                wire, exact = wire_size(r)
+                req = r.request
+                sent = len(req.body or b"") + sum(len(k) + len(v) + 4 for k, v in req.headers.items())
+                endpoint = getattr(self._current, "endpoint", None) or req.path_url.split("?")[0]
+                self.wire.record(endpoint, wire, len(body), sent,
+                                 (r.headers.get("Content-Encoding") or "identity").lower(), exact)
+            except Exception as e:
+                self.log(f"[WIRE] No se pudo medir {getattr(r, 'url', '')}: {e}")
+            return r
+
+        on_response._ra_wire_meter = True
+        session.hooks["response"] = hooks + [on_response]
+        encodings = accept_encoding()
+        if "br" not in encodings:
+            # gzip/deflate ya es lo que manda requests por defecto: sin decodificador no se gana nada
+            self.log("[WIRE] brotli no está instalado: se negocia solo gzip/deflate (pip install 'urllib3[brotli,zstd]')")
+        session.headers["Accept-Encoding"] = encodings
+        return session
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        out = {}
+        wire = self.wire.summary()["endpoints"]
+        for endpoint, st in self.stats.items():
+            out[endpoint] = dict(st, seconds=round(st["seconds"], 2), circuit=self.breakers[endpoint].state)
+            if endpoint in wire:
+                w = wire[endpoint]
+                out[endpoint].update(bytes_wire=w["bytes_wire"], bytes_decoded=w["bytes_decoded"],
+                                     bytes_sent=w["bytes_sent"], encodings=w["encodings"])
+        return out
+
+    def wire_summary(self) -> Dict[str, Any]:
+        return self.wire.summary()
+
+    def print_summary(self):
+        if not self.stats:
+            return
+        print("\n🔁 Reintentos por endpoint:")
+        for endpoint, st in self.summary().items():
+            print(f"  {endpoint}: {st['calls']} llamadas, {st['ok']} ok, {st['retries']} reintentos, "
+                  f"{st['failures']} fallos, {st['circuit_skips']} saltadas por circuito ({st['circuit']}), {st['seconds']}s")
+        self.print_wire_summary()
+
+    def print_wire_summary(self):
+        w = self.wire.summary()
+        if not w["endpoints"]:
+            return
+        budget = f" de {w['budget_bytes'] / 1e6:.1f} MB" if w["budget_bytes"] else ""
+        print(f"\n📦 Bytes por endpoint (red / descomprimido): total {w['bytes_wire'] / 1e6:.2f} MB{budget}, "
+              f"{w['bytes_decoded'] / 1e6:.2f} MB descomprimidos, {w['bytes_sent'] / 1e3:.0f} KB enviados")
+        for endpoint, st in sorted(w["endpoints"].items(), key=lambda kv: -kv[1]["bytes_wire"]):
+            ratio = st["bytes_decoded"] / st["bytes_wire"] if st["bytes_wire"] else 0
+            est = f", {st['estimated']} estimadas" if st["estimated"] else ""
+            encodings = ", ".join(f"{k} {v}" for k, v in st["encodings"].items())
+            print(f"  {endpoint}: {st['responses']} respuestas, {st['bytes_wire'] / 1e3:.0f} KB en red "
+                  f"({st['bytes_wire'] / max(1, st['responses']) / 1e3:.1f} KB/resp, x{ratio:.1f} compresión{est}) "
+                  f"[{encodings}]")
@@ -0,0 +1,249 @@
+# Caché local de flyers: descarga concurrente (pool acotado), dedup por hash de contenido,
+# miniaturas WebP en varios anchos y revalidación condicional (ETag / Last-Modified).
+# Un flyer que no ha cambiado no se vuelve a descargar: dentro de REVALIDATE_AFTER_S ni se
+# pregunta, y después el servidor contesta 304 sin cuerpo.
+#
+#   cache/images/index.json                 url → sha256, etag, last_modified, thumbs...
+#   cache/images/objects/ab/<sha256>.<ext>  original (uno por contenido, aunque cambie la URL)
+#   cache/images/thumbs/ab/<sha256>-<w>.webp
+#
+# Uso desde los scrapers: --images (añade "imageThumbs": {"320": ruta, "640": ruta} a cada fila)
+# o a mano: python ra_images.py output/ra_all.json
+import os, io, json, time, hashlib, threading
+from contextlib import contextmanager
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+
+IMAGE_CACHE_DIR = "cache/images"
+THUMB_SIZES = (320, 640)      # anchos en px; el alto mantiene la proporción
+WEBP_QUALITY = 80
+IMAGE_WORKERS = 6             # descargas simultáneas como máximo
+REVALIDATE_AFTER_S = 7 * 24 * 3600
+IMAGE_TIMEOUT_S = 20
+
+_EXT_BY_TYPE = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp", "image/gif": "gif", "image/avif": "avif"}
+
+
+class ImageCache:
+    """Caché de imágenes por URL con objetos deduplicados por sha256"""
+
+    def __init__(self, root: str = IMAGE_CACHE_DIR, sizes=THUMB_SIZES, workers: int = IMAGE_WORKERS,
+                 revalidate_after_s: float = REVALIDATE_AFTER_S, log=print):
+        self.root = root
+        self.sizes = tuple(int(s) for s in sizes)
+        self.workers = max(1, workers)
+        self.revalidate_after_s = revalidate_after_s
+        self.log = log
+        self.index_path = os.path.join(root, "index.json")
+        self.index: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {"downloaded": 0, "not_modified": 0, "fresh": 0, "deduplicated": 0, "failed": 0, "bytes": 0}
+        try:
+            from PIL import Image  # diferido: solo al crear la caché
+            self.Image = Image
+        except ImportError:
+            self.Image = None
+        if self.Image is None:
+            self.log("[IMAGES] Pillow no está instalado (pip install Pillow): se guardan originales sin miniaturas")
+
+    # ---------- rutas ----------
+    def _object_path(self, sha: str, ext: str) -> str:
+        return os.path.join(self.root, "objects", sha[:2], f"{sha}.{ext}")
+
+    def _thumb_path(self, sha: str, width: int) -> str:
+        return os.path.join(self.root, "thumbs", sha[:2], f"{sha}-{width}.webp")
+
+    def _session(self):
+        s = getattr(self._local, "session", None)
+        if s is None:
+            import requests
+            s = self._local.session = requests.Session()
+            s.headers.update({"User-Agent": "Mozilla/5.0", "Accept": "image/avif,image/webp,image/*,*/*;q=0.8"})
+        return s
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.stats[key] += n
+
+    # ---------- descarga ----------
+    def fetch(self, url: str) -> Optional[Dict[str, Any]]:
+        """Entrada del índice para la URL (descargando o revalidando si hace falta), o None si falla"""
+        with self._lock:
+            entry = dict(self.index[url]) if url in self.index else None
+
+        if entry and os.path.exists(self._object_path(entry["sha256"], entry["ext"])):
+            if time.time() - entry.get("checked_at", 0) < self.revalidate_after_s:
+                self._count("fresh")
+                return self._ensure_thumbs(url, entry)
+            headers = {}
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        else:
+            entry, headers = None, {}
+
+        try:
+            r = self._session().get(url, headers=headers, timeout=IMAGE_TIMEOUT_S)
+            if r.status_code == 304 and entry:
+                entry["checked_at"] = time.time()
+                self._count("not_modified")
+                return self._ensure_thumbs(url, entry)
+            r.raise_for_status()
+        except Exception as e:
+            self._count("failed")
+            self.log(f"[IMAGES] Error descargando {url}: {e}")
+            return entry  # si había versión en caché, mejor servir esa
+
+        body = r.content
+        sha = hashlib.sha256(body).hexdigest()
+        ctype = (r.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+        ext = _EXT_BY_TYPE.get(ctype) or os.path.splitext(url.split("?")[0])[1].lstrip(".").lower() or "bin"
+        path = self._object_path(sha, ext)
+        if os.path.exists(path):
+            self._count("deduplicated")  # mismo contenido ya guardado (otra URL o flyer sin cambios)
+        else:
+            _atomic_write(path, body)
+        self._count("downloaded")
+        self._count("bytes", len(body))
+        entry = {
+            "sha256": sha, "ext": ext, "content_type": ctype, "size": len(body),
+            "etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified"),
+            "fetched_at": datetime.now().isoformat(timespec="seconds"), "checked_at": time.time(),
+        }
+        return self._ensure_thumbs(url, entry)
+
+    def _ensure_thumbs(self, url: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Generar las miniaturas que falten (compartidas por sha256) y registrar la entrada"""
+        thumbs = {}
+        if self.Image is not None:
+            missing = [w for w in self.sizes if not os.path.exists(self._thumb_path(entry["sha256"], w))]
+            if missing:
+                try:
+                    with open(self._object_path(entry["sha256"], entry["ext"]), "rb") as f:
+                        self._make_thumbs(f.read(), entry["sha256"], missing)
+                except Exception as e:
+                    self.log(f"[IMAGES] No se pudieron generar miniaturas de {url}: {e}")
+            for w in self.sizes:
+                p = self._thumb_path(entry["sha256"], w)
+                if os.path.exists(p):
+                    thumbs[str(w)] = p.replace(os.sep, "/")
+        entry["thumbs"] = thumbs
+        with self._lock:
+            self.index[url] = entry
+        return entry
+
+    def _make_thumbs(self, data: bytes, sha: str, widths: List[int]):
+        Image = self.Image
+        with Image.open(io.BytesIO(data)) as im:
+            im.seek(0)  # GIF animado: primer fotograma
+            im = im.convert("RGBA" if im.mode in ("RGBA", "LA", "P") else "RGB")
+            for w in widths:
+                if im.width > w:
+                    thumb = im.resize((w, max(1, round(im.height * w / im.width))), Image.LANCZOS)
+                else:
+                    thumb = im
+                buf = io.BytesIO()
+                thumb.save(buf, "WEBP", quality=WEBP_QUALITY, method=4)
+                _atomic_write(self._thumb_path(sha, w), buf.getvalue())
+
+    # ---------- filas ----------
+    def process_rows(self, rows: List[Dict[str, Any]], url_field: str = "imageUrl") -> Dict[str, int]:
+        """Cachear los flyers de todas las filas (cada URL una sola vez) y añadir row["imageThumbs"]"""
+        urls = list(dict.fromkeys(r.get(url_field) for r in rows if (r.get(url_field) or "").startswith("http")))
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as ex:
+            results = dict(zip(urls, ex.map(self.fetch, urls)))
+        for row in rows:
+            entry = results.get(row.get(url_field))
+            row["imageThumbs"] = dict(entry.get("thumbs") or {}) if entry else {}
+        self.save()
+        self.log(f"[IMAGES] {len(urls)} flyers en {time.perf_counter() - t0:.1f}s: "
+                 f"{self.stats['downloaded']} descargados ({self.stats['bytes'] / 1e6:.1f} MB), "
+                 f"{self.stats['not_modified']} sin cambios (304), {self.stats['fresh']} en caché, "
+                 f"{self.stats['deduplicated']} duplicados, {self.stats['failed']} fallidos")
+        return dict(self.stats)
+
+    def save(self):
+        """Guardar el índice fusionado con el que haya en disco (otro job puede haber guardado
+        mientras tanto): por URL gana la entrada revalidada más tarde (checked_at)"""
+        with _file_lock(self.index_path + ".lock"):
+            on_disk: Dict[str, Dict[str, Any]] = {}
+            if os.path.exists(self.index_path):
+                try:
+                    with open(self.index_path, encoding="utf-8") as f:
+                        on_disk = json.load(f)
+                except ValueError:
+                    self.log(f"[IMAGES] {self.index_path} ilegible: se reescribe con el índice en memoria")
+            with self._lock:
+                for url, entry in on_disk.items():
+                    mine = self.index.get(url)
+                    if mine is None or entry.get("checked_at", 0) > mine.get("checked_at", 0):
+                        self.index[url] = entry
+                data = json.dumps(self.index, ensure_ascii=False, indent=1).encode("utf-8")
+            _atomic_write(self.index_path, data)
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Lock exclusivo entre procesos sobre `path` (fcntl en POSIX, msvcrt en Windows)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a+b") as f:
+        try:
+            import fcntl
+        except ImportError:
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK se rinde tras ~10 s: seguir esperando
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            return
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _atomic_write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def cache_row_images(rows: List[Dict[str, Any]], root: str = IMAGE_CACHE_DIR) -> Dict[str, int]:
+    """Etapa de imágenes de los scrapers: cachea los flyers y añade imageThumbs a las filas"""
+    return ImageCache(root).process_rows(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Cachear los flyers de un JSON de filas y añadir imageThumbs")
+    ap.add_argument("rows_json", help="p.ej. output/ra_all.json o ra_venues_events.json")
+    ap.add_argument("--cache", default=IMAGE_CACHE_DIR)
+    ap.add_argument("--sizes", default=",".join(map(str, THUMB_SIZES)), help="anchos separados por coma")
+    ap.add_argument("--workers", type=int, default=IMAGE_WORKERS)
+    args = ap.parse_args()
+
+    with open(args.rows_json, encoding="utf-8") as f:
+        rows = json.load(f)
+    cache = ImageCache(args.cache, [int(s) for s in args.sizes.split(",") if s.strip()], args.workers)
+    cache.process_rows(rows)
+    with open(args.rows_json, "w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False, indent=2)
+    print(f"Actualizado {args.rows_json}")
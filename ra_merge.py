@@ -0,0 +1,212 @@
+# Fusión de las salidas de ra_final (navegador) y ra_venues_full (GraphQL + widget) por ID
+# numérico de evento de RA. Las URLs cambian de host (es.ra.co / ra.co) y el venue de formato
+# (slug / nombre de venues.json), así que la clave es siempre el ID y la URL se canoniza.
+#
+# Cada campo se toma de la primera fuente con valor según FIELD_PRECEDENCE; los grupos de
+# campos (releases) se toman enteros de una sola fuente para no mezclar tickets.
+# También genera la skip-list de IDs que ra_venues_full ya cubre por completo, que ra_final
+# lee al arrancar para no volver a abrir esas páginas en el navegador.
+#
+# Uso:
+#   python ra_merge.py --final output/ra_all.json --venues ra_venues_events.json --out output/ra_merged.json
+import os, json, time
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable
+
+from ra_output import event_id_from_url, write_json
+
+SOURCES = ("ra_venues_full", "ra_final")
+MERGED_SOURCE = "merged"
+SKIP_LIST_PATH = "output/ra_skip_ids.json"
+
+# Campos sueltos: primera fuente con valor no vacío
+FIELD_PRECEDENCE = {
+    "venue": ("ra_venues_full", "ra_final"),          # nombre de venues.json antes que el slug
+    "eventName": ("ra_venues_full", "ra_final"),
+    "date": ("ra_venues_full", "ra_final"),
+    "time": ("ra_venues_full", "ra_final"),           # startTime/endTime de GraphQL
+    "event_date": ("ra_venues_full", "ra_final"),
+    "imageUrl": ("ra_venues_full", "ra_final"),
+    "imageThumbs": ("ra_venues_full", "ra_final"),
+    "generos": ("ra_venues_full", "ra_final"),
+    "interestedCount": ("ra_venues_full",),
+    "minimumAge": ("ra_venues_full",),
+    "cost": ("ra_venues_full",),
+}
+
+# Grupos: todos los campos de la primera fuente cuyo grupo no esté vacío
+RELEASE_FIELDS = ["currentRelease"] + [f"{k}{i}" for i in range(1, 7) for k in ("releaseName", "price", "releaseUrl")]
+GROUP_PRECEDENCE = {
+    "releases": (RELEASE_FIELDS, ("ra_venues_full", "ra_final")),  # widget antes que el HTML
+}
+
+# Una fila de ra_venues_full con todo esto no necesita la pasada del navegador
+COVERED_FIELDS = ("eventName", "event_date", "time", "releaseName1")
+
+
+def canonical_url(event_id: int) -> str:
+    return f"https://ra.co/events/{event_id}"
+
+
+def _empty(v) -> bool:
+    return v is None or v == "" or v == {} or v == []
+
+
+def index_by_event_id(rows: Iterable[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    """Lado build del hash join: {event_id: fila} (la última fila gana si se repite el ID)"""
+    out = {}
+    for row in rows or []:
+        eid = event_id_from_url(row.get("url"))
+        if eid is not None:
+            out[eid] = row
+    return out
+
+
+def merge_row(event_id: int, by_source: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Fusionar las filas de un mismo evento ({fuente: fila}) según las reglas de precedencia"""
+    present = [s for s in SOURCES if s in by_source]
+    merged: Dict[str, Any] = {}
+    # base: todos los campos conocidos, en el orden de la fila de mayor precedencia
+    for src in present:
+        for k, v in by_source[src].items():
+            merged.setdefault(k, v)
+    for field, order in FIELD_PRECEDENCE.items():
+        for src in order:
+            v = by_source.get(src, {}).get(field)
+            if not _empty(v):
+                merged[field] = v
+                break
+    for fields, order in GROUP_PRECEDENCE.values():
+        for src in order:
+            row = by_source.get(src)
+            if row and any(not _empty(row.get(f)) for f in fields):
+                merged.update({f: row.get(f, "") for f in fields})
+                break
+    merged["url"] = canonical_url(event_id)
+    merged["sources"] = present
+    return merged
+
+
+def merge_record(event_id: int, row: Dict[str, Any], by_source: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Registro normalizado del evento fusionado: tickets de la misma fuente que las releases"""
+    present = [s for s in SOURCES if s in by_source]
+    if not present:
+        return None
+    ticket_src = next((s for s in GROUP_PRECEDENCE["releases"][1] if s in by_source and by_source[s]["tickets"]),
+                      present[0])
+    base = by_source[ticket_src]
+    ev = dict(base["event"])
+    for src in present:  # huecos (venue_id, edad, coste...) desde la otra fuente
+        for k, v in by_source[src]["event"].items():
+            if _empty(ev.get(k)) and not _empty(v):
+                ev[k] = v
+    ev.update({
+        "event_id": event_id, "source": MERGED_SOURCE, "url": row["url"], "venue": row.get("venue", ev.get("venue")),
+        "event_name": row.get("eventName") or ev.get("event_name"), "event_date": row.get("event_date") or ev.get("event_date"),
+        "image_url": row.get("imageUrl") or ev.get("image_url"), "genres": row.get("generos") or ev.get("genres"),
+        "current_release": row.get("currentRelease", ev.get("current_release")),
+    })
+    return {"event": ev, "tickets": [dict(t, event_id=event_id) for t in base["tickets"]]}
+
+
+def merge_outputs(rows_by_source: Dict[str, List[Dict[str, Any]]],
+                  records_by_source: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+    """Hash join por event_id de las filas (y registros, si se pasan) de cada fuente.
+    Devuelve (filas, registros) ordenados por fecha; registros es [] si no se pasaron."""
+    indexed = {src: index_by_event_id(rows_by_source.get(src)) for src in SOURCES}
+    rec_index = {
+        src: {r["event"]["event_id"]: r for r in (records_by_source or {}).get(src) or [] if r["event"].get("event_id") is not None}
+        for src in SOURCES
+    }
+    event_ids = set()
+    for idx in indexed.values():
+        event_ids.update(idx)
+
+    rows, records = [], []
+    for eid in event_ids:
+        by_source = {src: indexed[src][eid] for src in SOURCES if eid in indexed[src]}
+        row = merge_row(eid, by_source)
+        rows.append(row)
+        if records_by_source:
+            rec = merge_record(eid, row, {src: rec_index[src][eid] for src in SOURCES if eid in rec_index[src]})
+            if rec:
+                records.append(rec)
+    rows.sort(key=lambda r: (r.get("event_date") or "", event_id_from_url(r["url"])))
+    order = {r["url"]: i for i, r in enumerate(rows)}
+    records.sort(key=lambda r: order.get(r["event"]["url"], len(order)))
+    return rows, records
+
+
+# =================== Event store: fila guardada + fila nueva ===================
+def merge_stored(event_id: int, by_source: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Fila a servir desde el event store a partir de la última fila guardada de cada fuente.
+    Con una sola fuente es esa fila; con varias se vuelve a fusionar con merge_row, así cada
+    fuente conserva su precedencia por campo aunque la otra escriba después."""
+    if len(by_source) == 1:
+        return next(iter(by_source.values()))
+    return merge_row(event_id, by_source)
+
+
+def ticket_source(tickets_by_source: Dict[str, Optional[List[Dict[str, Any]]]]) -> Optional[str]:
+    """Fuente cuyos tickets se sirven: la primera con tickets en el orden de las releases"""
+    return next((s for s in GROUP_PRECEDENCE["releases"][1] if tickets_by_source.get(s)), None)
+
+
+# =================== Skip-list para ra_final ===================
+def is_fully_covered(row: Dict[str, Any]) -> bool:
+    return all(not _empty(row.get(f)) for f in COVERED_FIELDS)
+
+
+def covered_event_ids(rows: Iterable[Dict[str, Any]]) -> List[int]:
+    return sorted(eid for eid, row in index_by_event_id(rows).items() if is_fully_covered(row))
+
+
+def write_skip_list(rows: Iterable[Dict[str, Any]], path: str = SKIP_LIST_PATH, source: str = "ra_venues_full") -> int:
+    """Guardar los IDs completos de esta salida para que ra_final no los vuelva a scrapear"""
+    ids = covered_event_ids(rows)
+    write_json({"generated_at": datetime.now().isoformat(timespec="seconds"), "source": source,
+                "covered_fields": list(COVERED_FIELDS), "event_ids": ids}, path)
+    return len(ids)
+
+
+def load_skip_list(path: str = SKIP_LIST_PATH, max_age_s: Optional[float] = None) -> set:
+    """IDs a saltar; vacío si el archivo no existe o es más antiguo que max_age_s"""
+    if not os.path.exists(path):
+        return set()
+    if max_age_s is not None and time.time() - os.path.getmtime(path) > max_age_s:
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {int(i) for i in json.load(f).get("event_ids", [])}
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Fusionar ra_final y ra_venues_full por ID de evento de RA")
+    ap.add_argument("--final", default="output/ra_all.json", help="filas de ra_final")
+    ap.add_argument("--venues", default="ra_venues_events.json", help="filas de ra_venues_full")
+    ap.add_argument("--out", default="output/ra_merged.json")
+    ap.add_argument("--skip-list", default=SKIP_LIST_PATH, help="dónde escribir la skip-list para ra_final ('' = no)")
+    ap.add_argument("--store", action="store_true", help="actualizar también el event store con las filas fusionadas")
+    args = ap.parse_args()
+
+    def load(path):
+        if not os.path.exists(path):
+            print(f"[MERGE] No existe {path}: se omite")
+            return []
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    rows_by_source = {"ra_final": load(args.final), "ra_venues_full": load(args.venues)}
+    t0 = time.perf_counter()
+    rows, _ = merge_outputs(rows_by_source)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    both = sum(1 for r in rows if len(r["sources"]) > 1)
+    write_json(rows, args.out)
+    print(f"[MERGE] {len(rows_by_source['ra_final'])} + {len(rows_by_source['ra_venues_full'])} filas → "
+          f"{len(rows)} eventos ({both} en ambas fuentes) en {elapsed_ms:.1f} ms → {args.out}")
+    if args.skip_list:
+        n = write_skip_list(rows_by_source["ra_venues_full"], args.skip_list)
+        print(f"[MERGE] Skip-list: {n} eventos completos → {args.skip_list}")
+    if args.store:
+        from ra_store import update_store
+        print(f"[MERGE] Event store actualizado: {update_store(rows, [])} eventos")
@@ -0,0 +1,230 @@
+# Salida normalizada: una tabla de eventos y otra de tickets (precios numéricos, estados
+# como enum, sin el tope de 6 releases), en JSON/SQLite/Parquet.
+# El JSON plano de siempre (releaseName1..6, price1..6 "13,00€") sigue siendo una vista más.
+import os, re, json, sqlite3
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Estados de ticket que devuelve RA (widget y objetos Ticket embebidos)
+TICKET_STATUSES = ("VALID", "SOLDOUT", "NOLONGERONSALE", "UPCOMING", "UNKNOWN")
+
+OUTPUT_FORMATS = ("json", "sqlite", "parquet")
+
+EVENT_COLUMNS = [
+    ("event_id", "INTEGER"),
+    ("source", "TEXT"),
+    ("venue", "TEXT"),
+    ("venue_id", "INTEGER"),
+    ("event_name", "TEXT"),
+    ("url", "TEXT"),
+    ("event_date", "TEXT"),
+    ("start_time", "TEXT"),
+    ("end_time", "TEXT"),
+    ("image_url", "TEXT"),
+    ("genres", "TEXT"),
+    ("interested_count", "INTEGER"),
+    ("minimum_age", "INTEGER"),
+    ("cost", "TEXT"),
+    ("current_release", "TEXT"),
+    ("ticket_count", "INTEGER"),
+]
+
+TICKET_COLUMNS = [
+    ("event_id", "INTEGER"),
+    ("position", "INTEGER"),
+    ("title", "TEXT"),
+    ("price", "REAL"),
+    ("currency", "TEXT"),
+    ("status", "TEXT"),
+    ("is_add_on", "INTEGER"),
+    ("url", "TEXT"),
+]
+
+
+# =================== Helpers ===================
+def event_id_from_url(url: str) -> Optional[int]:
+    """ID numérico de RA a partir de cualquier URL de evento (ra.co, es.ra.co, /events/123)"""
+    m = re.search(r"/events/(\d+)", url or "")
+    return int(m.group(1)) if m else None
+
+def _to_int(x) -> Optional[int]:
+    try:
+        return int(x) if x not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+def _to_price(x) -> Optional[float]:
+    if x is None or x == "":
+        return None
+    try:
+        return float(str(x).replace(",", "."))
+    except ValueError:
+        return None
+
+def normalize_status(status: Optional[str]) -> str:
+    s = (status or "").upper()
+    return s if s in TICKET_STATUSES else "UNKNOWN"
+
+def make_record(event: Dict[str, Any], tickets: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Registro normalizado {event, tickets} a partir de campos de evento y tickets
+    con claves title/price/status/isAddOn/url (en el orden en que se quieren numerar)"""
+    ev = {name: event.get(name) for name, _ in EVENT_COLUMNS}
+    ev["event_id"] = _to_int(ev["event_id"]) or event_id_from_url(ev.get("url"))
+    ev["venue_id"] = _to_int(ev["venue_id"])
+    ev["interested_count"] = _to_int(ev["interested_count"])
+    ev["minimum_age"] = _to_int(ev["minimum_age"])
+    out_tickets = []
+    for pos, t in enumerate(tickets, start=1):
+        out_tickets.append({
+            "event_id": ev["event_id"],
+            "position": pos,
+            "title": (t.get("title") or "").strip(),
+            "price": _to_price(t.get("price")),
+            "currency": "EUR",
+            "status": normalize_status(t.get("status")),
+            "is_add_on": bool(t.get("isAddOn", False)),
+            "url": t.get("url") or "",
+        })
+    ev["ticket_count"] = len(out_tickets)
+    return {"event": ev, "tickets": out_tickets}
+
+
+# =================== JSON ===================
+def dumps_json(obj: Any, indent: bool = True) -> bytes:
+    """Serializar a JSON UTF-8 con orjson si está disponible (mismo formato que json.dump indent=2)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
+def write_json(obj: Any, path: str) -> None:
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(dumps_json(obj))
+
+
+# =================== SQLite (snapshots) ===================
+SQLITE_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    scraped_at TEXT NOT NULL,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS events (
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    {", ".join(f"{n} {t}" for n, t in EVENT_COLUMNS)},
+    PRIMARY KEY (run_id, event_id)
+);
+CREATE TABLE IF NOT EXISTS tickets (
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    {", ".join(f"{n} {t}" for n, t in TICKET_COLUMNS)},
+    CHECK (status IN ({", ".join(repr(s) for s in TICKET_STATUSES)})),
+    PRIMARY KEY (run_id, event_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_events_event ON events(event_id);
+CREATE INDEX IF NOT EXISTS idx_events_venue_date ON events(venue, event_date);
+CREATE INDEX IF NOT EXISTS idx_tickets_event ON tickets(event_id);
+"""
+
+def snapshot_records(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Registros que entran en un snapshot (SQLite y Parquet con la misma regla): sin event_id
+    no se guardan y, si un ID se repite, queda el último registro entero (con sus tickets)"""
+    by_id: Dict[int, Dict[str, Any]] = {}
+    for r in records:
+        eid = r["event"]["event_id"]
+        if eid is not None:
+            by_id.pop(eid, None)  # reinsertar: el orden es el de la última aparición
+            by_id[eid] = r
+    return list(by_id.values())
+
+
+def write_sqlite(records: List[Dict[str, Any]], path: str, run_id: str, source: str = "") -> None:
+    """Añadir un snapshot (run) a la base SQLite; los runs anteriores se conservan. Reescribir el
+    mismo run_id (replay --run) lo sustituye entero, como la partición parquet"""
+    records = snapshot_records(records)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    con = sqlite3.connect(path)
+    try:
+        con.executescript(SQLITE_SCHEMA)
+        ev_cols = [n for n, _ in EVENT_COLUMNS]
+        tk_cols = [n for n, _ in TICKET_COLUMNS]
+        with con:
+            con.execute("DELETE FROM tickets WHERE run_id = ?", (run_id,))
+            con.execute("DELETE FROM events WHERE run_id = ?", (run_id,))
+            con.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?)",
+                        (run_id, datetime.now().isoformat(timespec="seconds"), source))
+            con.executemany(
+                f"INSERT OR REPLACE INTO events (run_id, {', '.join(ev_cols)}) VALUES ({', '.join('?' * (len(ev_cols) + 1))})",
+                ([run_id] + [r["event"][c] for c in ev_cols] for r in records),
+            )
+            con.executemany(
+                f"INSERT OR REPLACE INTO tickets (run_id, {', '.join(tk_cols)}) VALUES ({', '.join('?' * (len(tk_cols) + 1))})",
+                ([run_id] + [t[c] for c in tk_cols] for r in records for t in r["tickets"]),
+            )
+    finally:
+        con.close()
+
+
+# =================== Parquet (snapshots) ===================
+def write_parquet(records: List[Dict[str, Any]], base_dir: str, run_id: str) -> None:
+    """Escribir events/ y tickets/ particionados por run_id (formato hive, legible con DuckDB/pyarrow)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("La salida parquet necesita pyarrow: pip install pyarrow")
+
+    status_type = pa.dictionary(pa.int8(), pa.string())
+    events_schema = pa.schema([
+        ("event_id", pa.int64()), ("source", pa.string()), ("venue", pa.string()),
+        ("venue_id", pa.int64()), ("event_name", pa.string()), ("url", pa.string()),
+        ("event_date", pa.string()), ("start_time", pa.string()), ("end_time", pa.string()),
+        ("image_url", pa.string()), ("genres", pa.string()), ("interested_count", pa.int64()),
+        ("minimum_age", pa.int64()), ("cost", pa.string()), ("current_release", pa.string()),
+        ("ticket_count", pa.int64()),
+    ])
+    tickets_schema = pa.schema([
+        ("event_id", pa.int64()), ("position", pa.int32()), ("title", pa.string()),
+        ("price", pa.float64()), ("currency", pa.string()), ("status", status_type),
+        ("is_add_on", pa.bool_()), ("url", pa.string()),
+    ])
+    records = snapshot_records(records)
+    events = [r["event"] for r in records]
+    tickets = [t for r in records for t in r["tickets"]]
+    for name, rows, schema in (("events", events, events_schema), ("tickets", tickets, tickets_schema)):
+        part_dir = os.path.join(base_dir, name, f"run_id={run_id}")
+        os.makedirs(part_dir, exist_ok=True)
+        table = pa.Table.from_pylist(rows, schema=schema)
+        pq.write_table(table, os.path.join(part_dir, "part-0.parquet"), compression="zstd")
+
+
+# =================== Dispatcher ===================
+def parse_formats(value: str) -> List[str]:
+    formats = [f.strip().lower() for f in (value or "").split(",") if f.strip()]
+    unknown = [f for f in formats if f not in OUTPUT_FORMATS]
+    if unknown:
+        raise ValueError(f"Formato(s) de salida desconocido(s): {', '.join(unknown)} (válidos: {', '.join(OUTPUT_FORMATS)})")
+    return formats or ["json"]
+
+def write_outputs(rows: List[Dict[str, Any]], records: List[Dict[str, Any]], formats: List[str],
+                  json_path: str, base_dir: str, run_id: str, source: str = "") -> List[str]:
+    """Escribir la salida en todos los formatos pedidos. Devuelve las rutas escritas"""
+    written = []
+    if "json" in formats:
+        write_json(rows, json_path)
+        written.append(json_path)
+    if "sqlite" in formats:
+        db_path = os.path.join(base_dir, "ra_snapshots.sqlite")
+        write_sqlite(records, db_path, run_id, source)
+        written.append(db_path)
+    if "parquet" in formats:
+        pq_dir = os.path.join(base_dir, "parquet")
+        write_parquet(records, pq_dir, run_id)
+        written.append(pq_dir)
+    return written
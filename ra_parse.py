@@ -0,0 +1,206 @@
+# Parsers puros del HTML de RA usados por ra_final (sin dependencias de navegador).
+# Se pueden importar sin botasaurus, p.ej. para regenerar filas desde el archivo.
+import re, json, math
+from datetime import datetime
+from typing import List, Dict, Any
+from ra_output import make_record
+
+# ========= Formato fecha/hora/precio =========
+WEEK = ["LUN", "MAR", "MIÉ", "JUE", "VIE", "SÁB", "DOM"]
+MONTH = ["ENE", "FEB", "MAR", "ABR", "MAY", "JUN", "JUL", "AGO", "SEPT", "OCT", "NOV", "DIC"]
+
+def fmt_date_spanish(dt_iso: str) -> str:
+    # "MIÉ. 24 SEP."
+    WEEK2 = ["LUN.", "MAR.", "MIÉ.", "JUE.", "VIE.", "SÁB.", "DOM."]
+    MONTH2 = ["ENE.", "FEB.", "MAR.", "ABR.", "MAY.", "JUN.", "JUL.", "AGO.", "SEP.", "OCT.", "NOV.", "DIC."]
+    if not dt_iso: return ""
+    try:
+        dt = datetime.fromisoformat(dt_iso.replace("Z","").split(".")[0])
+        return f"{WEEK2[dt.weekday()]} {dt.day:02d} {MONTH2[dt.month-1]}"
+    except Exception:
+        return ""
+
+def fmt_time_range(start_iso: str, end_iso: str) -> str:
+    # "HH:MM HH:MM" en 24h
+    try:
+        if not start_iso: return ""
+        s = datetime.fromisoformat(start_iso.replace("Z","").split(".")[0]).strftime("%H:%M")
+        if end_iso:
+            e = datetime.fromisoformat(end_iso.replace("Z","").split(".")[0]).strftime("%H:%M")
+            return f"{s} {e}"
+        return s
+    except Exception:
+        return ""
+
+def fmt_price_eur(x: Any) -> str:
+    if x is None: return ""
+    if isinstance(x, (int, float)):
+        if abs(x - round(x)) < 1e-6:
+            return f"{int(round(x))}€"
+        return f"{x:.2f}".replace(".", ",") + "€"
+    return ""
+
+def slugify(txt: str) -> str:
+    from unidecode import unidecode  # diferido: solo lo usa el venue de ra_final
+    s = unidecode((txt or "").lower())
+    s = re.sub(r"[^a-z0-9]+", "-", s).strip("-")
+    return s
+
+# ========= Parsers HTML =========
+def extract_event_ids_from_club_html(html: str) -> List[str]:
+    ids = re.findall(r'/events/(\d+)', html)
+    seen, out = set(), []
+    for i in ids:
+        if i not in seen:
+            seen.add(i)
+            out.append(i)
+    return out
+
+def extract_jsonld(soup) -> Dict[str, Any]:
+    node = soup.select_one('script[type="application/ld+json"]')
+    if not node:
+        return {}
+    try:
+        data = json.loads(node.text)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+def extract_og_image(soup) -> str:
+    og = soup.select_one('meta[property="og:image"]')
+    return og.get("content") if og and og.get("content") else ""
+
+def extract_genres_from_html(soup) -> str:
+    gens = []
+    for a in soup.select('a[href*="/genre/"]'):
+        txt = (a.get_text(" ", strip=True) or "").strip()
+        if txt and txt.lower() not in [g.lower() for g in gens]:
+            gens.append(txt)
+    return ", ".join(gens)
+
+def find_script_blocks(html: str) -> List[str]:
+    return re.findall(r"<script[^>]*>([\s\S]*?)</script>", html, flags=re.I)
+
+def extract_ticket_objects(script_text: str) -> List[Dict[str, Any]]:
+    out = []
+    idx = 0
+    while True:
+        m = re.search(r'"__typename"\s*:\s*"Ticket"', script_text[idx:])
+        if not m: break
+        anchor = idx + m.start()
+        start = anchor
+        while start > 0 and script_text[start] != "{": start -= 1
+        brace, end, ok = 0, start, False
+        while end < len(script_text):
+            ch = script_text[end]
+            if ch == "{": brace += 1
+            elif ch == "}":
+                brace -= 1
+                if brace == 0:
+                    ok = True
+                    break
+            end += 1
+        if ok:
+            candidate = script_text[start:end+1]
+            try:
+                obj = json.loads(candidate)
+                if obj.get("__typename") == "Ticket":
+                    out.append(obj)
+            except Exception:
+                try:
+                    obj = json.loads(bytes(candidate, "utf-8").decode("unicode_escape"))
+                    if obj.get("__typename") == "Ticket":
+                        out.append(obj)
+                except Exception:
+                    pass
+        idx = end + 1
+    return out
+
+def pick_current_release(tickets_norm: List[Dict[str, Any]]) -> str:
+    valid = [t for t in tickets_norm if t.get("status") == "VALID" and not t.get("isAddOn")]
+    if not valid: return ""
+    valid.sort(key=lambda t: (t.get("price") is None, t.get("price")))
+    return valid[0].get("title") or ""
+
+# ========= Construcción de la entrada final (precios + generos) =========
+def extract_tickets_from_html(page_html: str) -> List[Dict[str, Any]]:
+    """Tickets normalizados (title/price/status/isAddOn/url) ordenados por precio ascendente"""
+    tickets_raw = []
+    for sc in find_script_blocks(page_html):
+        tickets_raw.extend(extract_ticket_objects(sc))
+    tickets_norm = [{
+        "title": t.get("title"),
+        "price": t.get("priceRetail"),
+        "status": t.get("validType"),         # p.ej., VALID, SOLDOUT, NOLONGERONSALE
+        "isAddOn": t.get("isAddOn", False),
+        "url": t.get("url") or ""             # normalmente vacío
+    } for t in tickets_raw]
+    tickets_norm.sort(key=lambda x: (x.get("price") is None, x.get("price") if x.get("price") is not None else math.inf))
+    return tickets_norm
+
+def build_price_row(event_url: str, page_html: str, meta: Dict[str, Any], generos: str,
+                    tickets_norm: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+    # Tickets desde los <script> del HTML
+    if tickets_norm is None:
+        tickets_norm = extract_tickets_from_html(page_html)
+
+    # Meta
+    venue_name = ""
+    loc = meta.get("location") if isinstance(meta, dict) else None
+    if isinstance(loc, dict):
+        venue_name = loc.get("name") or ""
+    event_name = meta.get("name", "")
+    start = meta.get("startDate", "")
+    end   = meta.get("endDate", "")
+    image = ""
+    if isinstance(meta.get("image"), list) and meta["image"]:
+        image = meta["image"][0]
+    if not image:
+        # fallback: intentar og:image (si necesitas, podrías pasar también soup)
+        pass
+
+    # Base
+    out = {
+        "venue": slugify(venue_name) if venue_name else "",
+        "eventName": event_name or "",
+        "url": event_url,
+        "date": fmt_date_spanish(start),
+        "time": fmt_time_range(start, end),
+        "imageUrl": image or "",
+        "currentRelease": pick_current_release(tickets_norm),
+        "event_date": (start or "")[:10],
+        "generos": generos or "",     # <- añadido
+    }
+
+    # Releases 1..6 (si existe → url = release.url o event_url; si no existe → campos vacíos)
+    for i in range(6):
+        if i < len(tickets_norm):
+            t = tickets_norm[i]
+            # etiqueta "Agotado" si status indica sold out / no disponible
+            title = (t.get("title") or "").strip()
+            status = (t.get("status") or "").upper()
+            if status in ("SOLDOUT", "NOLONGERONSALE"):
+                title = f"{title} - Agotado"
+            out[f"releaseName{i+1}"] = title
+            out[f"price{i+1}"] = fmt_price_eur(t.get("price"))
+            out[f"releaseUrl{i+1}"] = (t.get("url") or event_url)
+        else:
+            out[f"releaseName{i+1}"] = ""
+            out[f"price{i+1}"] = ""
+            out[f"releaseUrl{i+1}"] = ""
+    return out
+
+def build_price_record(row: Dict[str, Any], tickets_norm: List[Dict[str, Any]], meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Registro normalizado (evento + todos los tickets, sin tope de 6) para ra_output"""
+    return make_record({
+        "source": "ra_final",
+        "venue": row.get("venue", ""),
+        "event_name": row.get("eventName", ""),
+        "url": row.get("url", ""),
+        "event_date": row.get("event_date", ""),
+        "start_time": meta.get("startDate", ""),
+        "end_time": meta.get("endDate", ""),
+        "image_url": row.get("imageUrl", ""),
+        "genres": row.get("generos", ""),
+        "current_release": row.get("currentRelease", ""),
+    }, tickets_norm)
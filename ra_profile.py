@@ -0,0 +1,229 @@
+# Modo --profile: perfila cada etapa (fetch, parse, build, serialize, sleep) con cProfile y un
+# muestreador de pilas para el flamegraph. Con el profiler apagado, stage() devuelve siempre el
+# mismo contexto vacío: no hay hooks de profiling ni hilo de muestreo.
+#
+# Salida en profile/<run_id>/:
+#   stage-<etapa>.pstats          -> python -m pstats / snakeviz
+#   flame.speedscope.json         -> https://www.speedscope.app
+#   summary.json                  -> top funciones por etapa y eventos más lentos
+import os, sys, json, time, threading, io
+from collections import Counter
+from contextlib import nullcontext
+from typing import Dict, Any, Optional, List
+
+PROFILE_DIR = "profile"
+SAMPLE_INTERVAL_S = 0.005
+TOP_N = 15
+
+_NULL = nullcontext()
+
+
+class _Stage:
+    """Contexto de una etapa activa. Las etapas anidadas pausan a la exterior (tiempo exclusivo)"""
+
+    __slots__ = ("profiler", "name", "venue", "event", "prof", "t0", "outer", "nested")
+
+    def __init__(self, profiler, name, venue, event):
+        self.profiler = profiler
+        self.name = name
+        self.venue = venue
+        self.event = event
+
+    def __enter__(self):
+        stack = self.profiler._stack()
+        self.outer = stack[-1] if stack else None
+        if self.outer is not None and self.outer.prof is not None:
+            self.outer.prof.disable()
+        stack.append(self)
+        self.profiler._active[threading.get_ident()] = self
+        self.nested = 0.0
+        import cProfile  # diferido: solo con --profile
+        self.prof = cProfile.Profile()
+        self.t0 = time.perf_counter()
+        try:
+            self.prof.enable()
+        except ValueError:
+            # Python 3.12+: un solo perfilador activo a la vez entre hilos → solo tiempo de pared
+            self.prof = None
+        return self
+
+    def __exit__(self, *exc):
+        if self.prof is not None:
+            self.prof.disable()
+        elapsed = time.perf_counter() - self.t0
+        stack = self.profiler._stack()
+        stack.pop()
+        tid = threading.get_ident()
+        if self.outer is not None:
+            self.outer.nested += elapsed
+            self.profiler._active[tid] = self.outer
+            if self.outer.prof is not None:
+                try:
+                    self.outer.prof.enable()
+                except ValueError:
+                    self.outer.prof = None
+        else:
+            self.profiler._active.pop(tid, None)
+        self.profiler._record(self, elapsed - self.nested)
+        return False
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.out_dir = None
+        self._local = threading.local()
+        self._active: Dict[int, _Stage] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, "pstats.Stats"] = {}
+        self._wall = Counter()
+        self._calls = Counter()
+        self._slowest: List[Dict[str, Any]] = []
+        self._samples = Counter()
+        self._sampler = None
+        self._stop = threading.Event()
+        self._t_start = 0.0
+
+    # ---------- API ----------
+    def enable(self, out_dir: str):
+        self.enabled = True
+        self.out_dir = out_dir
+        self._t_start = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample_loop, name="ra-profile-sampler", daemon=True)
+        self._sampler.start()
+
+    def stage(self, name: str, venue: Any = None, event: Any = None):
+        """with PROFILER.stage("parse", venue=..., event=...): ...  (no-op si está apagado)"""
+        if not self.enabled:
+            return _NULL
+        return _Stage(self, name, venue, event)
+
+    # ---------- internos ----------
+    def _stack(self) -> List[_Stage]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, st: _Stage, elapsed: float):
+        import pstats
+        stats = pstats.Stats(st.prof, stream=io.StringIO()) if st.prof is not None else None
+        top = _top_functions(stats, 1) if stats else []
+        with self._lock:
+            if stats is not None:
+                if st.name in self._stats:
+                    self._stats[st.name].add(stats)
+                else:
+                    self._stats[st.name] = stats
+            self._wall[st.name] += elapsed
+            self._calls[st.name] += 1
+            if st.event is not None or st.venue is not None:
+                self._slowest.append({
+                    "stage": st.name, "venue": st.venue, "event": st.event,
+                    "seconds": round(elapsed, 4), "hottest": top[0] if top else None,
+                })
+                if len(self._slowest) > TOP_N * 20:  # acotar memoria en runs largos
+                    self._slowest.sort(key=lambda r: -r["seconds"])
+                    del self._slowest[TOP_N * 5:]
+
+    def _sample_loop(self):
+        me = threading.get_ident()
+        while not self._stop.wait(SAMPLE_INTERVAL_S):
+            frames = sys._current_frames()
+            for tid, st in list(self._active.items()):
+                if tid == me or tid not in frames:
+                    continue
+                stack = []
+                f = frames[tid]
+                while f is not None:
+                    code = f.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    f = f.f_back
+                stack.reverse()
+                root = [(f"stage:{st.name}", "", 0)]
+                if st.venue is not None:
+                    root.append((f"venue:{st.venue}", "", 0))
+                self._samples[tuple(root + stack)] += 1
+
+    # ---------- salida ----------
+    def finish(self, run_id: str = "") -> Optional[str]:
+        """Parar el muestreo, escribir pstats/speedscope/summary e imprimir el top. Devuelve el directorio"""
+        if not self.enabled:
+            return None
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join(timeout=1)
+        self.enabled = False
+        out = os.path.join(self.out_dir, run_id) if run_id else self.out_dir
+        os.makedirs(out, exist_ok=True)
+
+        for name, stats in self._stats.items():
+            stats.dump_stats(os.path.join(out, f"stage-{name}.pstats"))
+        with open(os.path.join(out, "flame.speedscope.json"), "w", encoding="utf-8") as f:
+            json.dump(self._speedscope(run_id), f)
+
+        summary = {
+            "wall_seconds": round(time.perf_counter() - self._t_start, 3),
+            "stages": {
+                name: {
+                    "seconds": round(self._wall[name], 3),
+                    "calls": self._calls[name],
+                    "top_functions": _top_functions(self._stats[name], TOP_N) if name in self._stats else [],
+                } for name in sorted(self._wall, key=lambda n: -self._wall[n])
+            },
+            "slowest": sorted(self._slowest, key=lambda r: -r["seconds"])[:TOP_N],
+        }
+        with open(os.path.join(out, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        _print_summary(summary)
+        print(f"[PROFILE] Perfiles guardados en {out}")
+        return out
+
+    def _speedscope(self, name: str) -> Dict[str, Any]:
+        frames, index = [], {}
+        samples, weights = [], []
+        for stack, count in self._samples.items():
+            ids = []
+            for fr in stack:
+                if fr not in index:
+                    index[fr] = len(frames)
+                    frames.append({"name": fr[0], "file": fr[1], "line": fr[2]} if fr[1] else {"name": fr[0]})
+                ids.append(index[fr])
+            samples.append(ids)
+            weights.append(count * SAMPLE_INTERVAL_S)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"ra {name}".strip(),
+            "exporter": "ra_profile",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled", "name": "all stages", "unit": "seconds",
+                "startValue": 0, "endValue": sum(weights), "samples": samples, "weights": weights,
+            }],
+        }
+
+
+def _top_functions(stats: "pstats.Stats", n: int) -> List[Dict[str, Any]]:
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _callers) in stats.stats.items():
+        rows.append({"function": f"{func} ({os.path.basename(filename)}:{line})",
+                     "calls": nc, "tottime": round(tt, 4), "cumtime": round(ct, 4)})
+    rows.sort(key=lambda r: -r["tottime"])
+    return rows[:n]
+
+
+def _print_summary(summary: Dict[str, Any]):
+    print(f"\n⏱️  Perfil por etapa (wall total {summary['wall_seconds']}s):")
+    for name, st in summary["stages"].items():
+        print(f"  {name}: {st['seconds']}s en {st['calls']} llamadas")
+        for fn in st["top_functions"][:5]:
+            print(f"      {fn['tottime']:>8.3f}s  {fn['function']}")
+    if summary["slowest"]:
+        print("  Más lentos (etapa / venue / evento):")
+        for r in summary["slowest"][:10]:
+            hot = r["hottest"]["function"] if r["hottest"] else "-"
+            print(f"      {r['seconds']:>8.3f}s  {r['stage']} / {r['venue']} / {r['event']}  → {hot}")
+
+
+# Instancia compartida por los scrapers (apagada salvo con --profile)
+PROFILER = Profiler()
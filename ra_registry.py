@@ -0,0 +1,70 @@
+# Registro de venues y áreas de RA (venues.json), compartido por ra_final y ra_venues_full.
+# Añadir un club o una ciudad es editar el JSON, no el código:
+#   {"areas": {"barcelona": {"id": 20, "name": "Barcelona"}},
+#    "venues": [{"id": 911, "name": "Razzmatazz", "area": "barcelona", "enabled": true}, ...]}
+import os, re, json, unicodedata
+from typing import Dict, Any, Optional
+
+REGISTRY_PATH = os.environ.get("RA_VENUES_FILE") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "venues.json")
+
+
+def load_registry(path: str = REGISTRY_PATH) -> Dict[str, Any]:
+    """Leer y validar venues.json. Lanza ValueError con un mensaje claro si está mal formado"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    areas = data.get("areas") or {}
+    venues = data.get("venues") or []
+    seen = set()
+    for v in venues:
+        if "id" not in v or not v.get("name"):
+            raise ValueError(f"{path}: cada venue necesita 'id' y 'name': {v}")
+        vid = int(v["id"])
+        if vid in seen:
+            raise ValueError(f"{path}: venue {vid} duplicado")
+        seen.add(vid)
+        if v.get("area") and v["area"] not in areas:
+            raise ValueError(f"{path}: el venue {vid} usa el área desconocida '{v['area']}'")
+    return {"areas": areas, "venues": venues}
+
+
+def club_names(registry: Optional[Dict[str, Any]] = None, area: Optional[str] = None) -> Dict[int, str]:
+    """{id: nombre} de los venues activos (opcionalmente de un área), en el orden del archivo"""
+    reg = registry or load_registry()
+    return {
+        int(v["id"]): v["name"]
+        for v in reg["venues"]
+        if v.get("enabled", True) and (area is None or v.get("area") == area)
+    }
+
+
+def area_id(key: str, registry: Optional[Dict[str, Any]] = None) -> int:
+    """ID de área de RA para una clave del registro ('barcelona') o un ID numérico directo"""
+    if str(key).isdigit():
+        return int(key)
+    reg = registry or load_registry()
+    if key not in reg["areas"]:
+        raise ValueError(f"Área desconocida '{key}' (disponibles: {', '.join(reg['areas']) or 'ninguna'})")
+    return int(reg["areas"][key]["id"])
+
+
+def venue_key(name: str) -> str:
+    """Clave de comparación de venues: igual para el nombre del registro y el slug de ra_final"""
+    s = unicodedata.normalize("NFKD", (name or "").lower()).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", s).strip("-")
+
+
+_VENUE_INDEX: Optional[Dict[str, Any]] = None
+
+
+def canonical_venue(name: str, venue_id: Optional[int] = None) -> str:
+    """Nombre del registro para un venue (por ID o por nombre/slug); el original si no está registrado"""
+    global _VENUE_INDEX
+    if _VENUE_INDEX is None:
+        venues = load_registry()["venues"]
+        _VENUE_INDEX = {
+            "by_id": {int(v["id"]): v["name"] for v in venues},
+            "by_key": {venue_key(v["name"]): v["name"] for v in venues},
+        }
+    if venue_id is not None and int(venue_id) in _VENUE_INDEX["by_id"]:
+        return _VENUE_INDEX["by_id"][int(venue_id)]
+    return _VENUE_INDEX["by_key"].get(venue_key(name), name or "")
@@ -0,0 +1,115 @@
+# Presupuesto de arranque de los puntos de entrada: mide con `python -X importtime` lo que
+# cuesta importar cada módulo y comprueba que no arrastra dependencias pesadas (botasaurus,
+# bs4, requests...) que solo hacen falta al scrapear. Sale con código 1 si algo se pasa,
+# así que sirve como check en CI o antes de desplegar el daemon; tests/test_startup.py corre el
+# mismo check con pytest.
+#
+# Uso:
+#   python ra_startup.py                 # tabla + fallos
+#   python ra_startup.py --runs 5 --json
+import os, sys, json, subprocess, statistics, time
+from typing import Dict, Any, List
+
+# ms de import (acumulado del módulo, sin el arranque del intérprete); mediana de --runs
+IMPORT_BUDGET_MS = {
+    "ra_final": 150,
+    "ra_venues_full": 150,
+    "ra_daemon": 200,
+    "ra_archive": 60,
+    "ra_merge": 60,
+    "ra_store": 60,
+    "ra_parse": 60,
+    "ra_output": 60,
+    "ra_api": 60,
+}
+
+# Se cargan al primer uso (scraping, imágenes, parquet), nunca al importar
+HEAVY_MODULES = ("botasaurus", "bs4", "requests", "unidecode", "fake_useragent", "PIL", "pyarrow", "lxml")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Líneas de -X importtime → [{"module", "self_us", "cumulative_us", "depth"}]"""
+    out = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|", 2)
+        if len(parts) != 3:
+            continue
+        self_us, cum_us, name = parts
+        if not self_us.strip().isdigit():
+            continue  # cabecera "self [us] | cumulative | imported package"
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2  # un espacio tras "|", dos por nivel
+        out.append({"module": name.strip(), "self_us": int(self_us), "cumulative_us": int(cum_us), "depth": depth})
+    return out
+
+
+def measure(module: str) -> Dict[str, Any]:
+    """Un proceso nuevo que solo importa el módulo; devuelve tiempos y dependencias pesadas cargadas"""
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=HERE, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - t0) * 1000
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or ["?"]
+        return {"module": module, "error": tail[0]}
+    entries = parse_importtime(proc.stderr)
+    own = next((e for e in reversed(entries) if e["module"] == module and e["depth"] == 0), None)
+    # lo que importa el propio módulo: las entradas entre el arranque (site) y su línea final
+    idx = entries.index(own) if own else len(entries)
+    start = idx
+    while start > 0 and entries[start - 1]["depth"] > 0:
+        start -= 1
+    children = entries[start:idx]
+    heavy = sorted({e["module"].split(".")[0] for e in children if e["module"].split(".")[0] in HEAVY_MODULES})
+    top = sorted((e for e in children if e["depth"] == 1), key=lambda e: -e["cumulative_us"])[:5]
+    return {
+        "module": module,
+        "import_ms": round((own["cumulative_us"] if own else 0) / 1000, 1),
+        "wall_ms": round(wall_ms, 1),
+        "heavy": heavy,
+        "top": [(e["module"], round(e["cumulative_us"] / 1000, 1)) for e in top],
+    }
+
+
+def check(modules: List[str], runs: int = 3, scale: float = 1.0) -> List[Dict[str, Any]]:
+    results = []
+    for module in modules:
+        samples = [measure(module) for _ in range(max(1, runs))]
+        errors = [s for s in samples if "error" in s]
+        if errors:
+            results.append({"module": module, "ok": False, "error": errors[0]["error"]})
+            continue
+        res = min(samples, key=lambda s: abs(s["import_ms"] - statistics.median(x["import_ms"] for x in samples)))
+        budget = IMPORT_BUDGET_MS.get(module, 100) * scale
+        res["budget_ms"] = budget
+        res["ok"] = res["import_ms"] <= budget and not res["heavy"]
+        results.append(res)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Comprobar el tiempo de import de los puntos de entrada")
+    ap.add_argument("modules", nargs="*", default=list(IMPORT_BUDGET_MS))
+    ap.add_argument("--runs", type=int, default=3, help="procesos por módulo (se usa la mediana)")
+    ap.add_argument("--scale", type=float, default=1.0, help="multiplicar los presupuestos (máquinas lentas)")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    results = check(args.modules, args.runs, args.scale)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for r in results:
+            if "error" in r:
+                print(f"✗ {r['module']:<16} error al importar: {r['error']}")
+                continue
+            mark = "✓" if r["ok"] else "✗"
+            heavy = f"  pesados: {', '.join(r['heavy'])}" if r["heavy"] else ""
+            top = ", ".join(f"{m} {ms:.0f}" for m, ms in r["top"][:3])
+            print(f"{mark} {r['module']:<16} {r['import_ms']:>7.1f} ms / {r['budget_ms']:.0f} ms  "
+                  f"(proceso {r['wall_ms']:.0f} ms){heavy}  [{top}]")
+    sys.exit(0 if all(r["ok"] for r in results) else 1)
@@ -0,0 +1,286 @@
+# Event store SQLite para servir la web: un registro por evento RA (upsert por event_id),
+# índices por (venue, event_date) y event_date, y géneros en tabla aparte para filtrar.
+# Las lecturas devuelven la misma fila JSON que ra_venues_events.json. El venue se guarda con el
+# nombre de venues.json. event_sources guarda la última fila (y tickets) de cada scraper, y la fila
+# servida se vuelve a fusionar desde ahí (ra_merge.merge_stored) cada vez que uno escribe, así el
+# último en ejecutarse no sustituye al otro ni pierde su precedencia frente a una fusión anterior.
+# La tabla event_tiers guarda por evento y nivel (static / volatile) los últimos datos
+# descargados y cuándo, para que ra_venues_full no repita consultas que aún están frescas.
+#
+# Uso:
+#   python ra_store.py --venue Razzmatazz --from 2025-10-01 --to 2025-10-31
+#   python ra_store.py --genre Techno --limit 20
+import os, json, time, sqlite3
+from datetime import date, datetime
+from typing import List, Dict, Any, Optional, Iterable
+
+STORE_PATH = "output/ra_events.sqlite"
+
+STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    event_id INTEGER PRIMARY KEY,
+    venue TEXT COLLATE NOCASE,
+    venue_id INTEGER,
+    event_name TEXT,
+    url TEXT,
+    event_date TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    genres TEXT,
+    source TEXT,
+    row_json TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_venue_date ON events(venue, event_date);
+CREATE INDEX IF NOT EXISTS idx_events_date ON events(event_date);
+
+CREATE TABLE IF NOT EXISTS event_genres (
+    genre TEXT COLLATE NOCASE NOT NULL,
+    event_id INTEGER NOT NULL REFERENCES events(event_id) ON DELETE CASCADE,
+    event_date TEXT,
+    PRIMARY KEY (genre, event_date, event_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_event_genres_event ON event_genres(event_id);
+
+CREATE TABLE IF NOT EXISTS tickets (
+    event_id INTEGER NOT NULL REFERENCES events(event_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    title TEXT,
+    price REAL,
+    status TEXT,
+    is_add_on INTEGER,
+    url TEXT,
+    PRIMARY KEY (event_id, position)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS event_sources (
+    event_id INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    row_json TEXT NOT NULL,
+    tickets_json TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (event_id, source)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS event_tiers (
+    event_id INTEGER NOT NULL,
+    tier TEXT NOT NULL,
+    data_json TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (event_id, tier)
+) WITHOUT ROWID;
+"""
+
+UPSERT_EVENT = """
+INSERT INTO events (event_id, venue, venue_id, event_name, url, event_date, start_time, end_time,
+                    genres, source, row_json, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(event_id) DO UPDATE SET
+    venue = excluded.venue,
+    venue_id = COALESCE(excluded.venue_id, events.venue_id),
+    event_name = excluded.event_name,
+    url = excluded.url,
+    event_date = excluded.event_date,
+    start_time = excluded.start_time,
+    end_time = excluded.end_time,
+    genres = excluded.genres,
+    source = excluded.source,
+    row_json = excluded.row_json,
+    updated_at = excluded.updated_at
+"""
+
+
+def split_genres(genres: str) -> List[str]:
+    return [g.strip() for g in (genres or "").split(",") if g.strip()]
+
+
+class EventStore:
+    """Store SQLite de eventos con upsert por ID de RA y consultas indexadas"""
+
+    def __init__(self, path: str = STORE_PATH, readonly: bool = False):
+        self.path = path
+        if readonly:
+            self.con = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.con = sqlite3.connect(path, check_same_thread=False)
+            self.con.execute("PRAGMA journal_mode=WAL")  # la web lee mientras el scraper escribe
+            self.con.execute("PRAGMA synchronous=NORMAL")
+            self.con.executescript(STORE_SCHEMA)
+        self.con.execute("PRAGMA foreign_keys=ON")
+
+    def close(self):
+        self.con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- escritura ----------
+    def upsert(self, rows: List[Dict[str, Any]], records: List[Dict[str, Any]]) -> int:
+        """Insertar/actualizar eventos. rows y records (ra_output) van emparejados por URL.
+        El venue se normaliza con el registro; la fila de cada fuente (ra_merge.SOURCES) se guarda
+        aparte y la del evento se refusiona con la última de cada una (ra_merge.merge_stored)"""
+        from ra_output import dumps_json, event_id_from_url
+        from ra_merge import merge_stored, ticket_source, SOURCES, MERGED_SOURCE
+        from ra_registry import canonical_venue
+        records_by_url = {r["event"]["url"]: r for r in records or []}
+        now = datetime.now().isoformat(timespec="seconds")
+        n = 0
+        with self.con:
+            for row in rows:
+                rec = records_by_url.get(row.get("url"))
+                ev = rec["event"] if rec else {}
+                event_id = ev.get("event_id") or event_id_from_url(row.get("url"))
+                if event_id is None:
+                    continue
+                source = ev.get("source") or (MERGED_SOURCE if row.get("sources") else None)
+                row = dict(row, venue=canonical_venue(row.get("venue", ""), ev.get("venue_id")))
+                tickets = rec["tickets"] if rec else None  # None: no tocar los guardados
+                if source in SOURCES:
+                    by_source, tickets_by_source = self._source_rows(event_id, source)
+                    row = {**by_source.get(source, {}), **row}  # la misma fuente no borra lo que no trae
+                    if tickets is None:
+                        tickets = tickets_by_source.get(source)
+                    by_source[source], tickets_by_source[source] = row, tickets
+                    self.con.execute(
+                        "INSERT OR REPLACE INTO event_sources (event_id, source, row_json, tickets_json, updated_at) VALUES (?, ?, ?, ?, ?)",
+                        (event_id, source, dumps_json(row, indent=False).decode("utf-8"),
+                         None if tickets is None else json.dumps(tickets, ensure_ascii=False), now),
+                    )
+                    row = merge_stored(event_id, by_source)
+                    if len(by_source) > 1:
+                        source = MERGED_SOURCE
+                        best = ticket_source(tickets_by_source)
+                        tickets = tickets_by_source[best] if best else tickets
+                else:  # fila ya fusionada (ra_merge --store) o sin fuente: actualiza la guardada
+                    old = self.con.execute("SELECT row_json FROM events WHERE event_id = ?", (event_id,)).fetchone()
+                    if old:
+                        row = {**json.loads(old[0]), **row}
+                event_date = row.get("event_date", "")
+                self.con.execute(UPSERT_EVENT, (
+                    event_id, row.get("venue", ""), ev.get("venue_id"), row.get("eventName", ""),
+                    row.get("url", ""), event_date, ev.get("start_time"), ev.get("end_time"),
+                    row.get("generos", ""), source,
+                    dumps_json(row, indent=False).decode("utf-8"), now,
+                ))
+                self.con.execute("DELETE FROM event_genres WHERE event_id = ?", (event_id,))
+                self.con.executemany(
+                    "INSERT OR IGNORE INTO event_genres (genre, event_id, event_date) VALUES (?, ?, ?)",
+                    ((g, event_id, event_date) for g in split_genres(row.get("generos", ""))),
+                )
+                if tickets is not None:
+                    self.con.execute("DELETE FROM tickets WHERE event_id = ?", (event_id,))
+                    self.con.executemany(
+                        "INSERT INTO tickets (event_id, position, title, price, status, is_add_on, url) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        ((event_id, t["position"], t["title"], t["price"], t["status"], int(t["is_add_on"]), t["url"])
+                         for t in tickets),
+                    )
+                n += 1
+        return n
+
+    def _source_rows(self, event_id: int, source: str):
+        """({fuente: fila}, {fuente: tickets}) guardados del evento. Un store anterior a event_sources
+        solo tiene la fila del evento: cuenta como la de su fuente (una fusionada, como la otra
+        fuente que `source`), con los tickets guardados."""
+        from ra_merge import SOURCES
+        by_source, tickets = {}, {}
+        for src, row_json, tickets_json in self.con.execute(
+                "SELECT source, row_json, tickets_json FROM event_sources WHERE event_id = ?", (event_id,)):
+            by_source[src] = json.loads(row_json)
+            tickets[src] = None if tickets_json is None else json.loads(tickets_json)
+        if not by_source:
+            old = self.con.execute("SELECT row_json, source FROM events WHERE event_id = ?", (event_id,)).fetchone()
+            if old and old[1]:
+                src = old[1] if old[1] in SOURCES else next(s for s in SOURCES if s != source)
+                by_source[src] = json.loads(old[0])
+                tickets[src] = [
+                    {"position": p, "title": t, "price": pr, "status": st, "is_add_on": bool(a), "url": u}
+                    for p, t, pr, st, a, u in self.con.execute(
+                        "SELECT position, title, price, status, is_add_on, url FROM tickets WHERE event_id = ? ORDER BY position",
+                        (event_id,))
+                ]
+        return by_source, tickets
+
+    def put_tier(self, event_id: int, tier: str, data: Dict[str, Any], fetched_at: Optional[float] = None):
+        """Guardar los datos de un nivel de campos de un evento (sin FK: pueden llegar antes que la fila)"""
+        with self.con:
+            self.con.execute(
+                "INSERT OR REPLACE INTO event_tiers (event_id, tier, data_json, fetched_at) VALUES (?, ?, ?, ?)",
+                (int(event_id), tier, json.dumps(data, ensure_ascii=False), fetched_at or time.time()),
+            )
+
+    # ---------- lectura ----------
+    def upcoming_events(self, venue: Optional[str] = None, genre: Optional[str] = None,
+                        date_from: Optional[str] = None, date_to: Optional[str] = None,
+                        limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Eventos (fila JSON original) por venue / género / rango de fechas, ordenados por fecha.
+        date_from por defecto es hoy; fechas en formato YYYY-MM-DD."""
+        date_from = date_from or date.today().isoformat()
+        if genre:
+            sql = "SELECT e.row_json FROM event_genres g JOIN events e ON e.event_id = g.event_id WHERE g.genre = ? AND g.event_date >= ?"
+            params: List[Any] = [genre, date_from]
+            if date_to:
+                sql += " AND g.event_date <= ?"
+                params.append(date_to)
+            if venue:
+                sql += " AND e.venue = ?"
+                params.append(venue)
+            sql += " ORDER BY g.event_date, e.event_id"
+        else:
+            sql = "SELECT row_json FROM events WHERE event_date >= ?"
+            params = [date_from]
+            if date_to:
+                sql += " AND event_date <= ?"
+                params.append(date_to)
+            if venue:
+                sql += " AND venue = ?"
+                params.append(venue)
+            sql += " ORDER BY event_date, event_id"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [json.loads(r[0]) for r in self.con.execute(sql, params)]
+
+    def get_event(self, event_id: int) -> Optional[Dict[str, Any]]:
+        r = self.con.execute("SELECT row_json FROM events WHERE event_id = ?", (int(event_id),)).fetchone()
+        return json.loads(r[0]) if r else None
+
+    def get_tier(self, event_id: int, tier: str, max_age_s: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Datos guardados de un nivel si existen y tienen menos de max_age_s (None = sin caducidad)"""
+        r = self.con.execute("SELECT data_json, fetched_at FROM event_tiers WHERE event_id = ? AND tier = ?",
+                             (int(event_id), tier)).fetchone()
+        if not r or (max_age_s is not None and time.time() - r[1] > max_age_s):
+            return None
+        return json.loads(r[0])
+
+    def venues(self) -> List[str]:
+        return [r[0] for r in self.con.execute("SELECT DISTINCT venue FROM events ORDER BY venue")]
+
+
+def update_store(rows: List[Dict[str, Any]], records: List[Dict[str, Any]], path: str = STORE_PATH) -> int:
+    """Upsert de una tanda de filas en el store (usado al final de cada scraper)"""
+    with EventStore(path) as store:
+        return store.upsert(rows, records)
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Consultar el event store SQLite")
+    ap.add_argument("--store", default=STORE_PATH)
+    ap.add_argument("--venue", default=None)
+    ap.add_argument("--genre", default=None)
+    ap.add_argument("--from", dest="date_from", default=None, help="YYYY-MM-DD (por defecto hoy)")
+    ap.add_argument("--to", dest="date_to", default=None, help="YYYY-MM-DD")
+    ap.add_argument("--limit", type=int, default=None)
+    args = ap.parse_args()
+
+    with EventStore(args.store, readonly=True) as store:
+        t0 = time.perf_counter()
+        rows = store.upcoming_events(args.venue, args.genre, args.date_from, args.date_to, args.limit)
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+    print(json.dumps(rows, ensure_ascii=False, indent=2))
+    print(f"[STORE] {len(rows)} eventos en {elapsed_ms:.2f} ms")
@@ -1,30 +1,97 @@
 # pip install requests beautifulsoup4 fake-useragent
-import requests, re, json, time, random, math
+import re, json, time, random, math, textwrap
 from datetime import datetime
 from typing import List, Dict, Any
-from bs4 import BeautifulSoup
+from ra_archive import RawArchive, new_run_id
+from ra_store import EventStore, update_store, STORE_PATH
+from ra_http import RetryClient, RetryPolicy, check_response
+from ra_deadline import (Deadline, DeadlineExceeded, soonest_first, venues_first, write_pending,
+                         load_pending, print_pending)
+from ra_profile import PROFILER, PROFILE_DIR
+from ra_output import make_record, write_outputs, parse_formats
+from ra_registry import load_registry, club_names, area_id
+from ra_images import cache_row_images
+from ra_merge import write_skip_list, SKIP_LIST_PATH
 
 BASE = "https://ra.co"
 GQL  = f"{BASE}/graphql"
 
 # =================== Venue Configuration ===================
-# Diccionario de venues (id: nombre)
-CLUB_NAMES = {
-    911: 'Razzmatazz',
-    150612: 'M7 CLUB',
-    195409: 'Les Enfants',
-    3818: 'Macarena Club',
-    3760: 'La Terrazza',
-    60710: 'Input',
-    2072: 'Nitsa',
-    2253: 'Moog',
-    216950: 'Noxe'
-}
+# Venues (id: nombre) desde el registro venues.json (ver ra_registry.py)
+REGISTRY = load_registry()
+CLUB_NAMES = club_names(REGISTRY)
 
 # Diccionario invertido para acceso por nombre (nombre: id)
 VENUE_IDS = {name: str(vid) for vid, name in CLUB_NAMES.items()}
 
+# Listado de eventos: "venue" = una consulta GET_VENUE_MOREON por venue;
+# "area" = eventListings paginado de toda el área, repartido por venue.id (pocas consultas grandes)
+LISTING_MODE = "venue"
+LISTING_AREA = "barcelona"
+AREA_PAGE_SIZE = 100
+AREA_MAX_PAGES = 50  # tope de seguridad por run
+
+# Archivo de respuestas crudas para regenerar la salida sin red: python ra_archive.py --replay venues
+ENABLE_ARCHIVE = True
+ARCHIVE_DIR = "archive"
+ARCHIVE = None  # se abre en __main__
+
+# Event store SQLite (upsert por ID de RA) que consulta la web: ver ra_store.py
+ENABLE_STORE = True
+
+# Niveles de campos con refresco independiente (tabla event_tiers del store, ver ra_store.py):
+#   static   = GET_EVENT_GENRES (géneros, horario, edad mínima, coste): casi nunca cambian
+#   volatile = widget de tickets (releases, precio y estado): cambian constantemente
+# Segundos de validez de cada nivel: 0 = descargar en cada run (y no se guarda: nunca se leería),
+# None = no caduca nunca. Con los valores por defecto un run normal hace una sola petición (widget)
+# por evento y solo escribe en event_tiers el nivel estático.
+FIELD_TIERS = {
+    "static": ("genres", "startTime", "endTime", "minimumAge", "cost"),
+    "volatile": ("tickets",),
+}
+TIER_REFRESH_S = {"static": 7 * 24 * 3600, "volatile": 0}
+FORCE_REFRESH = set()  # niveles que este run descarga aunque estén frescos (--refresh)
+ENABLE_TIER_CACHE = True
+
+# IDs que esta salida ya cubre por completo → ra_final no los abre en el navegador (ver ra_merge.py)
+WRITE_SKIP_LIST = True
+
+# Caché local de flyers con miniaturas WebP (ver ra_images.py); también con --images
+ENABLE_IMAGES = False
+
+# Deadline del run en segundos (None = sin límite; también --deadline). Al alcanzarlo se escriben
+# las filas completas y los eventos sin procesar van a PENDING_PATH, por los que empieza el siguiente run
+RUN_DEADLINE_S = None
+PENDING_PATH = "output/ra_venues_pending.json"
+PENDING_MAX_AGE_S = 24 * 3600
+DEADLINE = Deadline()  # el de scrape_venues en curso; recorta los timeouts de las peticiones
+
+def request_timeout(seconds, deadline=None):
+    """Timeout de una petición recortado al deadline recibido (ra_api) o al de scrape_venues"""
+    return (deadline or DEADLINE).timeout(seconds)
+
+# Presupuesto de bytes en la red por run (MB, None = sin límite; también --wire-budget-mb). Al pasarlo
+# no se hacen más peticiones y el run termina como con el deadline. El consumo por endpoint sale en el
+# resumen de ra_http y en el estado del daemon.
+WIRE_BUDGET_MB = None
+
+# Reintentos: backoff exponencial con jitter y circuit breaker por endpoint (ra_http)
+RETRY_MAX_ATTEMPTS = 4
+RETRY_BASE_DELAY = 1.0   # s
+RETRY_MAX_DELAY = 20.0   # s
+BREAKER_FAILURES = 5     # fallos seguidos que abren el circuito de un endpoint
+BREAKER_COOLDOWN = 60.0  # s antes de volver a probar
+
 # =================== Helpers ===================
+def archive_put(kind, key, payload, **meta):
+    """Guardar el payload crudo en el archivo si está activado (nunca rompe el scraping)"""
+    if ARCHIVE is None:
+        return
+    try:
+        ARCHIVE.put(kind, key, payload, **meta)
+    except Exception as e:
+        print(f"[WARN] Could not archive {key}: {e}")
+
 def ua():
     try:
         from fake_useragent import UserAgent
@@ -33,6 +100,7 @@ def ua():
         return "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0 Safari/537.36"
 
 def make_session():
+    import requests  # diferido: replay/merge importan este módulo sin tocar la red
     s = requests.Session()
     s.headers.update({"User-Agent": ua(), "Accept": "application/json, text/plain, */*"})
     return s
@@ -79,68 +147,149 @@ def pick_flyerfront_from_images(images):
     return ""
 
 # =================== GraphQL ===================
-GQL_VENUE_EVENTS = """
-query GET_VENUE_MOREON($id: ID!, $excludeEventId: ID = 0) {
-  venue(id: $id) {
-    id
-    name
-    logoUrl
-    blurb
-    isFollowing
-    contentUrl
-    events(limit: 200, type: LATEST, excludeIds: [$excludeEventId]) {
-      id
-      title
-      interestedCount
-      date
-      contentUrl
-      flyerFront
-      queueItEnabled
-      newEventForm
-      images {
-        id
-        filename
-        alt
-        type
-        crop
-        __typename
-      }
-      venue {
-        id
-        name
-        contentUrl
-        live
-        __typename
-      }
-      __typename
-    }
-    __typename
-  }
+# Perfiles de campos de las consultas: "minimal" pide solo lo que leen build_row/build_record,
+# get_venue_name_from_event y bucket_by_venue; "full" es la selección original de la web de RA
+# (logo, blurb, queueIt, crops de imágenes...), por si hace falta depurar o archivar todo.
+QUERY_PROFILE = "minimal"
+
+EVENT_FIELDS = {
+    "minimal": """
+id
+title
+interestedCount
+date
+contentUrl
+flyerFront
+images {
+  filename
+  type
+}
+venue {
+  id
+  name
 }
+""",
+    "full": """
+id
+title
+interestedCount
+date
+contentUrl
+flyerFront
+queueItEnabled
+newEventForm
+images {
+  id
+  filename
+  alt
+  type
+  crop
+  __typename
+}
+venue {
+  id
+  name
+  contentUrl
+  live
+  __typename
+}
+__typename
+""",
+}
+
+VENUE_FIELDS = {
+    "minimal": """
+id
+name
+""",
+    "full": """
+id
+name
+logoUrl
+blurb
+isFollowing
+contentUrl
+__typename
+""",
+}
+
+EVENT_DETAIL_FIELDS = {
+    "minimal": """
+genres {
+  name
+}
+startTime
+endTime
+minimumAge
+cost
+""",
+    "full": """
+id
+title
+genres {
+  name
+}
+venue {
+  id
+  name
+}
+startTime
+endTime
+minimumAge
+cost
+""",
+}
+
+def _fields(profiles, profile, depth):
+    return textwrap.indent(profiles[profile or QUERY_PROFILE].strip(), "  " * depth)
+
+def gql_venue_events_query(profile=None):
+    return f"""
+query GET_VENUE_MOREON($id: ID!, $excludeEventId: ID = 0) {{
+  venue(id: $id) {{
+{_fields(VENUE_FIELDS, profile, 2)}
+    events(limit: 200, type: LATEST, excludeIds: [$excludeEventId]) {{
+{_fields(EVENT_FIELDS, profile, 3)}
+    }}
+  }}
+}}
 """.strip()
 
 # GraphQL query para obtener géneros de un evento específico
-GQL_EVENT_GENRES = """
-query GET_EVENT_GENRES($id: ID!) {
-  event(id: $id) {
-    id
-    title
-    genres {
-      name
-    }
-    venue {
-      id
-      name
-    }
-    startTime
-    endTime
-    minimumAge
-    cost
-  }
-}
+def gql_event_genres_query(profile=None):
+    return f"""
+query GET_EVENT_GENRES($id: ID!) {{
+  event(id: $id) {{
+{_fields(EVENT_DETAIL_FIELDS, profile, 2)}
+  }}
+}}
 """.strip()
 
-def gql_get_event_genres(session, event_id):
+def event_genres_key(event_id):
+    """Clave del archivo para la consulta GET_EVENT_GENRES de un evento"""
+    return f"{GQL}#GET_EVENT_GENRES:{event_id}"
+
+def empty_event_data():
+    return {"genres": "", "startTime": "", "endTime": "", "minimumAge": "", "cost": ""}
+
+def parse_event_genres(response_data):
+    """Extraer géneros, tiempos, edad y coste de la respuesta JSON de GET_EVENT_GENRES"""
+    event_data = (response_data or {}).get("data", {}).get("event", {})
+    if not event_data:
+        return empty_event_data()
+    genres = event_data.get("genres", [])
+    genre_names = [g.get("name", "") for g in genres if g.get("name")]
+    genres_str = ", ".join(genre_names) if genre_names else ""
+
+    return {
+        "genres": genres_str,
+        "startTime": event_data.get("startTime", ""),
+        "endTime": event_data.get("endTime", ""),
+        "minimumAge": event_data.get("minimumAge", ""),
+        "cost": event_data.get("cost", "")
+    }
+
+def gql_get_event_genres(session, event_id, deadline=None):
     """Obtener géneros y tiempos de un evento específico usando GraphQL"""
     headers = {
         "User-Agent": session.headers.get("User-Agent", ua()),
@@ -152,63 +301,29 @@ def gql_get_event_genres(session, event_id):
     payload = {
         "operationName": "GET_EVENT_GENRES",
         "variables": {"id": str(event_id)},
-        "query": GQL_EVENT_GENRES,
+        "query": gql_event_genres_query(),
     }
     
-    try:
-        r = session.post(GQL, headers=headers, json=payload, timeout=15)
-        if r.status_code == 200:
-            response_data = r.json()
-            event_data = response_data.get("data", {}).get("event", {})
-            if event_data:
-                genres = event_data.get("genres", [])
-                genre_names = [g.get("name", "") for g in genres if g.get("name")]
-                genres_str = ", ".join(genre_names) if genre_names else ""
-                
-                # Extraer startTime y endTime
-                start_time = event_data.get("startTime", "")
-                end_time = event_data.get("endTime", "")
-                
-                # Extraer minimumAge
-                minimum_age = event_data.get("minimumAge", "")
-                
-                # Extraer cost
-                cost = event_data.get("cost", "")
-                
-                return {
-                    "genres": genres_str,
-                    "startTime": start_time,
-                    "endTime": end_time,
-                    "minimumAge": minimum_age,
-                    "cost": cost
-                }
-        return {"genres": "", "startTime": "", "endTime": "", "minimumAge": "", "cost": ""}
-    except Exception as e:
-        print(f"[ERROR] GraphQL genres failed for {event_id}: {e}")
-        return {"genres": "", "startTime": "", "endTime": "", "minimumAge": "", "cost": ""}
+    # Los errores transitorios (red, 429/5xx) se propagan para que los reintente RetryClient
+    r = session.post(GQL, headers=headers, json=payload, timeout=request_timeout(15, deadline))
+    check_response(r)
+    if r.status_code == 200:
+        archive_put("gql_event_genres", event_genres_key(event_id), r.content, event_id=event_id)
+        with PROFILER.stage("parse", event=event_id):
+            return parse_event_genres(r.json())
+    return empty_event_data()
 
-def gql_get_events(session, venue_id, date_from=None, date_to=None, count=200):
-    headers = {
-        "User-Agent": session.headers.get("User-Agent", ua()),
-        "Accept": "application/json, text/plain, */*",
-        "Content-Type": "application/json",
-        "Origin": BASE,
-        "Referer": BASE + "/",
-    }
-    payload = {
-        "operationName": "GET_VENUE_MOREON",
-        "variables": {"id": str(venue_id), "excludeEventId": "0"},
-        "query": GQL_VENUE_EVENTS,
-    }
-    r = session.post(GQL, headers=headers, json=payload, timeout=25)
-    r.raise_for_status()
-    response_data = r.json()
-    
-    # Extraer eventos de la respuesta
-    venue_data = response_data.get("data", {}).get("venue", {})
-    events = venue_data.get("events", [])
+def venue_events_key(venue_id):
+    """Clave del archivo para la consulta GET_VENUE_MOREON de un venue"""
+    return f"{GQL}#GET_VENUE_MOREON:{venue_id}"
+
+def parse_venue_events(response_data, venue_id=None, date_from=None, date_to=None):
+    """Extraer (y filtrar por fechas) los eventos de la respuesta JSON de GET_VENUE_MOREON"""
+    venue_data = (response_data or {}).get("data", {}).get("venue", {}) or {}
+    events = venue_data.get("events", []) or []
     
-    print(f"[DEBUG] Total events found for venue {venue_id}: {len(events)}")
+    if venue_id is not None:
+        print(f"[DEBUG] Total events found for venue {venue_id}: {len(events)}")
     
     # Filtrar eventos por fecha si es necesario
     if date_from and date_to:
@@ -230,14 +345,132 @@ def gql_get_events(session, venue_id, date_from=None, date_to=None, count=200):
     # Si no hay filtro de fechas, devolver todos los eventos
     return events
 
+# Listado por área: todas las fechas de un área en páginas de AREA_PAGE_SIZE
+def gql_area_events_query(profile=None):
+    return f"""
+query GET_EVENT_LISTINGS($filters: FilterInputDtoInput, $filterOptions: FilterOptionsInputDtoInput, $page: Int, $pageSize: Int) {{
+  eventListings(filters: $filters, filterOptions: $filterOptions, pageSize: $pageSize, page: $page) {{
+    data {{
+      id
+      listingDate
+      event {{
+{_fields(EVENT_FIELDS, profile, 4)}
+      }}
+    }}
+    totalResults
+  }}
+}}
+""".strip()
+
+def area_events_key(area, page, date_from=None, date_to=None):
+    """Clave del archivo para una página de GET_EVENT_LISTINGS de un área"""
+    return f"{GQL}#GET_EVENT_LISTINGS:{area}:{date_from or ''}:{date_to or ''}:{page}"
+
+def parse_area_events(response_data):
+    """(eventos, totalResults) de una página de GET_EVENT_LISTINGS; total None si no viene"""
+    listings = ((response_data or {}).get("data", {}) or {}).get("eventListings") or {}
+    events = [item["event"] for item in listings.get("data") or [] if item.get("event")]
+    total = listings.get("totalResults")
+    return events, int(total) if total is not None else None
+
+def bucket_by_venue(events):
+    """{venue_id: [eventos]} sin repetir eventos (un evento de varios días sale en cada listingDate)"""
+    buckets, seen = {}, set()
+    for ev in events:
+        eid = ev.get("id")
+        vid = (ev.get("venue") or {}).get("id")
+        if eid in seen or not vid:
+            continue
+        seen.add(eid)
+        buckets.setdefault(int(vid), []).append(ev)
+    return buckets
+
+def gql_get_area_events(session, area, date_from=None, date_to=None, page=1, page_size=AREA_PAGE_SIZE, deadline=None):
+    headers = {
+        "User-Agent": session.headers.get("User-Agent", ua()),
+        "Accept": "application/json, text/plain, */*",
+        "Content-Type": "application/json",
+        "Origin": BASE,
+        "Referer": f"{BASE}/events",
+    }
+    # Sin DATE_FROM se listan los próximos eventos (desde hoy), como hace GET_VENUE_MOREON
+    listing_date = {"gte": f"{date_from or datetime.now().strftime('%Y-%m-%d')}T00:00:00.000Z"}
+    if date_to:
+        listing_date["lte"] = f"{date_to}T23:59:59.999Z"
+    payload = {
+        "operationName": "GET_EVENT_LISTINGS",
+        "variables": {
+            "filters": {"areas": {"eq": int(area)}, "listingDate": listing_date},
+            "filterOptions": {"genre": True},
+            "pageSize": page_size,
+            "page": page,
+        },
+        "query": gql_area_events_query(),
+    }
+    r = session.post(GQL, headers=headers, json=payload, timeout=request_timeout(30, deadline))
+    check_response(r)
+    r.raise_for_status()
+    archive_put("gql_area_events", area_events_key(area, page, date_from, date_to), r.content,
+                area_id=area, page=page, date_from=date_from, date_to=date_to)
+    with PROFILER.stage("parse", venue=f"area:{area}"):
+        return parse_area_events(r.json())
+
+def list_area_events(session, http, area, date_from=None, date_to=None, page_size=AREA_PAGE_SIZE):
+    """Paginar el listado del área y repartir los eventos por venue.id"""
+    events, total, page = [], None, 1
+    while page <= AREA_MAX_PAGES:
+        with PROFILER.stage("fetch", venue=f"area:{area}"):
+            batch, total = http.call("area_events", gql_get_area_events, session, area, date_from, date_to, page, page_size)
+        events.extend(batch)
+        print(f"[AREA] Página {page}: {len(batch)} listados ({len(events)}/{total if total is not None else '?'})")
+        # sin totalResults se sigue mientras las páginas vengan llenas
+        if not batch or (len(events) >= total if total is not None else len(batch) < page_size):
+            break
+        page += 1
+        time.sleep(random.uniform(0.3, 0.7))
+    buckets = bucket_by_venue(events)
+    print(f"[AREA] {sum(len(v) for v in buckets.values())} eventos en {len(buckets)} venues con {page} consultas")
+    return buckets
+
+def gql_get_events(session, venue_id, date_from=None, date_to=None, count=200, deadline=None):
+    headers = {
+        "User-Agent": session.headers.get("User-Agent", ua()),
+        "Accept": "application/json, text/plain, */*",
+        "Content-Type": "application/json",
+        "Origin": BASE,
+        "Referer": BASE + "/",
+    }
+    payload = {
+        "operationName": "GET_VENUE_MOREON",
+        "variables": {"id": str(venue_id), "excludeEventId": "0"},
+        "query": gql_venue_events_query(),
+    }
+    r = session.post(GQL, headers=headers, json=payload, timeout=request_timeout(25, deadline))
+    check_response(r)
+    r.raise_for_status()
+    archive_put("gql_venue_events", venue_events_key(venue_id), r.content, venue_id=venue_id)
+    with PROFILER.stage("parse", venue=venue_id):
+        return parse_venue_events(r.json(), venue_id, date_from, date_to)
+
 
 # =================== Widget (Tickets) ===================
-def get_ticket_prices(session, event_id):
-    url = f"{BASE}/widget/event/{event_id}/embedtickets?backUrl=/events/{event_id}"
-    r = session.get(url, headers={"User-Agent": ua()}, timeout=20)
+def widget_url(event_id):
+    return f"{BASE}/widget/event/{event_id}/embedtickets?backUrl=/events/{event_id}"
+
+def get_ticket_prices(session, event_id, deadline=None):
+    url = widget_url(event_id)
+    r = session.get(url, headers={"User-Agent": ua()}, timeout=request_timeout(20, deadline))
+    check_response(r)
     if r.status_code != 200:
         return []
-    soup = BeautifulSoup(r.text, "html.parser")
+    archive_put("widget_html", url, r.content, event_id=event_id)
+    with PROFILER.stage("parse", event=event_id):
+        return parse_ticket_prices(r.text)
+
+def parse_ticket_prices(html):
+    """Extraer los tickets (título, precio, estado) del HTML del widget embedtickets"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
     if soup.select_one("#ticket-sales-ended, #no-tickets-available"):
         return []
     out = []
@@ -322,8 +555,8 @@ def get_venue_name_from_event(event, venue_name_mapping):
         if dict_name.lower() in api_venue_name or api_venue_name in dict_name.lower():
             return dict_name
     
-    # Último fallback: usar el nombre de la API
-    return api_venue_name
+    # Último fallback: usar el nombre de la API (venues fuera del registro en modo área)
+    return venue_info.get("name", "")
 
 def build_row(event, tickets, venue_name_mapping, event_time_data=None):
     event_url = event.get("contentUrl") or f"/events/{event.get('id')}"
@@ -392,90 +625,273 @@ def build_row(event, tickets, venue_name_mapping, event_time_data=None):
 
     return row
 
-# =================== Main ===================
-if __name__ == "__main__":
-    # Opción 1: Obtener TODOS los eventos (sin filtro de fechas)
-    DATE_FROM = None
-    DATE_TO = None
-    # Opción 2: Filtrar por fechas específicas (descomenta las siguientes líneas)
-    # DATE_FROM = "2025-10-09"
-    # DATE_TO = "2025-10-12"
-    COUNT = 200
+def build_record(event, tickets, row, event_time_data=None):
+    """Registro normalizado (evento + todos los tickets, sin tope de 6) para ra_output"""
+    tickets_sorted = sorted(tickets, key=lambda t: (t.get("priceRetail") is None, t.get("priceRetail") or math.inf))
+    data = event_time_data or {}
+    return make_record({
+        "event_id": event.get("id"),
+        "source": "ra_venues_full",
+        "venue": row["venue"],
+        "venue_id": (event.get("venue") or {}).get("id"),
+        "event_name": row["eventName"],
+        "url": row["url"],
+        "event_date": row["event_date"],
+        "start_time": data.get("startTime") or event.get("date", ""),
+        "end_time": data.get("endTime", ""),
+        "image_url": row["imageUrl"],
+        "genres": row["generos"],
+        "interested_count": row["interestedCount"],
+        "minimum_age": row["minimumAge"],
+        "cost": row["cost"],
+        "current_release": row["currentRelease"],
+    }, ({"title": t.get("title"), "price": t.get("priceRetail"), "status": t.get("validType")} for t in tickets_sorted))
 
-    s = make_session()
+# =================== Niveles de campos ===================
+def tier_cached(tiers, eid, tier, stats):
+    """Datos frescos del nivel para el evento desde el store, o None si hay que descargarlos"""
+    max_age = TIER_REFRESH_S.get(tier, 0)
+    if tiers is None or max_age == 0 or tier in FORCE_REFRESH:
+        return None
+    try:
+        data = tiers.get_tier(eid, tier, max_age)
+    except Exception as e:
+        print(f"[TIERS] Error leyendo {tier} de {eid}: {e}")
+        return None
+    if data is not None:
+        stats[f"{tier}_cached"] = stats.get(f"{tier}_cached", 0) + 1
+    return data
+
+def tier_store(tiers, eid, tier, data, stats):
+    """Guardar lo descargado de un nivel (nunca rompe el scraping)"""
+    stats[f"{tier}_fetched"] = stats.get(f"{tier}_fetched", 0) + 1
+    if tiers is None or TIER_REFRESH_S.get(tier, 0) == 0:
+        return
+    try:
+        tiers.put_tier(eid, tier, data)
+    except Exception as e:
+        print(f"[TIERS] Error guardando {tier} de {eid}: {e}")
+
+def print_tier_summary(stats):
+    parts = [f"{t}: {stats.get(f'{t}_cached', 0)} en caché, {stats.get(f'{t}_fetched', 0)} descargados"
+             for t in FIELD_TIERS]
+    print(f"[TIERS] {' · '.join(parts)}")
+
+def make_retry_client(deadline=None, budget_mb=None):
+    budget_mb = budget_mb if budget_mb is not None else WIRE_BUDGET_MB
+    return RetryClient(RetryPolicy(RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY),
+                       BREAKER_FAILURES, BREAKER_COOLDOWN, deadline=deadline,
+                       budget_bytes=int(budget_mb * 1e6) if budget_mb else None)
+
+def process_event(session, ev, http, memo, tiers=None, tier_stats=None, deadline=None):
+    """Fila + registro de un evento. Cada etapa (tickets, detalles) se reintenta por separado y
+    su resultado queda memoizado en memo[eid], así un fallo no repite lo que ya se descargó.
+    Con tiers (EventStore) cada nivel de FIELD_TIERS se lee del store mientras siga fresco.
+    deadline (ra_deadline.Deadline) recorta los timeouts en lugar del DEADLINE de scrape_venues.
+    Devuelve (row, record) o None si no se pudieron obtener los tickets."""
+    eid = ev["id"]
+    venue = (ev.get("venue") or {}).get("name")
+    parts = memo.setdefault(eid, {})
+    tier_stats = {} if tier_stats is None else tier_stats
+
+    if "tickets" not in parts:
+        cached = tier_cached(tiers, eid, "volatile", tier_stats)
+        if cached is not None:
+            parts["tickets"] = cached["tickets"]
+        else:
+            try:
+                with PROFILER.stage("fetch", venue=venue, event=eid):
+                    parts["tickets"] = http.call("widget", get_ticket_prices, session, eid, deadline=deadline)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                print(f"[ERROR] Tickets failed for {eid}: {e}")
+                return None
+            tier_store(tiers, eid, "volatile", {"tickets": parts["tickets"]}, tier_stats)
+    prices = parts["tickets"]
+
+    # Géneros y tiempos (nivel static): del store si están frescos, si no GraphQL
+    if "details" not in parts:
+        parts["details"] = tier_cached(tiers, eid, "static", tier_stats)
+    if parts["details"] is None:
+        try:
+            with PROFILER.stage("fetch", venue=venue, event=eid):
+                parts["details"] = http.call("event_genres", gql_get_event_genres, session, eid, deadline=deadline)
+            if any(parts["details"].values()):  # una respuesta vacía no se cachea: se reintenta el próximo run
+                tier_store(tiers, eid, "static", parts["details"], tier_stats)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            # Sin detalles la fila sigue siendo útil: se guarda con géneros/tiempos vacíos
+            print(f"[ERROR] GraphQL genres failed for {eid}: {e}")
+            print(f"[RECOVERED] {eid} → usando datos vacíos para géneros/tiempos")
+            parts["details"] = empty_event_data()
+    event_data = parts["details"]
+
+    ev["generos"] = event_data.get("genres", "")  # Puede ser string vacío si no hay géneros
+    if event_data.get("genres"):
+        print(f"[GENRES] {eid} → '{event_data.get('genres')}'")
+    else:
+        print(f"[GENRES] {eid} → No encontrados")
+
+    # Mostrar información de tiempo si está disponible
+    if event_data.get("startTime") or event_data.get("endTime"):
+        print(f"[TIME] {eid} → {event_data.get('startTime', '')} → {event_data.get('endTime', '')}")
+
+    with PROFILER.stage("build", venue=venue, event=eid):
+        row = build_row(ev, prices, VENUE_IDS, event_data)
+        record = build_record(ev, prices, row, event_data)
+    age_info = f"Edad: {row['minimumAge']}" if row['minimumAge'] else "Edad: No especificada"
+    print(f"[OK] {eid} → '{row['eventName']}' ({len(prices)} tickets) [Géneros: {row['generos'] or 'No encontrados'}] [Time: {row['time'] or 'No time'}] [{age_info}]")
+    return row, record
+
+# =================== Run ===================
+# Opción 1: Obtener TODOS los eventos (sin filtro de fechas)
+DATE_FROM = None
+DATE_TO = None
+# Opción 2: Filtrar por fechas específicas (descomenta las siguientes líneas)
+# DATE_FROM = "2025-10-09"
+# DATE_TO = "2025-10-12"
+COUNT = 200
+
+OUT_PATH = "ra_venues_events.json"
+
+def scrape_venues(s, http, listing=LISTING_MODE, area=LISTING_AREA, all_venues=False, deadline_s=None):
+    """Listar los venues y procesar sus eventos con la sesión s. Devuelve (filas, registros).
+    Con deadline_s (por defecto RUN_DEADLINE_S) los eventos van de más a menos próximos y al
+    llegar el límite se devuelve lo completado y el resto queda en PENDING_PATH."""
+    global DEADLINE
+    DEADLINE = Deadline(deadline_s if deadline_s is not None else RUN_DEADLINE_S)
+    http.deadline = DEADLINE
+    http.attach(s)  # bytes por endpoint (y presupuesto) + Accept-Encoding con todo lo que sabemos descomprimir
+    event_memo = {}  # eid → {"tickets": [...], "details": {...}} ya descargados en este run
+    tier_stats = {}
+    tiers = EventStore(STORE_PATH) if ENABLE_TIER_CACHE else None
+    try:
+        return _scrape_venues(s, http, listing, area, all_venues, event_memo, tiers, tier_stats)
+    finally:
+        if tiers is not None:
+            tiers.close()
+        print_tier_summary(tier_stats)
+
+def list_venue_targets(s, http, listing, area, all_venues, pending_venues=()):
+    """[(venue_id, nombre, eventos)] en el orden del registro + venues que no se llegaron a listar"""
+    targets = dict(CLUB_NAMES)
+    area_buckets = None
+    if listing == "area":
+        aid = area_id(area, REGISTRY)
+        print(f"[START] Listando el área {area} (ID: {aid}) en páginas de {AREA_PAGE_SIZE}...")
+        try:
+            area_buckets = list_area_events(s, http, aid, DATE_FROM, DATE_TO)
+        except DeadlineExceeded as e:
+            print(f"[DEADLINE] {e}: listado del área incompleto")
+            return [], [{"id": vid, "name": name} for vid, name in targets.items()]
+        except Exception as e:
+            # breaker abierto, HTTP o JSON inválido: un listado parcial perdería eventos sin avisar,
+            # así que se listan los venues del registro uno a uno como en el modo "venue"
+            print(f"[ERROR] Listado del área {area} fallido ({e}): se listan los venues del registro uno a uno")
+            area_buckets = None
+        if area_buckets is not None and all_venues:
+            for vid, evs in area_buckets.items():
+                targets.setdefault(vid, (evs[0].get("venue") or {}).get("name") or f"Venue {vid}")
 
     if DATE_FROM and DATE_TO:
-        print(f"[START] Extrayendo eventos de {len(CLUB_NAMES)} venues ({DATE_FROM}→{DATE_TO})...")
+        print(f"[START] Extrayendo eventos de {len(targets)} venues ({DATE_FROM}→{DATE_TO})...")
     else:
-        print(f"[START] Extrayendo TODOS los eventos de {len(CLUB_NAMES)} venues...")
-    print(f"[INFO] Venues: {', '.join(CLUB_NAMES.values())}\n")
+        print(f"[START] Extrayendo TODOS los eventos de {len(targets)} venues...")
+    print(f"[INFO] Venues: {', '.join(targets.values())}\n")
 
-    all_rows = []
-    
-    for venue_id, venue_name in CLUB_NAMES.items():
-        print(f"[PROCESSING] Venue: {venue_name} (ID: {venue_id})")
-        
+    listed, unlisted = [], []
+    for venue_id in venues_first(targets, pending_venues):
+        venue_name = targets[venue_id]
+        if DEADLINE.expired() or http.wire.over_budget():
+            unlisted.append({"id": venue_id, "name": venue_name})
+            continue
         try:
-            # Intentar obtener eventos via API GraphQL
-            events = gql_get_events(s, venue_id, DATE_FROM, DATE_TO, COUNT)
-            
-            if not events:
-                print(f"[WARNING] No events found for {venue_name} via API")
-                continue
-                
-            print(f"[INFO] Found {len(events)} events for {venue_name}")
-            
-            for ev in events:
-                eid = ev["id"]
-                try:
-                    prices = get_ticket_prices(s, eid)
-                    
-                    # Obtener géneros y tiempos usando GraphQL
-                    event_data = gql_get_event_genres(s, eid)
-                    ev["generos"] = event_data.get("genres", "")  # Puede ser string vacío si no hay géneros
-                    
-                    if event_data.get("genres"):
-                        print(f"[GENRES] {eid} → '{event_data.get('genres')}'")
-                    else:
-                        print(f"[GENRES] {eid} → No encontrados")
-                    
-                    # Mostrar información de tiempo si está disponible
-                    if event_data.get("startTime") or event_data.get("endTime"):
-                        start_time = event_data.get("startTime", "")
-                        end_time = event_data.get("endTime", "")
-                        print(f"[TIME] {eid} → {start_time} → {end_time}")
-                    
-                    row = build_row(ev, prices, VENUE_IDS, event_data)
-                    all_rows.append(row)
-                    age_info = f"Edad: {row['minimumAge']}" if row['minimumAge'] else "Edad: No especificada"
-                    print(f"[OK] {eid} → '{row['eventName']}' ({len(prices)} tickets) [Géneros: {row['generos'] or 'No encontrados'}] [Time: {row['time'] or 'No time'}] [{age_info}]")
-                except Exception as e:
-                    print(f"[ERROR] Failed to process event {eid}: {e}")
-                    # Si falla el procesamiento, intentamos con datos vacíos
-                    try:
-                        ev["generos"] = ""
-                        prices = get_ticket_prices(s, eid)
-                        row = build_row(ev, prices, VENUE_IDS, {"genres": "", "startTime": "", "endTime": "", "minimumAge": "", "cost": ""})
-                        all_rows.append(row)
-                        print(f"[RECOVERED] {eid} → '{row['eventName']}' ({len(prices)} tickets) [Géneros: No encontrados]")
-                    except Exception as fallback_e:
-                        print(f"[ERROR] Could not recover event {eid}: {fallback_e}")
-                
-                time.sleep(random.uniform(0.3, 0.7))  # delay optimizado para GraphQL
-                
+            if area_buckets is not None:
+                events = area_buckets.get(venue_id, [])
+            else:
+                # Intentar obtener eventos via API GraphQL
+                with PROFILER.stage("fetch", venue=venue_name):
+                    events = http.call("venue_events", gql_get_events, s, venue_id, DATE_FROM, DATE_TO, COUNT)
+        except DeadlineExceeded:
+            unlisted.append({"id": venue_id, "name": venue_name})
+            continue
         except Exception as e:
             print(f"[ERROR] Failed to get events for {venue_name}: {e}")
-            
-        print()  # Separador entre venues
-
-    import os
-    # os.makedirs("output", exist_ok=True)
-    out_path = "ra_venues_events.json"
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(all_rows, f, ensure_ascii=False, indent=2)
-    print(f"\n✅ Guardadas {len(all_rows)} filas en {out_path}")
-    
-    # Resumen por venue
+            continue
+
+        if not events:
+            print(f"[WARNING] No events found for {venue_name} via API")
+            continue
+        print(f"[INFO] Found {len(events)} events for {venue_name}")
+        listed.append((venue_id, venue_name, events))
+    return listed, unlisted
+
+def _scrape_venues(s, http, listing, area, all_venues, event_memo, tiers, tier_stats):
+    carried = load_pending(PENDING_PATH, PENDING_MAX_AGE_S)
+    listed, unlisted = list_venue_targets(s, http, listing, area, all_venues, carried["venues"])
+
+    # Cola única de eventos: pendientes del run anterior primero, después por fecha (más próximos antes).
+    # pos conserva el orden venue/evento original para que la salida no cambie con el orden de proceso.
+    order = {vid: n for n, vid in enumerate(CLUB_NAMES)}
+    todo = [(pos, order.get(vid, len(order) + n), venue_name, ev) for n, (vid, venue_name, events) in enumerate(listed)
+            for pos, ev in enumerate(events)]
+    todo = soonest_first(todo, date_of=lambda q: q[3].get("date"), id_of=lambda q: q[3]["id"],
+                          priority_ids=carried["events"])
+
+    done, pending, stop = [], [], None
+    for n, (pos, vpos, venue_name, ev) in enumerate(todo):
+        if DEADLINE.expired() or http.wire.over_budget():
+            pending = todo[n:]
+            break
+        print(f"[PROCESSING] {venue_name} · evento {ev['id']} ({ev.get('date') or 'sin fecha'})")
+        try:
+            result = process_event(s, ev, http, event_memo, tiers, tier_stats)
+            if result:
+                done.append((vpos, pos, result))
+        except DeadlineExceeded as e:
+            pending, stop = todo[n:], str(e)
+            break
+        except Exception as e:
+            print(f"[ERROR] Failed to process event {ev['id']}: {e}")
+
+        with PROFILER.stage("sleep"):
+            DEADLINE.sleep(random.uniform(0.3, 0.7))  # delay optimizado para GraphQL
+
+    done.sort(key=lambda d: (d[0], d[1]))
+    all_rows = [row for _, _, (row, _record) in done]
+    all_records = [record for _, _, (_row, record) in done]
+
+    pending_events = [{"event_id": ev["id"], "date": ev.get("date"), "venue": venue_name}
+                      for _pos, _vpos, venue_name, ev in pending]
+    if pending_events or unlisted:
+        if stop is None:
+            stop = (f"presupuesto de {http.wire.budget_bytes / 1e6:.1f} MB agotado" if http.wire.over_budget()
+                    else f"deadline de {DEADLINE.seconds:.0f}s alcanzado")
+        print(f"\n[DEADLINE] Run cortado ({stop}): {len(all_rows)} eventos completos")
+    print_pending(pending_events, unlisted)
+    write_pending(PENDING_PATH, "ra_venues_full", pending_events, DEADLINE, unlisted)
+    return all_rows, all_records
+
+def write_venues_output(all_rows, all_records, formats, out_dir, run_id, images=False):
+    """Imágenes (opcional), salida en los formatos pedidos, event store y skip-list. Devuelve las rutas"""
+    if images:
+        with PROFILER.stage("images"):
+            cache_row_images(all_rows)
+
+    with PROFILER.stage("serialize"):
+        written = write_outputs(all_rows, all_records, formats, OUT_PATH, out_dir, run_id, source="ra_venues_full")
+        print(f"\n✅ Guardadas {len(all_rows)} filas en {', '.join(written)}")
+        if ENABLE_STORE:
+            n = update_store(all_rows, all_records, STORE_PATH)
+            print(f"✅ Event store actualizado: {n} eventos en {STORE_PATH}")
+        if WRITE_SKIP_LIST:
+            n = write_skip_list(all_rows, SKIP_LIST_PATH)
+            print(f"✅ Skip-list para ra_final: {n} eventos completos en {SKIP_LIST_PATH}")
+    return written
+
+def print_venue_summary(all_rows):
     venue_summary = {}
     for row in all_rows:
         venue = row["venue"]
@@ -484,3 +900,51 @@ if __name__ == "__main__":
     print("\n📊 Resumen por venue:")
     for venue, count in sorted(venue_summary.items()):
         print(f"  {venue}: {count} eventos")
+
+# =================== Main ===================
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Scraper de eventos RA por venue (GraphQL + widget)")
+    ap.add_argument("--format", default="json",
+                    help="formatos de salida separados por coma: json,sqlite,parquet")
+    ap.add_argument("--out-dir", default="output", help="directorio para sqlite/parquet")
+    ap.add_argument("--profile", action="store_true",
+                    help="perfilar cada etapa (pstats + flamegraph speedscope en profile/<run_id>/)")
+    ap.add_argument("--listing", choices=["venue", "area"], default=LISTING_MODE,
+                    help="listar por venue (una consulta por club) o por área (paginado, repartido por venue.id)")
+    ap.add_argument("--area", default=LISTING_AREA, help="clave de área de venues.json o ID de área de RA")
+    ap.add_argument("--all-venues", action="store_true",
+                    help="en modo área, procesar también los venues que no están en venues.json")
+    ap.add_argument("--images", action="store_true", default=ENABLE_IMAGES,
+                    help="descargar los flyers a la caché local y añadir imageThumbs a cada fila")
+    ap.add_argument("--deadline", type=float, default=RUN_DEADLINE_S,
+                    help="segundos máximos del run: al llegar se escribe lo completado y el resto queda pendiente")
+    ap.add_argument("--query-profile", choices=list(EVENT_FIELDS), default=QUERY_PROFILE,
+                    help="campos de las consultas GraphQL: minimal (solo lo que se usa) o full")
+    ap.add_argument("--wire-budget-mb", type=float, default=WIRE_BUDGET_MB,
+                    help="MB máximos descargados (en la red) por run; al pasarlos el resto queda pendiente")
+    ap.add_argument("--refresh", choices=list(FIELD_TIERS) + ["all"], action="append", default=[],
+                    help="ignorar la caché de un nivel de campos en este run (repetible)")
+    args = ap.parse_args()
+    QUERY_PROFILE = args.query_profile
+    for tier in FIELD_TIERS:
+        if tier in args.refresh or "all" in args.refresh:
+            FORCE_REFRESH.add(tier)  # se descarga y se vuelve a guardar
+    formats = parse_formats(args.format)
+    run_id = new_run_id()
+    if args.profile:
+        PROFILER.enable(PROFILE_DIR)
+
+    s = make_session()
+    if ENABLE_ARCHIVE:
+        ARCHIVE = RawArchive(ARCHIVE_DIR, run_id=run_id)
+    http = make_retry_client(budget_mb=args.wire_budget_mb)
+
+    all_rows, all_records = scrape_venues(s, http, args.listing, args.area, args.all_venues, args.deadline)
+    write_venues_output(all_rows, all_records, formats, args.out_dir, run_id, args.images)
+
+    # Resumen por venue
+    print_venue_summary(all_rows)
+
+    http.print_summary()
+    PROFILER.finish(run_id)
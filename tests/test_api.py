@@ -0,0 +1,41 @@
+# python -m pytest -q tests
+import os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ra_api
+import ra_final
+
+
+def test_closing_club_iterator_lets_browser_task_return(monkeypatch):
+    runs = []
+
+    def fake_task(data):
+        """Como scrape_club_task: emite fila a fila y mira data["cancelled"] en cada evento"""
+        run = {"club_id": data["club_id"], "emitted": 0, "returned": False}
+        runs.append(run)
+        try:
+            for n in range(50):
+                if data["cancelled"]():
+                    break
+                data["emit"]({"url": f"https://es.ra.co/events/{data['club_id']}{n:03d}"}, None)
+                run["emitted"] += 1
+            run["returned"] = True  # botasaurus solo cierra el navegador si la tarea vuelve o lanza Exception
+        except BaseException as e:
+            run["raised"] = type(e).__name__
+            raise
+
+    monkeypatch.setattr(ra_final, "scrape_club", fake_task)
+    it = ra_api.iter_club_events(club_ids=[1, 2], buffer=1)
+    first = [next(it) for _ in range(3)]
+    it.close()
+
+    for _ in range(100):
+        if runs and (runs[0]["returned"] or "raised" in runs[0]):
+            break
+        time.sleep(0.05)
+
+    assert len(first) == 3
+    assert runs[0]["returned"] and "raised" not in runs[0]
+    assert runs[0]["emitted"] < 50
+    assert [r["club_id"] for r in runs] == [1]  # no se abre el navegador del siguiente club
@@ -0,0 +1,130 @@
+# python -m pytest -q tests
+import os, sys, time, queue
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ra_browser import GuardedDriver, OperationTimeout, TabPool, RateLimiter
+
+
+class FakeTab:
+    def __init__(self, n):
+        self.n = n
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeDriver:
+    """Driver mínimo para TabPool: cada tab carga al instante salvo las URLs de `stale` (el tab se
+    queda con el documento anterior); run_js con hang_js se cuelga una vez"""
+
+    def __init__(self, hang_js=None, stale=()):
+        self.hang_js = hang_js
+        self.stale = set(stale)
+        self.tabs = []
+        self.urls = {}
+        self._tab = None
+
+    def open_link_in_new_tab(self, url):
+        self._tab = FakeTab(len(self.tabs))
+        self.tabs.append(self._tab)
+        self.urls[self._tab.n] = url
+        return self._tab
+
+    def switch_to_tab(self, tab):
+        self._tab = tab
+
+    def run_js(self, js, args=None, timeout=None):
+        if self.hang_js and self.hang_js in js:
+            self.hang_js = None
+            time.sleep(60)
+        if "location.assign" in js:
+            if args["url"] not in self.stale:
+                self.urls[self._tab.n] = args["url"]
+            return True
+        if "location.href" in js:  # PROBE_READY_JS
+            return "jsonld" if self.urls[self._tab.n].endswith(args["path"]) else ""
+        return "jsonld"
+
+    @property
+    def page_html(self):
+        return f"<html>{self.urls[self._tab.n]}</html>"
+
+
+def make_jobs(n):
+    jobs = queue.Queue()
+    for i in range(n):
+        jobs.put({"url": f"https://es.ra.co/events/{i}", "path": f"/events/{i}"})
+    return jobs
+
+
+def test_timeout_inside_handle_page_marks_job_hung_and_pool_continues():
+    driver = GuardedDriver(FakeDriver(), nav_timeout_s=1, script_timeout_s=0.5, log=lambda *a: None)
+    pool = TabPool(driver, 2, RateLimiter(6000), nav_timeout_s=2)
+    delivered = []
+
+    def handle_page(job, html, signal, elapsed_ms, tab_index):
+        if signal != "hung" and job["url"].endswith("/1"):
+            driver.run_js("window.performance; return 1;", timeout=None)  # como finish_page
+        delivered.append((job["url"].rsplit("/", 1)[-1], signal))
+
+    driver.driver.hang_js = "window.performance"
+    left = pool.run(make_jobs(4), handle_page)
+    pool.close()
+
+    assert left == []
+    assert ("1", "hung") in delivered
+    assert sorted(u for u, s in delivered if s == "jsonld") == ["0", "2", "3"]
+    assert pool.hung_pages == 1
+
+
+def test_guarded_call_times_out_and_recycle_clears_hung():
+    fake = FakeDriver(hang_js="stuck")
+    driver = GuardedDriver(fake, nav_timeout_s=1, script_timeout_s=0.3, log=lambda *a: None)
+    driver.open_link_in_new_tab("about:blank")
+    try:
+        driver.run_js("stuck")
+    except OperationTimeout:
+        pass
+    else:
+        raise AssertionError("run_js colgado sin OperationTimeout")
+    assert driver.hung == "run_js"
+    old = fake._tab
+    driver.recycle()
+    assert driver.hung is None and old.closed and fake._tab is not old
+
+
+def test_timeout_before_navigation_commits_does_not_read_previous_page():
+    stale = "https://es.ra.co/events/1"
+    driver = FakeDriver(stale={stale})
+    pool = TabPool(driver, 1, RateLimiter(6000), nav_timeout_s=0.2, poll_interval_s=0.01)
+    delivered = {}
+    left = pool.run(make_jobs(3), lambda job, html, signal, ms, i: delivered.update({job["url"]: (html, signal)}))
+
+    assert left == []
+    # el tab seguía en /events/0: ni su HTML ni su señal se atribuyen a /events/1
+    assert delivered[stale] == ("", "")
+    assert delivered["https://es.ra.co/events/2"] == ("<html>https://es.ra.co/events/2</html>", "jsonld")
+
+
+class FakeRequest:
+    def __init__(self, url):
+        self.url = url
+
+
+def test_reapplying_block_report_on_same_tab_registers_one_handler():
+    from ra_browser import RequestBlockReport
+
+    driver = FakeDriver()
+    driver.handlers = []
+    driver.before_request_sent = driver.handlers.append
+    driver.open_link_in_new_tab("about:blank")
+    first, second = RequestBlockReport(enforce=False), RequestBlockReport(enforce=False)
+    first.apply(driver)
+    second.apply(GuardedDriver(driver, log=lambda *a: None))  # run siguiente con el navegador caliente
+
+    for handler in driver.handlers:
+        handler("1", FakeRequest("https://es.ra.co/events/1"), None)
+    assert len(driver.handlers) == 1
+    assert (first.requests_total, second.requests_total) == (0, 1)
@@ -0,0 +1,33 @@
+# python -m pytest -q tests
+import os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ra_deadline import Deadline, soonest_first, write_pending, load_pending, venues_first
+
+
+def test_pending_from_previous_run_first_then_soonest_and_undated_last():
+    events = [{"id": 1, "date": "2030-03-01"}, {"id": 2, "date": None}, {"id": 3, "date": "2030-01-01"},
+              {"id": 4, "date": "2030-02-01"}, {"id": 5, "date": None}]
+    ordered = soonest_first(events, lambda e: e["date"], lambda e: e["id"], priority_ids=["4", 5])
+    assert [e["id"] for e in ordered] == [4, 5, 3, 1, 2]
+
+
+def test_pending_round_trip_keeps_order(tmp_path):
+    path = str(tmp_path / "pending.json")
+    events = [{"event_id": 30, "date": "2030-01-01"}, {"event_id": 10, "date": "2030-02-01"}]
+    assert write_pending(path, "ra_final", events, Deadline(60), venues=[{"id": 7, "name": "Club"}]) == 2
+    pending = load_pending(path)
+    assert pending == {"events": ["30", "10"], "venues": ["7"]}
+    assert venues_first([5, 6, 7, 8], pending["venues"]) == [7, 5, 6, 8]
+    assert load_pending(str(tmp_path / "missing.json")) == {"events": [], "venues": []}
+
+
+def test_human_delay_is_clamped_to_the_deadline():
+    import ra_final
+    deadline = Deadline(0.2)
+    t0 = time.monotonic()
+    ra_final.human_delay(5000, 8000, deadline)
+    assert time.monotonic() - t0 < 1.0
+    ra_final.human_delay(5000, 8000, Deadline(at=time.time() - 1))  # ya vencido: no duerme
+    assert time.monotonic() - t0 < 1.0
@@ -0,0 +1,48 @@
+# python -m pytest -q tests
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import requests
+
+from ra_http import RetryClient, RetryPolicy, is_retryable
+
+
+class FakeResponse:
+    status_code = 200
+    text = "<html>Just a moment...</html>"
+
+    def json(self):
+        return requests.models.complexjson.loads(self.text)
+
+
+def non_json_call():
+    try:
+        return FakeResponse().json()
+    except ValueError as e:  # como Response.json(): relanza como requests.JSONDecodeError
+        raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos)
+
+
+def test_json_decode_error_is_not_retryable():
+    with pytest.raises(requests.exceptions.JSONDecodeError) as info:
+        non_json_call()
+    assert isinstance(info.value, OSError)  # por eso antes se reintentaba
+    assert not is_retryable(info.value)
+    assert not is_retryable(requests.exceptions.InvalidJSONError("cuerpo no serializable"))
+    assert is_retryable(requests.exceptions.ConnectionError("reset"))
+
+
+def test_non_json_body_is_not_retried_nor_counted_by_breaker():
+    http = RetryClient(RetryPolicy(max_attempts=4, base_delay=0), log=lambda *a: None)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return non_json_call()
+
+    with pytest.raises(requests.exceptions.JSONDecodeError):
+        http.call("venue_events", fetch)
+    breaker, st = http._endpoint("venue_events")
+    assert len(calls) == 1
+    assert st["retries"] == 0 and breaker.failures == 0
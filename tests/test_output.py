@@ -0,0 +1,59 @@
+# python -m pytest -q tests
+import os, sys, sqlite3
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ra_output import make_record, write_sqlite, write_parquet
+
+
+def record(event_id, name, prices):
+    return make_record({"event_id": event_id, "source": "ra_final", "event_name": name,
+                        "url": f"https://ra.co/events/{event_id}" if event_id else ""},
+                       [{"title": f"T{i}", "price": p, "status": "onsale"} for i, p in enumerate(prices)])
+
+
+RECORDS = [
+    record(1, "uno", [10, 12]),
+    record(None, "sin id", [5]),
+    record(2, "dos", [20]),
+    record(1, "uno bis", [11]),  # ID repetido: queda este registro entero
+]
+
+
+def sqlite_snapshot(path, run_id):
+    con = sqlite3.connect(path)
+    try:
+        events = con.execute("SELECT event_id, event_name FROM events WHERE run_id = ? ORDER BY event_id", (run_id,)).fetchall()
+        tickets = con.execute("SELECT event_id, position, price FROM tickets WHERE run_id = ? ORDER BY event_id, position",
+                              (run_id,)).fetchall()
+    finally:
+        con.close()
+    return events, tickets
+
+
+def test_sqlite_snapshot_drops_missing_ids_and_keeps_last_repeat(tmp_path):
+    path = str(tmp_path / "runs.sqlite")
+    write_sqlite(RECORDS, path, "r1")
+    assert sqlite_snapshot(path, "r1") == ([(1, "uno bis"), (2, "dos")], [(1, 1, 11.0), (2, 1, 20.0)])
+
+
+def test_rewriting_a_run_replaces_it(tmp_path):
+    path = str(tmp_path / "runs.sqlite")
+    write_sqlite(RECORDS, path, "r1")
+    write_sqlite(RECORDS, path, "r0")
+    write_sqlite([record(2, "dos", [21])], path, "r1")  # replay --run r1
+    assert sqlite_snapshot(path, "r1") == ([(2, "dos")], [(2, 1, 21.0)])
+    assert sqlite_snapshot(path, "r0")[0] == [(1, "uno bis"), (2, "dos")]
+
+
+def test_parquet_snapshot_matches_sqlite(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "runs.sqlite")
+    write_sqlite(RECORDS, path, "r1")
+    write_parquet(RECORDS, str(tmp_path / "pq"), "r1")
+    events = pq.read_table(str(tmp_path / "pq" / "events" / "run_id=r1")).to_pylist()
+    tickets = pq.read_table(str(tmp_path / "pq" / "tickets" / "run_id=r1")).to_pylist()
+    assert (sorted((e["event_id"], e["event_name"]) for e in events),
+            sorted((t["event_id"], t["position"], t["price"]) for t in tickets)) == sqlite_snapshot(path, "r1")
@@ -0,0 +1,19 @@
+# python -m pytest -q tests
+import os, sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ra_startup import IMPORT_BUDGET_MS, check
+
+# máquinas de CI lentas: RA_STARTUP_SCALE=2 duplica los presupuestos
+SCALE = float(os.environ.get("RA_STARTUP_SCALE", "1.0"))
+
+
+@pytest.mark.parametrize("module", list(IMPORT_BUDGET_MS))
+def test_entry_point_import_budget(module):
+    (res,) = check([module], runs=3, scale=SCALE)
+    assert "error" not in res, res.get("error")
+    assert res["heavy"] == [], f"{module} importa dependencias pesadas: {res['heavy']}"
+    assert res["import_ms"] <= res["budget_ms"], f"{module}: {res['import_ms']} ms > {res['budget_ms']:.0f} ms ({res['top']})"
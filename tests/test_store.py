@@ -0,0 +1,59 @@
+# python -m pytest -q tests
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ra_store import EventStore
+
+EVENT_ID = 2200001
+URL = f"https://ra.co/events/{EVENT_ID}"
+
+
+def write(store, source, price, name):
+    row = {"url": URL, "venue": "Razzmatazz", "eventName": name, "event_date": "2030-01-10",
+           "releaseName1": "Early", "price1": price, "currentRelease": "Early"}
+    record = {"event": {"event_id": EVENT_ID, "source": source, "url": URL, "venue_id": None},
+              "tickets": [{"position": 1, "title": "Early", "price": price, "status": "onsale",
+                           "is_add_on": False, "url": URL}]}
+    store.upsert([row], [record])
+
+
+def stored_prices(store):
+    row = store.get_event(EVENT_ID)
+    tickets = [p for (p,) in store.con.execute("SELECT price FROM tickets WHERE event_id = ?", (EVENT_ID,))]
+    return row["price1"], tickets
+
+
+def test_ra_final_keeps_release_precedence_after_a_cross_source_merge(tmp_path):
+    with EventStore(str(tmp_path / "store.sqlite")) as store:
+        write(store, "ra_final", 10.0, "final")
+        write(store, "ra_venues_full", 12.0, "venues")
+        assert stored_prices(store) == (12.0, [12.0])  # el widget va antes que el HTML
+        assert store.get_event(EVENT_ID)["eventName"] == "venues"
+
+        # ya fusionado: una pasada nueva de ra_final no gana releases, pero sí actualiza lo suyo
+        write(store, "ra_final", 11.0, "final 2")
+        assert stored_prices(store) == (12.0, [12.0])
+
+        # precio nuevo del widget: sustituye al anterior en vez de quedar el de la fusión vieja
+        write(store, "ra_venues_full", 15.0, "venues 2")
+        assert stored_prices(store) == (15.0, [15.0])
+        assert store.get_event(EVENT_ID)["eventName"] == "venues 2"
+
+
+def test_same_source_updates_replace_its_own_prices(tmp_path):
+    with EventStore(str(tmp_path / "store.sqlite")) as store:
+        write(store, "ra_final", 10.0, "final")
+        write(store, "ra_final", 11.0, "final")
+        assert stored_prices(store) == (11.0, [11.0])
+
+
+def test_ra_final_prices_refresh_when_widget_has_no_releases(tmp_path):
+    with EventStore(str(tmp_path / "store.sqlite")) as store:
+        write(store, "ra_final", 10.0, "final")
+        store.upsert([{"url": URL, "venue": "Razzmatazz", "eventName": "venues", "event_date": "2030-01-10"}],
+                     [{"event": {"event_id": EVENT_ID, "source": "ra_venues_full", "url": URL, "venue_id": None},
+                       "tickets": []}])
+        write(store, "ra_final", 11.0, "final 2")
+        # las releases de la fusión anterior no cuentan como del widget
+        assert stored_prices(store) == (11.0, [11.0])